@@ -0,0 +1,295 @@
+try:
+    __import__('pysqlite3')
+    import sys
+    sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+except ImportError:
+    pass
+
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from urllib.parse import urlparse
+from aiohttp import web
+from config import Config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for new progress events of a followed indexing job
+_JOB_POLL_INTERVAL = 0.25
+
+def _source(doc) -> Dict:
+    return {
+        "url": doc.metadata.get("source"),
+        "title": doc.metadata.get("title"),
+        "snippet": doc.page_content[:300]
+    }
+
+def _line(data: Dict) -> bytes:
+    return (json.dumps(data) + "\n").encode("utf-8")
+
+def _stepper(iterator):
+    """next() and close() for a generator advanced on worker threads; close() waits for a running next()."""
+    lock = threading.Lock()
+
+    def step():
+        with lock:
+            return next(iterator, None)
+
+    def close():
+        with lock:
+            iterator.close()
+
+    return step, close
+
+async def _json_body(request: web.Request) -> Dict:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text="Request body must be JSON.")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Request body must be a JSON object.")
+    return body
+
+def _max_pages(body: Dict) -> int:
+    """Requested page limit, at most MAX_PAGES_CRAWL."""
+    value = body.get("max_pages", Config.MAX_PAGES_CRAWL)
+    # bool is an int subclass, but "max_pages": true is a client bug
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise web.HTTPBadRequest(text="'max_pages' must be a positive integer.")
+    return min(value, Config.MAX_PAGES_CRAWL)
+
+def _history(body: Dict) -> List[Dict]:
+    history = body.get("history") or []
+    if not isinstance(history, list) or not all(
+        isinstance(message, dict) and isinstance(message.get("role"), str) and isinstance(message.get("content"), str)
+        for message in history
+    ):
+        raise web.HTTPBadRequest(text="'history' must be a list of {\"role\", \"content\"} messages with string values.")
+    return history
+
+class ChatService:
+    """Indexing and question answering for the HTTP API.
+
+    One embedding function, site registry, answer cache and LLM client are shared
+    by all requests. Indexing runs as background jobs on the JobManager's workers;
+    answers run on a thread pool, with a semaphore bounding how many run at once.
+    """
+
+    def __init__(self):
+        from backend.answer_cache import AnswerCache
+        from backend.embedder import Embedder
+        from backend.indexer import SiteIndexer
+        from backend.job_manager import JobManager
+        from backend.qa_chain import create_llm
+        from backend.site_registry import SiteRegistry
+        import httpx
+
+        self.indexer = SiteIndexer(Embedder().get_embedding_function(), SiteRegistry())
+        self.registry = self.indexer.registry
+        self.jobs = JobManager(self.indexer, max_active=Config.API_MAX_ACTIVE_JOBS)
+        self.answer_cache = AnswerCache() if Config.ANSWER_CACHE_ENABLED else None
+        self.http_client = httpx.Client(limits=httpx.Limits(
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_CONNECTIONS
+        ))
+        self.llm = create_llm(http_client=self.http_client)
+
+        self.ask_slots = asyncio.Semaphore(Config.API_ASK_CONCURRENCY)
+        self.ask_executor = ThreadPoolExecutor(Config.API_ASK_CONCURRENCY, thread_name_prefix="api-ask")
+        self.index_slots = asyncio.Semaphore(Config.API_INDEX_CONCURRENCY)
+        self.index_executor = ThreadPoolExecutor(Config.API_INDEX_CONCURRENCY, thread_name_prefix="api-index")
+        # site_id → (indexed_at, retriever); reopened when the site is re-indexed
+        self._retrievers: Dict[str, tuple] = {}
+
+    def close(self):
+        self.jobs.shutdown()
+        self.ask_executor.shutdown(wait=False, cancel_futures=True)
+        self.index_executor.shutdown(wait=False, cancel_futures=True)
+        self.http_client.close()
+
+    def _retriever(self, site_id: str):
+        site = self.registry.get(site_id)
+        # A site being re-indexed keeps answering from its previous index
+        if not site or site["status"] == "failed" or not site["indexed_at"]:
+            return None, None
+        cached = self._retrievers.get(site_id)
+        if cached and cached[0] == site["indexed_at"]:
+            return site, cached[1]
+        retriever = self.indexer.open_retriever(site_id)
+        self._retrievers[site_id] = (site["indexed_at"], retriever)
+        return site, retriever
+
+    async def _run(self, executor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    async def index(self, request: web.Request) -> web.StreamResponse:
+        """Queue an indexing job; streams its progress events unless "wait" is false."""
+        body = await _json_body(request)
+        url = body.get("url", "")
+        parsed = urlparse(url) if isinstance(url, str) else None
+        if parsed is None or parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise web.HTTPBadRequest(text="'url' must be an http(s) URL.")
+        max_pages = _max_pages(body)
+
+        from backend.job_manager import JobQueueFull
+        from backend.validator import Validator
+        async with self.index_slots:
+            validation = await self._run(self.index_executor, Validator.validate_gateway, url)
+            if not validation["valid"]:
+                raise web.HTTPBadRequest(text=validation["error"])
+            try:
+                # Joins the running job if this site is already being indexed
+                job = await self._run(
+                    self.index_executor,
+                    lambda: self.jobs.submit(url, max_pages, seed_page=validation.get("page"), force=bool(body.get("force")))
+                )
+            except JobQueueFull as e:
+                raise web.HTTPServiceUnavailable(text=f"{e}; retry later.", headers={"Retry-After": "30"})
+        if not body.get("wait", True):
+            return web.json_response(job.snapshot(), status=202)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        sent = 0
+        try:
+            await response.write(_line({"job_id": job.job_id}))
+            while True:
+                finished = not job.active
+                for event in job.events_since(sent):
+                    await response.write(_line(event))
+                    sent += 1
+                if finished:
+                    break
+                await asyncio.sleep(_JOB_POLL_INTERVAL)
+            await response.write(_line({"job": job.snapshot()}))
+        except ConnectionResetError:
+            # The job keeps running; DELETE /jobs/<id> cancels it
+            logger.info(f"Client stopped following indexing job {job.job_id}")
+            return response
+        await response.write_eof()
+        return response
+
+    async def job_status(self, request: web.Request) -> web.Response:
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            raise web.HTTPNotFound(text="Unknown or expired job.")
+        return web.json_response(job.snapshot())
+
+    async def list_jobs(self, request: web.Request) -> web.Response:
+        return web.json_response({"jobs": self.jobs.list_jobs()})
+
+    async def cancel_job(self, request: web.Request) -> web.Response:
+        job_id = request.match_info["job_id"]
+        if self.jobs.get(job_id) is None:
+            raise web.HTTPNotFound(text="Unknown or expired job.")
+        return web.json_response({"job_id": job_id, "cancelled": self.jobs.cancel(job_id)})
+
+    async def ask(self, request: web.Request) -> web.StreamResponse:
+        from backend.qa_chain import QAChain
+        body = await _json_body(request)
+        question = body.get("question")
+        question = question.strip() if isinstance(question, str) else ""
+        if not question:
+            raise web.HTTPBadRequest(text="'question' is required.")
+        site_id = body.get("site_id") or (self.registry.site_id_for(body["url"]) if body.get("url") else None)
+        if not site_id:
+            raise web.HTTPBadRequest(text="Either 'site_id' or 'url' is required.")
+        history = _history(body)
+
+        async with self.ask_slots:
+            site, retriever = await self._run(self.ask_executor, self._retriever, site_id)
+            if retriever is None:
+                raise web.HTTPNotFound(text="This site has not been indexed; POST /index first.")
+            await self._run(self.ask_executor, self.registry.touch, site_id)
+            qa_chain = QAChain(
+                retriever, answer_cache=self.answer_cache, cache_scope=f"{site_id}:{site['indexed_at']}", llm=self.llm
+            )
+
+            if not body.get("stream", True):
+                result = await self._run(self.ask_executor, qa_chain.answer, question, history)
+                return web.json_response({"answer": result["answer"], "sources": [_source(doc) for doc in result["sources"]]})
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            stream, close = None, None
+            try:
+                stream = await self._run(self.ask_executor, qa_chain.stream_answer, question, history)
+                await response.write(_line({"sources": [_source(doc) for doc in stream.sources]}))
+                step, close = _stepper(iter(stream))
+                while (chunk := await self._run(self.ask_executor, step)) is not None:
+                    await response.write(_line({"token": chunk}))
+                await response.write(_line({"done": True, "answer": stream.answer}))
+            except ConnectionResetError:
+                logger.info(f"Client disconnected while answering '{question}'")
+                return response
+            except Exception as e:
+                logger.error(f"Answering '{question}' via API failed: {e}")
+                await response.write(_line({"error": str(e)}))
+            finally:
+                if close is not None:
+                    # Ends the LLM stream if the client went away
+                    await self._run(self.ask_executor, close)
+                if stream is not None:
+                    # Releases the answer-cache claim even if no token was requested
+                    await self._run(self.ask_executor, stream.close)
+            await response.write_eof()
+            return response
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        from backend.metrics import metrics
+        if request.query.get("format") == "json":
+            return web.json_response(metrics.summary())
+        return web.Response(body=metrics.prometheus().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def health(self, request: web.Request) -> web.Response:
+        vectors = await self._run(self.ask_executor, self.registry.total_vectors)
+        return web.json_response({"status": "ok", "vectors": vectors})
+
+@web.middleware
+async def auth_middleware(request: web.Request, handler):
+    if Config.API_TOKEN and not hmac.compare_digest(
+        request.headers.get("Authorization", "").encode("utf-8"), f"Bearer {Config.API_TOKEN}".encode("utf-8")
+    ):
+        raise web.HTTPUnauthorized(text="Missing or invalid API token.")
+    return await handler(request)
+
+def create_app() -> web.Application:
+    app = web.Application(middlewares=[auth_middleware])
+    app.router.add_post("/index", lambda request: request.app["service"].index(request))
+    app.router.add_post("/ask", lambda request: request.app["service"].ask(request))
+    app.router.add_get("/jobs", lambda request: request.app["service"].list_jobs(request))
+    app.router.add_get("/jobs/{job_id}", lambda request: request.app["service"].job_status(request))
+    app.router.add_delete("/jobs/{job_id}", lambda request: request.app["service"].cancel_job(request))
+    app.router.add_get("/metrics", lambda request: request.app["service"].metrics(request))
+    app.router.add_get("/health", lambda request: request.app["service"].health(request))
+
+    async def start(app: web.Application):
+        # Loads the embedding model once, before the first request
+        app["service"] = await asyncio.get_running_loop().run_in_executor(None, ChatService)
+
+    async def stop(app: web.Application):
+        app["service"].close()
+
+    app.on_startup.append(start)
+    app.on_cleanup.append(stop)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP API: POST /index and POST /ask (NDJSON streaming).")
+    parser.add_argument("--host", default=Config.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.API_PORT)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
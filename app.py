@@ -9,6 +9,7 @@ import streamlit as st
 import time
 import logging
 import traceback
+import uuid
 
 # Configure logging first
 logging.basicConfig(
@@ -31,6 +32,115 @@ def get_embedder():
     from backend.embedder import Embedder
     return Embedder().get_embedding_function()
 
+@st.cache_resource
+def get_llm():
+    # One client for every session, so connections to the LLM endpoint are reused
+    from backend.qa_chain import create_llm
+    return create_llm()
+
+@st.cache_resource
+def get_answer_cache():
+    from backend.answer_cache import AnswerCache
+    return AnswerCache()
+
+def answer_cache_scope():
+    # Tied to the site's last index time, so answers from before a re-index are never reused
+    site = get_site_registry().get(st.session_state.get("site_id")) if st.session_state.get("site_id") else None
+    if not site or not site.get("indexed_at"):
+        return None
+    return f"{site['site_id']}:{site['indexed_at']}"
+
+@st.cache_resource
+def get_site_registry():
+    from backend.site_registry import SiteRegistry
+    return SiteRegistry()
+
+@st.cache_resource
+def get_content_store():
+    if not Config.CONTENT_STORE_ENABLED:
+        return None
+    from backend.content_store import ContentStore
+    return ContentStore()
+
+@st.cache_resource
+def get_job_manager():
+    from backend.indexer import SiteIndexer
+    from backend.job_manager import JobManager
+    return JobManager(SiteIndexer(get_embedder(), get_site_registry(), content_store=get_content_store()))
+
+def session_content(items):
+    """Pages, extracted text or chunks of an indexing run, as kept in session state.
+
+    With the content store they stay on disk and the session holds a small handle
+    that reads them lazily; its read cache counts against this session's budget.
+    """
+    if not hasattr(items, "handle"):
+        return items
+    owner = st.session_state.setdefault("content_owner", uuid.uuid4().hex)
+    return items.handle(owner)
+
+_STAGE_LABELS = (
+    ("crawl", "🕷️ Pages fetched"),
+    ("extract", "📄 Pages extracted"),
+    ("chunk", "✂️ Chunks created"),
+    ("embed", f"🧠 Chunks embedded into {Config.VECTOR_STORE_PROVIDER.title()}"),
+    ("index", "🔎 Keyword index"),
+)
+
+def render_index_job(job_id):
+    """Progress of this session's indexing job; the script reruns every INDEX_JOB_POLL_INTERVAL until it ends."""
+    jobs = get_job_manager()
+    job = jobs.get(job_id)
+    if job is None:
+        st.session_state.index_job_id = None
+        st.warning("The indexing job is no longer available. Please index the website again.")
+        return
+    
+    snapshot = job.snapshot()
+    if job.active:
+        with st.status(f"Indexing {job.url}...", expanded=True):
+            if snapshot["status"] == "queued":
+                st.write("⏳ Waiting for a free indexing slot...")
+            crawl = snapshot["progress"].get("crawl")
+            if crawl and not crawl["done"]:
+                st.progress(min(1.0, crawl["count"] / max(1, snapshot["limit"])))
+            for stage, label in _STAGE_LABELS:
+                progress = snapshot["progress"].get(stage)
+                if progress:
+                    st.write(f"{'✅' if progress['done'] else '⏳'} {label}: {progress['count']}")
+            if snapshot["message"]:
+                st.caption(snapshot["message"])
+            if st.button("Cancel indexing", type="secondary"):
+                jobs.cancel(job_id)
+        time.sleep(Config.INDEX_JOB_POLL_INTERVAL)
+        st.rerun()
+    
+    st.session_state.index_job_id = None
+    if snapshot["status"] == "cancelled":
+        st.info(f"Indexing of {job.url} was cancelled.")
+        return
+    if snapshot["status"] == "failed":
+        st.error(f"Indexing failed: {snapshot['error']}")
+        return
+    
+    result = snapshot["result"]
+    st.session_state.vectorstore = jobs.indexer.open_retriever(result["site_id"])
+    st.session_state.site_id = result["site_id"]
+    pipeline = job.pipeline
+    if get_content_store() and st.session_state.get("content_owner"):
+        # Content of the previously indexed site is no longer needed in memory
+        get_content_store().release(st.session_state.content_owner)
+    st.session_state.raw_data = session_content(pipeline.pages) if pipeline else []
+    st.session_state.extracted_data = session_content(pipeline.extracted_data) if pipeline else []
+    st.session_state.chunks = session_content(pipeline.chunks) if pipeline else []
+    st.session_state.indexed = True
+    st.session_state.current_url = job.url
+    if result["reused"]:
+        st.success(f"♻️ {snapshot['message']}")
+    else:
+        st.success(f"Successfully indexed: {job.url} ({result['chunks']} chunks)")
+    st.rerun()
+
 def main():
     st.set_page_config(page_title="AI Website Chatbot", page_icon="🤖", layout="wide")
     
@@ -46,98 +156,23 @@ def main():
 
     UI.init_state()
     UI.render_sidebar(Auth)
+    if Config.METRICS_ENABLED:
+        from backend.metrics import metrics
+        UI.render_metrics(metrics.summary(), metrics.prometheus())
     
     UI.render_header()
     
     url_to_index = UI.render_input_section()
     
-    if url_to_index:
-        if st.session_state.get("indexed") and st.session_state.get("current_url") == url_to_index:
-            pass
-        else:
-            with st.status("Indexing website content...", expanded=True) as status:
-                t_start = time.time()
-                
-                # LAZY IMPORTS START
-                from backend.crawler import Crawler
-                from backend.extractor import Extractor
-                from backend.cleaner import Cleaner
-                from backend.chunker import Chunker
-                from backend.vectorstore import VectorStore
-                # LAZY IMPORTS END
-
-                st.write(f"🕷️ Starting crawl for {url_to_index}...")
-                crawler = Crawler()
-                try:
-                    crawled_pages = crawler.crawl(url_to_index)
-                    st.write(f"✅ Found {len(crawled_pages)} pages:")
-                    for page in crawled_pages:
-                        st.write(f"- {page['url']}")
-                    
-                    st.session_state.raw_data = crawled_pages
-                    
-                except Exception as e:
-                    st.error(f"Crawling failed: {str(e)}")
-                    status.update(label="Indexing Failed", state="error")
-                    st.stop()
-                
-                st.write("📝 Extracting content...")
-                extractor = Extractor()
-                extracted_data = []
-                
-                for page in crawled_pages:
-                    result = extractor.extract(page['html'])
-                    if result:
-                        extracted_data.append({
-                            "url": page['url'], 
-                            "text": result['text'], 
-                            "title": result['title']
-                        })
-                        st.caption(f"Extracted {len(result['text'])} chars from {page['url']} ('{result['title']}')")
-                    else:
-                        st.caption(f"⚠️ Skipped {page['url']} (Low quality/Empty)")
-                
-                st.session_state.extracted_data = extracted_data
-                st.write(f"✅ Extracted content from {len(extracted_data)} pages.")
+    if url_to_index and not (st.session_state.get("indexed") and st.session_state.get("current_url") == url_to_index):
+        prefetched = st.session_state.pop("prefetched_page", None)
+        seed_page = prefetched["page"] if prefetched and prefetched["url"] == url_to_index else None
+        # Joins the running job if another session is already indexing this site
+        job = get_job_manager().submit(url_to_index, seed_page=seed_page)
+        st.session_state.index_job_id = job.job_id
 
-                st.write("🧩 Splitting text into chunks...")
-                cleaner = Cleaner()
-                chunker = Chunker()
-                all_chunks = []
-                
-                for data in extracted_data:
-                    clean_text = cleaner.clean(data['text'])
-                    chunks = chunker.chunk(clean_text, data['url'], data['title'])
-                    all_chunks.extend(chunks)
-                
-                st.session_state.chunks = all_chunks
-                st.write(f"✅ Generated {len(all_chunks)} chunks from {len(extracted_data)} pages.")
-
-                st.write(f"🧠 Generating embeddings and storing in {Config.VECTOR_STORE_PROVIDER.title()}...")
-                
-                embedding_function = get_embedder()
-                
-                try:
-                    vs_wrapper = VectorStore(collection_name="website_content")
-                    vectorstore = vs_wrapper.create_collection(all_chunks, embedding_function)
-                    
-                    if vectorstore:
-                        st.session_state.vectorstore = vs_wrapper.as_retriever(vectorstore)
-                        st.write(f"✅ Successfully stored in {Config.VECTOR_STORE_PROVIDER.title()} DB.")
-                    else:
-                         raise RuntimeError("Vector Store returned None without exception.")
-
-                except Exception as e:
-                    st.error(f"Failed to create Vector Store: {str(e)}")
-                    status.update(label="Indexing Failed", state="error")
-                    st.stop()
-                
-                status.update(label=f"Indexing Complete! ({len(all_chunks)} chunks indexed)", state="complete", expanded=False)
-            
-            st.session_state.indexed = True
-            st.session_state.current_url = url_to_index
-            st.success(f"Successfully indexed: {url_to_index}")
-            st.rerun()
+    if st.session_state.get("index_job_id"):
+        render_index_job(st.session_state.index_job_id)
 
     for message in st.session_state.messages:
         with st.chat_message(message["role"], avatar="🧑‍💻" if message["role"] == "user" else "🤖"):
@@ -160,21 +195,33 @@ def main():
 
             try:
                 from backend.qa_chain import QAChain
-                qa_chain = QAChain(st.session_state.vectorstore)
-                
-                history_window = st.session_state.messages[-5:] 
-                chat_history_str = ""
-                for msg in history_window:
-                    role_label = "Human" if msg["role"] == "user" else "AI"
-                    chat_history_str += f"{role_label}: {msg['content']}\n"
+                if Config.ANSWER_CACHE_ENABLED:
+                    qa_chain = QAChain(st.session_state.vectorstore, answer_cache=get_answer_cache(), cache_scope=answer_cache_scope(), llm=get_llm())
+                else:
+                    qa_chain = QAChain(st.session_state.vectorstore, llm=get_llm())
                 
-                with st.spinner("Thinking..."):
-                    result = qa_chain.answer(prompt, chat_history=chat_history_str)
+                # Earlier turns only; the packer keeps recent ones verbatim and compresses or drops older ones
+                history = st.session_state.messages[:-1]
                 
-                answer_text = result['answer']
-                sources = result['sources']
+                if Config.LLM_STREAMING:
+                    with st.spinner("Searching the website..."):
+                        stream = qa_chain.stream_answer(prompt, chat_history=history)
+                    try:
+                        # Tokens are rendered as they arrive
+                        message_placeholder.write_stream(stream)
+                    finally:
+                        stream.close()
+                    answer_text = stream.answer
+                    sources = stream.sources
+                else:
+                    with st.spinner("Thinking..."):
+                        result = qa_chain.answer(prompt, chat_history=history)
+                    answer_text = result['answer']
+                    sources = result['sources']
+                    message_placeholder.markdown(answer_text)
                 
-                message_placeholder.markdown(answer_text)
+                if st.session_state.get("site_id"):
+                    get_site_registry().touch(st.session_state.site_id)
                 
                 if sources:
                     with st.expander("📚 View Sources"):
@@ -0,0 +1,166 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Result of a claim released without an answer; waiting callers then answer for themselves
+_NO_ANSWER = object()
+
+class AnswerCache:
+    """In-process cache of QA answers, shared by all sessions.
+
+    Entries live in a scope, normally "<site_id>:<index version>" plus a digest of
+    the conversation so far, so re-indexing a site starts a fresh scope and a
+    follow-up is never answered from another user's conversation. A question hits
+    when its embedding has cosine similarity >= `threshold` with a cached question
+    of the same scope. Entries
+    expire after `ttl` seconds and the least recently used go once `max_entries`
+    is reached. Identical questions that arrive while the first is still being
+    answered wait for that answer instead of calling the LLM again.
+    """
+
+    def __init__(self, threshold: float = Config.ANSWER_CACHE_THRESHOLD, ttl: float = Config.ANSWER_CACHE_TTL,
+                 max_entries: int = Config.ANSWER_CACHE_MAX_ENTRIES, wait_timeout: float = Config.ANSWER_CACHE_WAIT_TIMEOUT):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        # (scope, question key) → (unit query vector, result, stored_at), in LRU order
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, Dict, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _question_key(question: str) -> str:
+        return _WHITESPACE_RE.sub(" ", question).strip().lower().rstrip("?!. ")
+
+    def _lookup(self, scope: str, vector: np.ndarray) -> Optional[Dict]:
+        now = time.time()
+        best_key, best_score = None, self.threshold
+        expired: List[Tuple[str, str]] = []
+        for key, (cached_vector, _, stored_at) in self._entries.items():
+            if now - stored_at > self.ttl:
+                expired.append(key)
+                continue
+            if key[0] != scope:
+                continue
+            score = float(cached_vector @ vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+        for key in expired:
+            del self._entries[key]
+
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        logger.info(f"Answer cache hit ({best_score:.3f}): '{best_key[1]}'")
+        return self._entries[best_key][1]
+
+    def _store(self, key: Tuple[str, str], vector: np.ndarray, result: Dict):
+        self._entries[key] = (vector, result, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def begin(self, scope: str, question: str, query_vector: List[float]) -> Tuple[Optional[Dict], Optional[Tuple]]:
+        """(answer, None) from the cache or an identical in-flight question, else (None, claim).
+
+        The holder of a claim produces the answer and must call finish(claim, ...), also on failure.
+        (None, None) means the in-flight question took longer than `wait_timeout`; answer without the cache.
+        """
+        vector = np.asarray(query_vector, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        key = (scope, self._question_key(question))
+
+        with self._lock:
+            cached = self._lookup(scope, vector)
+            if cached is not None:
+                self.hits += 1
+                metrics.incr("answer_cache_lookups", result="hit")
+                return cached, None
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+                metrics.incr("answer_cache_lookups", result="miss")
+                return None, (key, vector, future)
+            self.coalesced += 1
+            metrics.incr("answer_cache_lookups", result="coalesced")
+
+        logger.info(f"Waiting for in-flight answer to '{key[1]}'")
+        try:
+            result = future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            logger.warning(f"In-flight answer to '{key[1]}' took over {self.wait_timeout}s; answering separately")
+            return None, None
+        if result is _NO_ANSWER:
+            return None, None
+        return result, None
+
+    def finish(self, claim: Tuple, result: Optional[Dict] = None, error: Optional[BaseException] = None):
+        """Settle a claim; only the first call for a claim has an effect.
+
+        An `error` that isn't an Exception (GeneratorExit when a stream is abandoned,
+        KeyboardInterrupt) only releases the claim, see release().
+        """
+        if error is not None and not isinstance(error, Exception):
+            self.release(claim)
+            return
+        key, vector, future = claim
+        with self._lock:
+            if self._inflight.get(key) is not future:
+                return
+            del self._inflight[key]
+            # Errors are passed to waiting callers but never cached
+            if error is None:
+                self._store(key, vector, result)
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def release(self, claim: Tuple):
+        """Give up a claim without an answer; waiting callers then answer the question themselves."""
+        key, _, future = claim
+        with self._lock:
+            if self._inflight.get(key) is not future:
+                return
+            del self._inflight[key]
+            future.set_result(_NO_ANSWER)
+
+    def get_or_compute(self, scope: str, question: str, query_vector: List[float], compute: Callable[[], Dict]) -> Dict:
+        """Cached answer for a similar question in `scope`, else compute() once (even across concurrent callers)."""
+        cached, claim = self.begin(scope, question, query_vector)
+        if cached is not None:
+            return cached
+        if claim is None:
+            return compute()
+        try:
+            result = compute()
+        except BaseException as e:
+            self.finish(claim, error=e)
+            raise
+        self.finish(claim, result)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries)
+            }
@@ -0,0 +1,229 @@
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Words, plus compound identifiers like `api.get_user`, `ERR-404`, `v2.3.1` or `/v1/users` kept whole
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._\-:/@#][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+K1 = 1.5
+B = 0.75
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens; compound tokens are emitted whole and as their parts, so both spellings match."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+def is_exact_term(token: str) -> bool:
+    """Identifier-like tokens (error codes, versions, API names) that embeddings tend to blur."""
+    return any(c.isdigit() for c in token) or bool(re.search(r"[._\-:/@#]", token))
+
+class BM25Index:
+    """Compact BM25 inverted index over chunks, stored as CSR-style arrays.
+
+    Each build writes a new version directory `<BM25_INDEX_DIR>/<collection_name>/v-<id>/`
+    and then points the CURRENT file at it, so loaded indexes keep reading their own
+    version while a rebuild runs. The version before the current one is kept for indexes
+    still loaded from it; older ones are removed after the swap. A version holds:
+      terms.json       sorted vocabulary; a term's position is its ID
+      offsets.npy      (V + 1,) int64, postings of term i are [offsets[i], offsets[i + 1])
+      postings.npy     (P,) int32 chunk rows, sorted within each term
+      freqs.npy        (P,) uint16 term frequencies
+      doc_lens.npy     (N,) int32 chunk lengths in tokens
+      records.jsonl    {"id", "text", "metadata"} per chunk; doc_spans.npy has byte offset/length
+    Arrays are memory-mapped; records.jsonl is opened only while documents are read,
+    so loaded indexes hold no file handles that would keep old versions locked on Windows.
+    """
+
+    def __init__(self, terms: List[str], offsets: np.ndarray, postings: np.ndarray, freqs: np.ndarray,
+                 doc_lens: np.ndarray, doc_spans: np.ndarray, records_path: str):
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.postings = postings
+        self.freqs = freqs
+        self.doc_lens = doc_lens
+        self.doc_spans = doc_spans
+        self.records_path = records_path
+        self.avg_len = float(doc_lens.mean()) if len(doc_lens) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    @staticmethod
+    def path_for(collection_name: str) -> str:
+        return os.path.join(Config.BM25_INDEX_DIR, collection_name)
+
+    @classmethod
+    def build(cls, documents: Iterable[Document], collection_name: str) -> "BM25Index":
+        """Index `documents` (deduplicated by chunk_id) and persist, replacing any previous index."""
+        directory = cls.path_for(collection_name)
+        # Unique per build, so concurrent builds of one collection don't share files
+        version = f"v-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        tmp_dir = os.path.join(directory, f"tmp-{version}")
+        os.makedirs(tmp_dir)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lens, doc_spans = [], []
+        seen = set()
+        with open(os.path.join(tmp_dir, "records.jsonl"), "wb") as f:
+            for doc in documents:
+                chunk_id = doc.metadata.get("chunk_id")
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                row = len(doc_lens)
+
+                tokens = tokenize(doc.page_content)
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    postings.setdefault(token, []).append((row, min(count, 65535)))
+                doc_lens.append(len(tokens))
+
+                line = json.dumps({"id": chunk_id, "text": doc.page_content, "metadata": doc.metadata}).encode("utf-8") + b"\n"
+                doc_spans.append((f.tell(), len(line)))
+                f.write(line)
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        flat = [entry for term in terms for entry in postings[term]]
+        arrays = {
+            "offsets": offsets,
+            "postings": np.array([row for row, _ in flat], dtype=np.int32),
+            "freqs": np.array([count for _, count in flat], dtype=np.uint16),
+            "doc_lens": np.array(doc_lens, dtype=np.int32),
+            "doc_spans": np.array(doc_spans, dtype=np.int64).reshape(-1, 2),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+
+        os.replace(tmp_dir, os.path.join(directory, version))
+        pointer_tmp = os.path.join(directory, f"CURRENT.{version}.tmp")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(directory, "CURRENT"))
+        cls._prune(directory, version)
+        logger.info(f"Built keyword index for '{collection_name}': {len(doc_lens)} chunks, {len(terms)} terms.")
+        return cls.load(collection_name)
+
+    @staticmethod
+    def _versions(directory: str) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(directory) if name.startswith("v-"))
+        except OSError:
+            return []
+
+    @classmethod
+    def _current(cls, directory: str) -> Optional[str]:
+        """Directory of the current version; the newest one if CURRENT is missing or stale."""
+        try:
+            with open(os.path.join(directory, "CURRENT"), "r", encoding="utf-8") as f:
+                version = f.read().strip()
+            if os.path.isdir(os.path.join(directory, version)):
+                return os.path.join(directory, version)
+        except OSError:
+            pass
+        versions = cls._versions(directory)
+        return os.path.join(directory, versions[-1]) if versions else None
+
+    @classmethod
+    def _prune(cls, directory: str, current: str):
+        # All but the current and the previous version, which indexes loaded before this build
+        # still read. On Windows a version that is still memory-mapped can't be removed yet;
+        # it is retried after the next build.
+        for version in [version for version in cls._versions(directory) if version < current][:-1]:
+            shutil.rmtree(os.path.join(directory, version), ignore_errors=True)
+        # Leftovers of builds that crashed; a build still running elsewhere is much younger
+        cutoff = time.time() - 3600
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if name.startswith("tmp-") and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    @classmethod
+    def load(cls, collection_name: str) -> Optional["BM25Index"]:
+        directory = cls._current(cls.path_for(collection_name))
+        if directory is None:
+            return None
+        try:
+            with open(os.path.join(directory, "terms.json"), "r", encoding="utf-8") as f:
+                terms = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in ("offsets", "postings", "freqs", "doc_lens", "doc_spans")
+            }
+            return cls(terms, records_path=os.path.join(directory, "records.jsonl"), **arrays)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def delete(cls, collection_name: str):
+        shutil.rmtree(cls.path_for(collection_name), ignore_errors=True)
+
+    def has_term(self, term: str) -> bool:
+        return term in self.vocabulary
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top-k (row, BM25 score) pairs for the query."""
+        n_docs = len(self.doc_lens)
+        if n_docs == 0 or k <= 0:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+        norm = K1 * (1 - B + B * np.asarray(self.doc_lens, dtype=np.float32) / max(self.avg_len, 1e-9))
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = np.asarray(self.postings[start:end])
+            tf = np.asarray(self.freqs[start:end], dtype=np.float32)
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            # A term's postings hold each row once, so fancy-index += is safe
+            scores[rows] += idf * tf * (K1 + 1) / (tf + norm[rows])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def document(self, row: int) -> Document:
+        return self.documents([row])[0]
+
+    def documents(self, rows: List[int]) -> List[Document]:
+        """The chunks at `rows`, read with one open of records.jsonl."""
+        docs = []
+        with open(self.records_path, "rb") as f:
+            for row in rows:
+                offset, length = self.doc_spans[row]
+                f.seek(int(offset))
+                record = json.loads(f.read(int(length)))
+                docs.append(Document(page_content=record["text"], metadata=record["metadata"], id=record["id"]))
+        return docs
@@ -1,8 +1,11 @@
+import hashlib
 import logging
 from typing import List, Dict, Any
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config import Config
+from backend.urlnorm import canonicalize_url
+from backend.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -12,9 +15,19 @@ class Chunker:
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=Config.CHUNK_SIZE,
             chunk_overlap=Config.CHUNK_OVERLAP,
-            separators=["\n\n", "\n", " ", ""]
+            separators=["\n\n", "\n", " ", ""],
+            # Page offset of each chunk, so adjacent retrieved chunks can be merged
+            add_start_index=True
         )
     
+    @staticmethod
+    def chunk_id(source_url: str, content: str) -> str:
+        """Stable ID from the page's canonical URL and the chunk text; unchanged chunks keep their ID across re-indexes."""
+        url_hash = hashlib.sha256(canonicalize_url(source_url).encode("utf-8")).hexdigest()[:16]
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        return f"{url_hash}-{content_hash}"
+    
+    @metrics.timed("chunk")
     def chunk(self, text: str, source_url: str, title: str = "Unknown") -> List[Document]:
         if not text:
             logger.warning("Attempted to chunk empty text.")
@@ -25,6 +38,9 @@ class Chunker:
         chunks = self.splitter.create_documents([text], metadatas=[metadata])
         
         chunks = [c for c in chunks if c.page_content and c.page_content.strip()]
+        for c in chunks:
+            c.metadata["chunk_id"] = self.chunk_id(source_url, c.page_content)
         
         logger.info(f"Split text into {len(chunks)} chunks for {source_url}.")
+        metrics.incr("chunks", len(chunks))
         return chunks
@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the disk budget kept after an eviction pass, so every put doesn't trigger one
+_DISK_LOW_WATERMARK = 0.9
+
+def _encode(kind: str, item) -> Dict:
+    if kind == "chunks":
+        return {"page_content": item.page_content, "metadata": item.metadata}
+    return item
+
+def _decode(kind: str, value):
+    if kind == "chunks":
+        return Document(page_content=value["page_content"], metadata=value["metadata"])
+    return value
+
+class ContentStore:
+    """Content-addressed, compressed on-disk store for crawled pages, extracted text and chunks.
+
+    Items are JSON blobs named by the SHA-256 of their bytes, so identical pages
+    or chunks indexed by several sessions are stored once. Decoded items read back
+    are kept in an in-memory LRU bounded both overall (`memory_bytes`) and per
+    session (`session_memory_bytes`); reads without an owner are not cached. When
+    the directory grows past `max_disk_bytes`, the least recently written or read
+    blobs are deleted, and handles pointing at them skip the missing items. Pinned
+    blobs (see put) are kept until unpinned, even if that leaves the store over budget.
+    """
+
+    def __init__(self, root: str = Config.CONTENT_STORE_DIR, max_disk_bytes: int = Config.CONTENT_STORE_MAX_BYTES,
+                 memory_bytes: int = Config.CONTENT_STORE_MEMORY_BYTES,
+                 session_memory_bytes: int = Config.CONTENT_STORE_SESSION_MEMORY_BYTES):
+        self.root = root
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = memory_bytes
+        self.session_memory_bytes = session_memory_bytes
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        # digest → (owner, value, size), oldest first
+        self._cache: "OrderedDict[str, Tuple[str, object, int]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._owner_bytes: Dict[str, int] = {}
+        # digest → pin count
+        self._pins: Dict[str, int] = {}
+        os.makedirs(self.root, exist_ok=True)
+        self._disk_bytes = sum(size for _, _, size in self._blobs())
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ".z")
+
+    def _blobs(self) -> Iterator[Tuple[str, float, int]]:
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".z"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def put(self, value, pin: bool = False) -> Tuple[str, int]:
+        """Store a JSON-serializable value; returns its digest and uncompressed size.
+
+        With `pin`, the blob is not evicted until unpin() is called for it.
+        """
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if pin:
+            # Before writing, so an eviction pass running meanwhile can't remove it
+            with self._lock:
+                self._pins[digest] = self._pins.get(digest, 0) + 1
+        try:
+            # Already stored (same page or chunk from another crawl); mark it recently used
+            os.utime(path)
+            return digest, len(data)
+        except FileNotFoundError:
+            pass
+
+        compressed = zlib.compress(data, 3)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write content store entry {digest}: {e}")
+            return digest, len(data)
+
+        with self._lock:
+            self._disk_bytes += len(compressed)
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self.evict_disk()
+        return digest, len(data)
+
+    def unpin(self, digests: Iterable[str]):
+        with self._lock:
+            for digest in digests:
+                count = self._pins.get(digest, 0) - 1
+                if count > 0:
+                    self._pins[digest] = count
+                else:
+                    self._pins.pop(digest, None)
+
+    def get(self, digest: str, owner: Optional[str] = None):
+        """The stored value, or None if it was evicted; cached in memory when read on behalf of `owner`."""
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                return cached[1]
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+        value = json.loads(data)
+        if owner is not None:
+            self._cache_put(digest, owner, value, len(data))
+        return value
+
+    def _cache_put(self, digest: str, owner: str, value, size: int):
+        if size > self.session_memory_bytes:
+            return
+        with self._lock:
+            if digest in self._cache:
+                return
+            self._cache[digest] = (owner, value, size)
+            self._cached_bytes += size
+            self._owner_bytes[owner] = self._owner_bytes.get(owner, 0) + size
+            # The session's own oldest items go first, then the oldest of anyone's
+            if self._owner_bytes[owner] > self.session_memory_bytes:
+                for key in [key for key, entry in self._cache.items() if entry[0] == owner]:
+                    if self._owner_bytes[owner] <= self.session_memory_bytes:
+                        break
+                    self._uncache(key)
+            while self._cached_bytes > self.memory_bytes:
+                self._uncache(next(iter(self._cache)))
+
+    def _uncache(self, digest: str):
+        owner, _, size = self._cache.pop(digest)
+        self._cached_bytes -= size
+        self._owner_bytes[owner] -= size
+        if not self._owner_bytes[owner]:
+            del self._owner_bytes[owner]
+
+    def release(self, owner: str):
+        """Drop everything cached for `owner`, e.g. when its session indexes another site."""
+        with self._lock:
+            for key in [key for key, entry in self._cache.items() if entry[0] == owner]:
+                self._uncache(key)
+
+    def evict_disk(self):
+        if not self._evict_lock.acquire(blocking=False):
+            # Another writer is already evicting
+            return
+        try:
+            self._evict_disk()
+        finally:
+            self._evict_lock.release()
+
+    def _evict_disk(self):
+        blobs = sorted(self._blobs(), key=lambda blob: blob[1])
+        total = sum(size for _, _, size in blobs)
+        target = self.max_disk_bytes * _DISK_LOW_WATERMARK
+        removed = 0
+        for path, _, size in blobs:
+            if total <= target:
+                break
+            with self._lock:
+                pinned = os.path.basename(path)[:-len(".z")] in self._pins
+            if pinned:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._disk_bytes = total
+        logger.info(f"Evicted {removed} content store entries; {total / 1e6:.1f} MB on disk")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "disk_bytes": self._disk_bytes,
+                "cached_items": len(self._cache),
+                "cached_bytes": self._cached_bytes,
+                "sessions": len(self._owner_bytes)
+            }
+
+class StoredList:
+    """Append-only list of pages, extracted pages or chunks whose items live in a ContentStore.
+
+    Only the item digests are kept in memory; iteration reads items back lazily.
+    `kind` is "pages", "extracted" or "chunks" (LangChain Documents). A `pinned`
+    list keeps its items from being evicted until release() is called.
+    """
+
+    def __init__(self, store: ContentStore, kind: str, pinned: bool = False):
+        self.store = store
+        self.kind = kind
+        self.pinned = pinned
+        self.digests: List[str] = []
+        self.nbytes = 0
+
+    def append(self, item):
+        digest, size = self.store.put(_encode(self.kind, item), pin=self.pinned)
+        self.digests.append(digest)
+        self.nbytes += size
+
+    def extend(self, items: Iterable):
+        for item in items:
+            self.append(item)
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def __iter__(self):
+        for digest in list(self.digests):
+            value = self.store.get(digest)
+            if value is not None:
+                yield _decode(self.kind, value)
+
+    def release(self):
+        """Unpin the items, after which they can be evicted like any other."""
+        if self.pinned:
+            self.pinned = False
+            self.store.unpin(self.digests)
+
+    def handle(self, owner: str) -> "ContentHandle":
+        """A small handle for session state; the digest list itself is stored as one more blob."""
+        manifest, _ = self.store.put(self.digests)
+        return ContentHandle(self.store, self.kind, manifest, len(self.digests), self.nbytes, owner)
+
+class ContentHandle:
+    """What a session keeps instead of its pages or chunks: a manifest digest plus counts."""
+
+    __slots__ = ("store", "kind", "manifest", "count", "nbytes", "owner")
+
+    def __init__(self, store: ContentStore, kind: str, manifest: str, count: int, nbytes: int, owner: str):
+        self.store = store
+        self.kind = kind
+        self.manifest = manifest
+        self.count = count
+        self.nbytes = nbytes
+        self.owner = owner
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _digests(self) -> List[str]:
+        return self.store.get(self.manifest, owner=self.owner) or []
+
+    def __iter__(self):
+        for digest in self._digests():
+            value = self.store.get(digest, owner=self.owner)
+            if value is not None:
+                yield _decode(self.kind, value)
+
+    def __getitem__(self, index: int):
+        value = self.store.get(self._digests()[index], owner=self.owner)
+        if value is None:
+            raise KeyError(f"Content store entry for {self.kind}[{index}] was evicted")
+        return _decode(self.kind, value)
+
+    def __repr__(self) -> str:
+        return f"ContentHandle({self.kind}, {self.count} items, {self.nbytes} bytes)"
@@ -0,0 +1,155 @@
+import logging
+import re
+from typing import List, Optional, Sequence
+import numpy as np
+from langchain_core.documents import Document
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class ContextReducer:
+    """Cuts redundancy out of retrieved chunks before they are stuffed into the prompt.
+
+    1. MMR picks `k` of the candidates, trading relevance against similarity to chunks already picked.
+    2. Picked chunks that are adjacent (or overlapping) on the same page are merged into one passage,
+       so the CHUNK_OVERLAP text appears once.
+    3. Lines already present in an earlier passage (boilerplate, near-identical sibling pages) are dropped.
+
+    Candidate embeddings are read back from the vector store (NumPy and Chroma keep them, keyed by
+    chunk_id); only for other providers, or chunks stored without their chunk_id, are they re-embedded.
+    """
+
+    def __init__(self, embedding_function, lambda_mult: float = Config.MMR_LAMBDA,
+                 min_line_chars: int = Config.TRIM_MIN_LINE_CHARS, vectorstore=None):
+        self.embedding_function = embedding_function
+        self.vectorstore = vectorstore
+        self.lambda_mult = lambda_mult
+        self.min_line_chars = min_line_chars
+
+    def reduce(self, query: str, docs: List[Document], k: int,
+               query_vector: Optional[Sequence[float]] = None) -> List[Document]:
+        selected = self.mmr(query, docs, k, query_vector)
+        passages = self.trim_repeated_lines(self.merge_adjacent(selected))
+        logger.info(f"Context reduced from {sum(len(d.page_content) for d in docs[:k])} to "
+                    f"{sum(len(d.page_content) for d in passages)} chars ({len(passages)} passages)")
+        return passages
+
+    def _stored_vectors(self, docs: List[Document]) -> Optional[np.ndarray]:
+        """The candidates' embeddings as stored at indexing time, or None if the store can't return all of them."""
+        ids = [doc.metadata.get("chunk_id") for doc in docs]
+        if self.vectorstore is None or not all(ids):
+            return None
+        try:
+            if hasattr(self.vectorstore, "get_vectors"):
+                # NumpyVectorStore
+                return self.vectorstore.get_vectors(ids)
+            if hasattr(self.vectorstore, "_collection"):
+                # Chroma
+                result = self.vectorstore.get(ids=list(set(ids)), include=["embeddings"])
+                by_id = dict(zip(result["ids"], result["embeddings"]))
+                if all(chunk_id in by_id for chunk_id in ids):
+                    return np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
+        except Exception as e:
+            logger.debug(f"Stored vectors unavailable for MMR, re-embedding candidates: {e}")
+        return None
+
+    def mmr(self, query: str, docs: List[Document], k: int,
+            query_vector: Optional[Sequence[float]] = None) -> List[Document]:
+        if len(docs) <= 1 or self.embedding_function is None:
+            return docs[:k]
+        try:
+            if query_vector is None:
+                query_vector = self.embedding_function.embed_query(query)
+            query_vector = np.array(query_vector, dtype=np.float32)
+            doc_vectors = self._stored_vectors(docs)
+            if doc_vectors is None:
+                doc_vectors = np.asarray(self.embedding_function.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+            else:
+                doc_vectors = np.array(doc_vectors, dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"MMR skipped, could not embed candidates: {e}")
+            return docs[:k]
+
+        query_vector /= max(np.linalg.norm(query_vector), 1e-12)
+        doc_vectors /= np.clip(np.linalg.norm(doc_vectors, axis=1, keepdims=True), 1e-12, None)
+        relevance = doc_vectors @ query_vector
+        similarity = doc_vectors @ doc_vectors.T
+
+        # Candidates arrive best-first (fused rank), so the first one always stays
+        picked = [0]
+        remaining = list(range(1, len(docs)))
+        while remaining and len(picked) < k:
+            redundancy = similarity[np.ix_(remaining, picked)].max(axis=1)
+            scores = self.lambda_mult * relevance[remaining] - (1 - self.lambda_mult) * redundancy
+            best = remaining[int(np.argmax(scores))]
+            picked.append(best)
+            remaining.remove(best)
+        return [docs[i] for i in picked]
+
+    @staticmethod
+    def _overlap(left: str, right: str, max_chars: int) -> int:
+        """Length of the longest suffix of `left` that is a prefix of `right`."""
+        for size in range(min(len(left), len(right), max_chars), 0, -1):
+            if left.endswith(right[:size]):
+                return size
+        return 0
+
+    def _join(self, left: Document, right: Document) -> Optional[str]:
+        """`left` + `right` as one passage if they are adjacent on the page, else None."""
+        start_left, start_right = left.metadata.get("start_index"), right.metadata.get("start_index")
+        if start_left is not None and start_right is not None:
+            end_left = start_left + len(left.page_content)
+            # The splitter strips the separator between consecutive chunks, leaving a gap of a char or two
+            if start_right < start_left or start_right > end_left + 2:
+                return None
+            if start_right >= end_left:
+                return left.page_content + ("\n" if start_right > end_left else "") + right.page_content
+            overlap = end_left - start_right
+            if left.page_content.endswith(right.page_content[:overlap]):
+                return left.page_content + right.page_content[overlap:]
+            # Stale offsets: incremental re-indexing keeps unchanged chunks, with their old start_index,
+            # when earlier text on the page changed. Match the overlap text instead.
+
+        overlap = self._overlap(left.page_content, right.page_content, Config.CHUNK_OVERLAP * 2)
+        if overlap < min(Config.CHUNK_OVERLAP, 20):
+            return None
+        return left.page_content + right.page_content[overlap:]
+
+    def merge_adjacent(self, docs: List[Document]) -> List[Document]:
+        passages: List[Document] = []
+        for doc in docs:
+            merged = False
+            for i, passage in enumerate(passages):
+                if passage.metadata.get("source") != doc.metadata.get("source"):
+                    continue
+                # The merged passage keeps the list position of its most relevant chunk
+                for first, second in ((passage, doc), (doc, passage)):
+                    text = self._join(first, second)
+                    if text is not None:
+                        passages[i] = Document(page_content=text, metadata=first.metadata)
+                        merged = True
+                        break
+                if merged:
+                    break
+            if not merged:
+                passages.append(doc)
+        return passages
+
+    def trim_repeated_lines(self, docs: List[Document]) -> List[Document]:
+        seen = set()
+        trimmed = []
+        for doc in docs:
+            kept = []
+            for line in doc.page_content.split("\n"):
+                key = _WHITESPACE_RE.sub(" ", line).strip().lower()
+                if len(key) >= self.min_line_chars:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                kept.append(line)
+            text = "\n".join(kept).strip()
+            if text:
+                trimmed.append(Document(page_content=text, metadata=doc.metadata))
+        return trimmed
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import Config
+from backend.urlnorm import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+class CrawlStateStore:
+    """SQLite checkpoint store for crawls, so an interrupted crawl can resume where it stopped.
+
+    Fetched pages are written as they arrive; the frontier and seen set are
+    snapshotted every CRAWL_CHECKPOINT_INTERVAL pages. A connection must only be
+    used from the thread that created it (the crawl coordinator).
+    """
+
+    def __init__(self, path: str = Config.CRAWL_STATE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawls (
+                crawl_id TEXT PRIMARY KEY,
+                start_url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS frontier (
+                crawl_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                score REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                crawl_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (crawl_id, key)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                crawl_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                html TEXT NOT NULL,
+                keys TEXT NOT NULL,
+                PRIMARY KEY (crawl_id, seq)
+            );
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def crawl_id_for(start_url: str) -> str:
+        return hashlib.sha256(canonicalize_url(start_url).encode("utf-8")).hexdigest()[:16]
+
+    def close(self):
+        self.conn.close()
+
+    def status(self, crawl_id: str) -> Optional[str]:
+        row = self.conn.execute("SELECT status FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        return row[0] if row else None
+
+    def resumable(self, crawl_id: str, max_age: float = Config.CRAWL_STATE_MAX_AGE) -> bool:
+        """True for an unfinished crawl written to within max_age seconds."""
+        row = self.conn.execute("SELECT status, updated_at FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        if not row or row[0] != "running":
+            return False
+        if row[1] < time.time() - max_age:
+            logger.info(f"Checkpoint of crawl {crawl_id} is {time.time() - row[1]:.0f}s old; starting over.")
+            return False
+        return True
+
+    def start(self, crawl_id: str, start_url: str):
+        self.discard(crawl_id, commit=False)
+        self.conn.execute(
+            "INSERT INTO crawls (crawl_id, start_url, status, updated_at) VALUES (?, ?, 'running', ?)",
+            (crawl_id, start_url, time.time())
+        )
+        self.conn.commit()
+
+    def discard(self, crawl_id: str, commit: bool = True):
+        for table in ("crawls", "frontier", "seen", "pages"):
+            self.conn.execute(f"DELETE FROM {table} WHERE crawl_id = ?", (crawl_id,))
+        if commit:
+            self.conn.commit()
+
+    def add_page(self, crawl_id: str, url: str, html: str, keys: Iterable[str]):
+        seq = self.conn.execute("SELECT COUNT(*) FROM pages WHERE crawl_id = ?", (crawl_id,)).fetchone()[0]
+        self.conn.execute(
+            "INSERT INTO pages (crawl_id, seq, url, html, keys) VALUES (?, ?, ?, ?, ?)",
+            (crawl_id, seq, url, html, json.dumps(sorted(keys)))
+        )
+        self.conn.execute("UPDATE crawls SET updated_at = ? WHERE crawl_id = ?", (time.time(), crawl_id))
+        self.conn.commit()
+
+    def checkpoint(self, crawl_id: str, frontier_entries: List[Tuple[str, float]], seen: Set[str]):
+        with self.conn:
+            self.conn.execute("DELETE FROM frontier WHERE crawl_id = ?", (crawl_id,))
+            self.conn.executemany(
+                "INSERT INTO frontier (crawl_id, url, score) VALUES (?, ?, ?)",
+                [(crawl_id, url, score) for url, score in frontier_entries]
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (crawl_id, key) VALUES (?, ?)",
+                [(crawl_id, key) for key in seen]
+            )
+            self.conn.execute("UPDATE crawls SET updated_at = ? WHERE crawl_id = ?", (time.time(), crawl_id))
+
+    def load(self, crawl_id: str) -> Dict:
+        pages = []
+        fetched_keys: Set[str] = set()
+        for url, html, keys in self.conn.execute(
+            "SELECT url, html, keys FROM pages WHERE crawl_id = ? ORDER BY seq", (crawl_id,)
+        ):
+            pages.append({"url": url, "html": html})
+            fetched_keys.update(json.loads(keys))
+
+        frontier = self.conn.execute(
+            "SELECT url, score FROM frontier WHERE crawl_id = ? ORDER BY score DESC", (crawl_id,)
+        ).fetchall()
+        seen = {row[0] for row in self.conn.execute("SELECT key FROM seen WHERE crawl_id = ?", (crawl_id,))}
+
+        return {"pages": pages, "fetched_keys": fetched_keys, "frontier": frontier, "seen": seen}
+
+    def complete(self, crawl_id: str):
+        # Finished crawls don't need their checkpoint data; re-crawls start fresh (and hit the page cache)
+        with self.conn:
+            for table in ("frontier", "seen", "pages"):
+                self.conn.execute(f"DELETE FROM {table} WHERE crawl_id = ?", (crawl_id,))
+            self.conn.execute(
+                "UPDATE crawls SET status = 'complete', updated_at = ? WHERE crawl_id = ?", (time.time(), crawl_id)
+            )
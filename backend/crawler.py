@@ -1,70 +1,243 @@
 import logging
-import time
-from typing import List, Dict, Set
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, List, Dict, Optional
+from urllib.parse import urlparse
 from config import Config
-from collections import deque
+from backend.page_cache import PageCache
+from backend.fetcher import Fetcher, HostLimiter
+from backend.frontier import Frontier, RobotsPolicy, parse_sitemap
+from backend.parser import parse_html, extract_links, extract_canonical
+from backend.urlnorm import canonicalize_url, resolve_canonical, same_site
+from backend.crawl_state import CrawlStateStore
+from backend.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 class Crawler:
-    
-    def crawl(self, start_url: str, limit: int = Config.MAX_PAGES_CRAWL) -> List[Dict[str, str]]:
+
+    def __init__(self, concurrency: int = Config.CRAWL_CONCURRENCY, cache: Optional[PageCache] = None,
+                 limiter: Optional[HostLimiter] = None):
+        self.concurrency = max(1, concurrency)
+        self.limiter = limiter or HostLimiter()
+        if cache is None and Config.PAGE_CACHE_ENABLED:
+            cache = PageCache()
+        self.cache = cache
+
+        self.fetcher = Fetcher(cache=cache, limiter=self.limiter)
+
+    def _fetch(self, url: str) -> Dict:
+        with metrics.span("crawl_fetch"):
+            page = self.fetcher.fetch(url)
+        if page["html"]:
+            metrics.incr("crawl_pages")
+            metrics.incr("crawl_bytes", len(page["html"]))
+        return page
+
+    def _load_robots(self, start_url: str) -> RobotsPolicy:
+        if not Config.CRAWL_RESPECT_ROBOTS:
+            return RobotsPolicy()
+
+        parsed = urlparse(start_url)
+        response = self.fetcher.fetch_raw(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+        if response is None or response[0] != 200:
+            return RobotsPolicy()
+
+        robots = RobotsPolicy(response[1].decode("utf-8", errors="replace"))
+        delay = robots.crawl_delay()
+        if delay is not None:
+            delay = min(delay, Config.CRAWL_MAX_DELAY)
+            logger.info(f"Honoring robots.txt Crawl-delay of {delay}s for {parsed.netloc}")
+            self.limiter.set_min_interval(parsed.netloc, max(delay, self.limiter.min_interval))
+        return robots
+
+    def _seed_from_sitemaps(self, frontier: Frontier, start_url: str, base_domain: str):
+        parsed = urlparse(start_url)
+        pending = frontier.robots.sitemaps() or [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+        fetched = set()
+        seeded = 0
+
+        while pending and len(fetched) < Config.SITEMAP_MAX_FILES and seeded < Config.SITEMAP_MAX_URLS:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in fetched:
+                continue
+            fetched.add(sitemap_url)
+
+            response = self.fetcher.fetch_raw(sitemap_url)
+            if response is None or response[0] != 200 or not response[1]:
+                continue
+
+            try:
+                entries, children = parse_sitemap(response[1])
+            except Exception as e:
+                logger.warning(f"Could not parse sitemap {sitemap_url}: {e}")
+                continue
+
+            pending.extend(children)
+            for entry in entries:
+                if seeded >= Config.SITEMAP_MAX_URLS:
+                    break
+                url = urlparse(entry["url"])._replace(fragment="").geturl()
+                if not same_site(url, base_domain):
+                    continue
+                if frontier.push(url, sitemap_priority=entry["priority"], lastmod=entry["lastmod"]):
+                    seeded += 1
+
+        if seeded:
+            logger.info(f"Seeded {seeded} URLs from {len(fetched)} sitemap(s).")
+
+    @staticmethod
+    def _checkpoint(state: CrawlStateStore, crawl_id: str, frontier: Frontier, in_flight_urls):
+        # In-flight URLs go back in at the front so a resumed crawl fetches them first
+        entries = [(url, 1e9) for url in in_flight_urls] + frontier.entries()
+        state.checkpoint(crawl_id, entries, frontier.seen)
+
+    def crawl(self, start_url: str, limit: int = Config.MAX_PAGES_CRAWL, crawl_id: Optional[str] = None,
+              seed_page: Optional[Dict] = None) -> List[Dict]:
+        """Crawl a site. With a `crawl_id`, progress is checkpointed and an unfinished crawl with that ID is resumed.
+
+        `seed_page` is an already fetched start page (e.g. from validation) so it isn't downloaded again.
+        """
+        return list(self.iter_crawl(start_url, limit, crawl_id, seed_page))
+
+    def iter_crawl(self, start_url: str, limit: int = Config.MAX_PAGES_CRAWL, crawl_id: Optional[str] = None,
+                   seed_page: Optional[Dict] = None) -> Iterator[Dict]:
+        """Same as crawl(), but yields each page as soon as it is accepted."""
         if not start_url:
             raise ValueError("URL cannot be empty")
-            
-        logger.info(f"Starting crawl for {start_url} with limit {limit}")
-        
+
+        logger.info(f"Starting crawl for {start_url} with limit {limit} (concurrency {self.concurrency})")
+
         base_domain = urlparse(start_url).netloc
-        queue = deque([start_url])
-        visited: Set[str] = set([start_url])
-        results: List[Dict[str, str]] = []
-        
-        headers = {"User-Agent": Config.USER_AGENT}
-
-        while queue and len(results) < limit:
-            current_url = queue.popleft()
-            
-            try:
-                time.sleep(0.5)
+        frontier = Frontier(self._load_robots(start_url))
+        accepted = 0
+        # Canonical keys of every page already fetched (requested, final and rel=canonical URLs)
+        fetched_keys = set()
 
-                logger.info(f"Fetching: {current_url}")
-                response = requests.get(current_url, timeout=Config.REQUEST_TIMEOUT, headers=headers)
-                
-                if response.status_code != 200:
-                    logger.warning(f"Failed to fetch {current_url}: Status {response.status_code}")
-                    continue
-                
-                final_domain = urlparse(response.url).netloc
-                if final_domain != base_domain:
-                    logger.warning(f"Redirected off-domain to {final_domain}. Skipping.")
-                    continue
+        state = CrawlStateStore() if crawl_id and Config.CRAWL_STATE_ENABLED else None
+        pages_since_checkpoint = 0
 
-                if "text/html" not in response.headers.get("Content-Type", "").lower():
-                    logger.warning(f"Skipping non-HTML content: {current_url}")
-                    continue
+        def push_links(tree, page_url: str):
+            for absolute_url in extract_links(tree, page_url):
+                parsed_href = urlparse(absolute_url)
+                clean_url = parsed_href._replace(fragment="").geturl()
 
-                html_content = response.text
-                results.append({"url": response.url, "html": html_content}) 
-                
-                if len(results) < limit:
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    for link in soup.find_all('a', href=True):
-                        raw_href = link['href']
-                        absolute_url = urljoin(current_url, raw_href)
-                        
-                        parsed_href = urlparse(absolute_url)
-                        clean_url = parsed_href._replace(fragment="").geturl()
-
-                        if parsed_href.netloc == base_domain and clean_url not in visited:
-                            visited.add(clean_url)
-                            queue.append(clean_url)
-                            
-            except Exception as e:
-                logger.error(f"Error crawling {current_url}: {e}")
-                continue
-                
-        logger.info(f"Crawl complete. Visited {len(results)} pages.")
-        return results
+                if same_site(clean_url, base_domain):
+                    frontier.push(clean_url)
+
+        def handle_page(current_url: str, page: Dict) -> Optional[Dict]:
+            nonlocal accepted, pages_since_checkpoint
+
+            if page["status"] != 200:
+                logger.warning(f"Failed to fetch {current_url}: Status {page['status']}")
+                return None
+
+            if not same_site(page["url"], base_domain):
+                logger.warning(f"Redirected off-domain to {urlparse(page['url']).netloc}. Skipping.")
+                return None
+
+            if page["html"] is None:
+                logger.warning(f"Skipping non-HTML content: {current_url}")
+                return None
+
+            html_content = page["html"]
+            # Parsed once here; the same tree is handed on to the extractor
+            tree = parse_html(html_content)
+
+            page_keys = {canonicalize_url(page["url"])}
+            if tree is not None:
+                declared = resolve_canonical(page["url"], extract_canonical(tree, page["url"]))
+                if declared:
+                    page_keys.add(declared)
+            if page_keys & fetched_keys:
+                logger.info(f"Skipping duplicate of an already crawled page: {current_url}")
+                return None
+            page_keys.add(canonicalize_url(current_url))
+            fetched_keys.update(page_keys)
+            for key in page_keys:
+                frontier.mark_seen(key)
+
+            accepted += 1
+            if state:
+                state.add_page(crawl_id, page["url"], html_content, page_keys)
+                pages_since_checkpoint += 1
+
+            if tree is not None and accepted < limit:
+                push_links(tree, page["url"])
+
+            return {"url": page["url"], "html": html_content, "tree": tree}
+
+        if state and state.resumable(crawl_id):
+            saved = state.load(crawl_id)
+            accepted = len(saved["pages"])
+            fetched_keys.update(saved["fetched_keys"])
+            frontier.restore(saved["frontier"], saved["seen"], exclude=fetched_keys)
+            frontier.seen.update(fetched_keys)
+            logger.info(f"Resuming crawl {crawl_id}: {accepted} pages already fetched, {len(frontier)} queued.")
+            for page in saved["pages"]:
+                tree = parse_html(page["html"])
+                # Links of pages fetched after the last checkpoint aren't in the saved frontier
+                if tree is not None and accepted < limit:
+                    push_links(tree, page["url"])
+                yield {"url": page["url"], "html": page["html"], "tree": tree}
+        else:
+            if state:
+                state.start(crawl_id, start_url)
+            if seed_page and seed_page.get("html") is not None:
+                logger.info(f"Using prefetched start page: {start_url}")
+                frontier.mark_seen(start_url)
+                result = handle_page(start_url, seed_page)
+                if result:
+                    yield result
+            else:
+                # The user-supplied start page always goes first
+                frontier.push(start_url, score=float("inf"), force=True)
+            if Config.CRAWL_USE_SITEMAPS:
+                self._seed_from_sitemaps(frontier, start_url, base_domain)
+            if state:
+                # A crawl killed before its first periodic checkpoint can still resume
+                self._checkpoint(state, crawl_id, frontier, [])
+                pages_since_checkpoint = 0
+
+        in_flight = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                while (frontier or in_flight) and accepted < limit:
+                    # Never have more pages in flight than the remaining budget
+                    while frontier and len(in_flight) < self.concurrency and accepted + len(in_flight) < limit:
+                        url = frontier.pop()
+                        in_flight[pool.submit(self._fetch, url)] = url
+
+                    if state and pages_since_checkpoint >= Config.CRAWL_CHECKPOINT_INTERVAL:
+                        self._checkpoint(state, crawl_id, frontier, in_flight.values())
+                        pages_since_checkpoint = 0
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        current_url = in_flight.pop(future)
+
+                        try:
+                            result = handle_page(current_url, future.result())
+                        except Exception as e:
+                            logger.error(f"Error crawling {current_url}: {e}")
+                            continue
+
+                        if result:
+                            yield result
+        except BaseException:
+            # Keep the frontier as of the failure (or the consumer stopping early) so the next run resumes from here
+            if state:
+                self._checkpoint(state, crawl_id, frontier, in_flight.values())
+                state.close()
+            raise
+
+        if state:
+            state.complete(crawl_id)
+            state.close()
+
+        if self.cache:
+            stats = self.cache.stats()
+            logger.info(f"Page cache: {stats['hits']} hits ({stats['revalidated']} revalidated), {stats['misses']} misses")
+
+        logger.info(f"Crawl complete. Visited {accepted} pages.")
@@ -1,28 +1,66 @@
 import logging
+from typing import Optional
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from config import Config
+from backend.metrics import InstrumentedEmbeddings, metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 class Embedder:
-    
-    def __init__(self):
+
+    def __init__(self, provider: Optional[str] = None, model_name: Optional[str] = None):
         # Default to huggingface if not specified
-        self.provider = getattr(Config, "EMBEDDING_PROVIDER", "huggingface")
-        self.model_name = Config.EMBEDDING_MODEL_NAME
-        
+        self.provider = provider or getattr(Config, "EMBEDDING_PROVIDER", "huggingface")
+        self.model_name = model_name or Config.EMBEDDING_MODEL_NAME
+
     def get_embedding_function(self):
+        embeddings = self.create_embeddings()
+        if Config.EMBEDDING_WORKERS > 1:
+            from backend.embedding_pool import MultiProcessEmbeddings
+            logger.info(f"Multi-process embedding enabled ({Config.EMBEDDING_WORKERS} workers for batches of {Config.EMBEDDING_POOL_MIN_BATCH}+ chunks)")
+            embeddings = MultiProcessEmbeddings(embeddings, self.provider, self.model_name)
+        # The cache is the outermost layer, so only misses reach the workers
+        embeddings = self._with_cache(embeddings)
+        if metrics.enabled:
+            embeddings = InstrumentedEmbeddings(embeddings, metrics)
+        return embeddings
+
+    def create_embeddings(self, threads: Optional[int] = None):
+        """The bare model for this provider; `threads` caps its CPU threads (used by pool workers)."""
         logger.info(f"Initializing {self.provider} embeddings with model: {self.model_name}")
-        
+
         if self.provider == "huggingface":
             try:
+                if threads:
+                    import torch
+                    torch.set_num_threads(threads)
                 embeddings = HuggingFaceEmbeddings(model_name=self.model_name)
                 logger.info(f"HuggingFace embeddings initialized successfully ({self.model_name})")
                 return embeddings
             except Exception as e:
                 logger.error(f"Failed to initialize HuggingFace embeddings: {e}")
                 raise e
+        elif self.provider == "onnx":
+            try:
+                from backend.onnx_embeddings import OnnxEmbeddings
+                embeddings = OnnxEmbeddings(model_name=self.model_name, intra_op_threads=threads or Config.ONNX_INTRA_OP_THREADS)
+                logger.info(f"ONNX Runtime embeddings initialized successfully ({self.model_name}, int8={Config.ONNX_QUANTIZE})")
+                return embeddings
+            except Exception as e:
+                logger.error(f"Failed to initialize ONNX Runtime embeddings: {e}")
+                raise e
         else:
             # Fallback or error for unsupported providers
             raise ValueError(f"Unsupported embedding provider: {self.provider}")
+
+    def _with_cache(self, embeddings):
+        if not Config.EMBEDDING_CACHE_ENABLED:
+            return embeddings
+        from backend.embedding_cache import CachedEmbeddings
+        logger.info(f"Embedding cache enabled at {Config.EMBEDDING_CACHE_DIR} (max {Config.EMBEDDING_CACHE_MAX_ENTRIES} entries)")
+        cache_name = f"{self.provider}:{self.model_name}"
+        if self.provider == "onnx" and Config.ONNX_QUANTIZE:
+            # Quantized vectors differ slightly from full-precision ones; keep them apart
+            cache_name += ":int8"
+        return CachedEmbeddings(embeddings, model_name=cache_name)
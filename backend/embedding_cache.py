@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingStore:
+    """Disk store of vectors for one model: a memory-mapped float32 matrix plus a SQLite key → slot index.
+
+    Holds at most `capacity` vectors; when full, the least recently used slots are reused.
+    Several processes (the Streamlit app and the HTTP API) may share one directory: slots
+    are allocated inside a SQLite write transaction, so two writers never take the same one.
+    """
+
+    def __init__(self, directory: str, capacity: int):
+        self.directory = directory
+        self.capacity = max(1, capacity)
+        self.dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        os.makedirs(directory, exist_ok=True)
+
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER UNIQUE NOT NULL, last_access REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self.conn.commit()
+
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self._open_vectors(meta["dim"], meta["capacity"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _open_vectors(self, dim: int, stored_capacity: int):
+        self.dim = dim
+        if stored_capacity != self.capacity:
+            # Capacity changed: resize the file and forget entries that no longer fit
+            self.conn.execute("DELETE FROM entries WHERE slot >= ?", (self.capacity,))
+            self.conn.commit()
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(self.capacity * dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, dim))
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "capacity": self.capacity}, f)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._vectors is None or not keys:
+            return {}
+        found = {}
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            for key, slot in self.conn.execute(f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", part):
+                found[key] = np.array(self._vectors[slot])
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+            self.conn.commit()
+        return found
+
+    def _present(self, keys: List[str]) -> Set[str]:
+        present = set()
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            present.update(key for key, in self.conn.execute(f"SELECT key FROM entries WHERE key IN ({placeholders})", part))
+        return present
+
+    def _allocate(self, count: int) -> List[int]:
+        # Called inside put_many's write transaction
+        used = len(self)
+        free = min(count, self.capacity - used)
+        # Slots are handed out densely, so the first `used` slots are taken
+        slots = list(range(used, used + free))
+        if len(slots) < count:
+            evict = self.conn.execute(
+                "SELECT key, slot FROM entries ORDER BY last_access LIMIT ?", (count - len(slots),)
+            ).fetchall()
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evict])
+            slots.extend(slot for _, slot in evict)
+            logger.info(f"Embedding cache full; evicted {len(evict)} least recently used entries.")
+        return slots
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        matrix = np.asarray(list(items.values()), dtype=np.float32)
+        if self._vectors is None:
+            self._open_vectors(matrix.shape[1], self.capacity)
+        if matrix.shape[1] != self.dim:
+            logger.warning(f"Embedding dimension {matrix.shape[1]} does not match cache ({self.dim}); not caching.")
+            return
+
+        # Takes the database write lock, which other processes using this directory also wait for
+        self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Skip keys another caller stored meanwhile, and never evict more than the cache can hold
+            all_keys = list(items.keys())
+            present = self._present(all_keys)
+            rows = [i for i, key in enumerate(all_keys) if key not in present][-self.capacity:]
+            if not rows:
+                self.conn.rollback()
+                return
+            keys = [all_keys[i] for i in rows]
+            slots = self._allocate(len(keys))
+            # Vectors are written before their entries become visible to readers
+            self._vectors[slots] = matrix[rows]
+            self._vectors.flush()
+
+            now = time.time()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, slot, last_access) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in zip(keys, slots)]
+            )
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an Embeddings model with a persistent cache keyed by model name and text hash.
+
+    Drop-in for Chroma.from_documents / PineconeVectorStore.from_documents and friends.
+    Only documents are cached; queries go straight to the model.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, cache_dir: str = Config.EMBEDDING_CACHE_DIR,
+                 max_entries: int = Config.EMBEDDING_CACHE_MAX_ENTRIES):
+        self.base = base
+        self.model_name = model_name
+        model_dir = hashlib.sha256(model_name.encode("utf-8")).hexdigest()[:16]
+        self.store = EmbeddingStore(os.path.join(cache_dir, model_dir), max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = self.store.get_many(list(set(keys)))
+
+        # Each distinct missing text is embedded once, even if repeated in the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        computed: Dict[str, List[float]] = {}
+        if missing:
+            vectors = self.base.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self.store.put_many(computed)
+
+        with self._lock:
+            self.hits += sum(1 for key in keys if key in cached)
+            self.misses += sum(1 for key in keys if key not in cached)
+
+        return [cached[key].tolist() if key in cached else list(computed[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Models may embed queries differently (e.g. with an instruction prefix), and caching
+        # every question would put a disk write on the answer path
+        return self.base.embed_query(text)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.store)
+            }
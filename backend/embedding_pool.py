@@ -0,0 +1,102 @@
+import logging
+import multiprocessing
+import os
+import threading
+from typing import List
+from langchain_core.embeddings import Embeddings
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+_worker_state = {}
+
+def _init_worker(provider: str, model_name: str, cores: List[int], counter):
+    # Each worker takes the next core, so workers don't fight over the same one
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {cores[index % len(cores)]})
+        except OSError as e:
+            logger.warning(f"Could not pin embedding worker {index}: {e}")
+
+    try:
+        from backend.embedder import Embedder
+        # The model stays loaded in this process for as long as the pool lives
+        _worker_state["embeddings"] = Embedder(provider=provider, model_name=model_name).create_embeddings(threads=1)
+    except Exception as e:
+        # Raising here would make the pool respawn workers forever; fail the tasks instead
+        _worker_state["error"] = e
+
+def _embed_in_worker(texts: List[str]) -> List[List[float]]:
+    if "error" in _worker_state:
+        raise RuntimeError(f"Embedding worker failed to load the model: {_worker_state['error']}")
+    return _worker_state["embeddings"].embed_documents(texts)
+
+def _get_pool(provider: str, model_name: str, workers: int, pin: bool):
+    global _pool, _pool_key
+    with _pool_lock:
+        key = (provider, model_name, workers)
+        if _pool is not None and _pool_key != key:
+            _pool.terminate()
+            _pool = None
+        if _pool is None:
+            # spawn, not fork: the Streamlit process is multi-threaded
+            ctx = multiprocessing.get_context("spawn")
+            cores = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, "sched_getaffinity") else []
+            _pool = ctx.Pool(processes=workers, initializer=_init_worker,
+                             initargs=(provider, model_name, cores, ctx.Value("i", 0)))
+            _pool_key = key
+            logger.info(f"Started embedding process pool with {workers} workers ({provider}: {model_name}).")
+        return _pool
+
+def _discard_pool():
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool = None
+            _pool_key = None
+
+class MultiProcessEmbeddings(Embeddings):
+    """Shards large embed_documents calls across a pool of worker processes, each with its own copy of the model.
+
+    Calls smaller than `min_batch` (and all queries) run on the in-process `base`
+    model, so small sites never start the pool. The pool is shared process-wide
+    and kept alive between index jobs.
+    """
+
+    def __init__(self, base: Embeddings, provider: str, model_name: str, workers: int = Config.EMBEDDING_WORKERS,
+                 min_batch: int = Config.EMBEDDING_POOL_MIN_BATCH, pin: bool = Config.EMBEDDING_PIN_WORKERS):
+        self.base = base
+        self.provider = provider
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.min_batch = min_batch
+        self.pin = pin
+        self._failed = False
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.workers <= 1 or len(texts) < self.min_batch or self._failed:
+            return self.base.embed_documents(texts)
+
+        # Contiguous shards, so concatenating the results keeps input order
+        size = -(-len(texts) // self.workers)
+        shards = [texts[start:start + size] for start in range(0, len(texts), size)]
+        try:
+            pool = _get_pool(self.provider, self.model_name, self.workers, self.pin)
+            results = pool.map(_embed_in_worker, shards)
+        except Exception as e:
+            logger.warning(f"Embedding pool failed, embedding {len(texts)} texts in-process: {e}")
+            _discard_pool()
+            self._failed = True
+            return self.base.embed_documents(texts)
+
+        return [vector for shard in results for vector in shard]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
@@ -1,25 +1,96 @@
 import logging
+import multiprocessing
+import threading
 import trafilatura
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from lxml.html import HtmlElement
+from config import Config
+from backend.simhash import simhash, NearDuplicateIndex
+from backend.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+_pool = None
+# Batches currently using each pool; a replaced pool is terminated once none is left
+_pool_users: Dict[object, int] = {}
+_pool_lock = threading.Lock()
+_worker_state = {}
+
+def _acquire_pool(workers: int):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit process is multi-threaded
+            _pool = multiprocessing.get_context("spawn").Pool(processes=workers)
+            _pool_users[_pool] = 0
+            logger.info(f"Started extraction process pool with {workers} workers.")
+        _pool_users[_pool] += 1
+        return _pool
+
+def _release_pool(pool, discard: bool = False):
+    """Give back a pool from _acquire_pool; `discard` replaces it for later batches (a worker is stuck)."""
+    global _pool
+    with _pool_lock:
+        _pool_users[pool] -= 1
+        if discard and _pool is pool:
+            _pool = None
+        if _pool is pool or _pool_users[pool]:
+            # Still current, or another batch (e.g. a concurrent index job) has results pending on it
+            return
+        del _pool_users[pool]
+    pool.terminate()
+    # Reap the workers, so they don't linger as zombies
+    pool.join()
+
+def shutdown_pool():
+    """Stop the extraction worker processes once no batch uses them; the next large batch starts a new pool."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+        if pool is None or _pool_users[pool]:
+            return
+        del _pool_users[pool]
+    pool.terminate()
+    pool.join()
+
+def _extract_in_worker(html_content: str) -> Optional[Dict[str, str]]:
+    # Runs in a pool process; dedup happens in the parent, which sees every page
+    if "extractor" not in _worker_state:
+        from backend.cleaner import Cleaner
+        _worker_state["extractor"] = Extractor(dedupe=False)
+        _worker_state["cleaner"] = Cleaner()
+
+    result = _worker_state["extractor"].extract(html_content)
+    if result:
+        result["clean_text"] = _worker_state["cleaner"].clean(result["text"])
+    return result
+
 class Extractor:
     
-    def extract(self, html_content: str) -> Dict[str, Optional[str]]:
+    def __init__(self, dedupe: bool = Config.DEDUP_NEAR_DUPLICATES):
+        # Fingerprints of pages already extracted by this instance (one index run)
+        self.duplicates = NearDuplicateIndex(Config.SIMHASH_MAX_DISTANCE) if dedupe else None
+    
+    @metrics.timed("extract")
+    def extract(self, html_content: str, tree: Optional[HtmlElement] = None) -> Dict[str, Optional[str]]:
         if not html_content:
             logger.warning("Empty HTML content provided for extraction.")
             return None
             
         try:
+            # Reuse the crawler's parsed tree when available instead of parsing the HTML again
             data = trafilatura.bare_extraction(
-                html_content, 
+                tree if tree is not None else html_content, 
                 include_comments=False, 
                 include_tables=True,
                 no_fallback=True
             )
             
+            # trafilatura>=2.0 returns a Document object instead of a dict
+            if data is not None and hasattr(data, "as_dict"):
+                data = data.as_dict()
+            
             if not data or not data.get('text'):
                 logger.warning("Extraction returned empty data.")
                 return None
@@ -34,6 +105,9 @@ class Extractor:
                 logger.warning(f"Extracted content too short ({len(text)} chars). Skipping.")
                 return None
             
+            if self._is_duplicate(text):
+                return None
+            
             compression_ratio = len(text) / len(html_content) if len(html_content) > 0 else 0
             logger.info(f"Extraction successful. Size: {len(text)} chars (Ratio: {compression_ratio:.2f})")
                 
@@ -42,3 +116,58 @@ class Extractor:
         except Exception as e:
             logger.error(f"Extraction failed: {e}")
             return None
+
+    def _is_duplicate(self, text: str) -> bool:
+        if self.duplicates is not None and not self.duplicates.add_if_new(simhash(text)):
+            logger.info("Near-duplicate of an already extracted page. Skipping.")
+            return True
+        return False
+
+    @metrics.timed("extract_batch")
+    def extract_many(self, pages: List[Dict], timeout: float = Config.EXTRACT_TIMEOUT) -> List[Optional[Dict[str, str]]]:
+        """Extract and clean a batch of {"html", optional "tree"} pages, returning results in page order.
+
+        Large batches fan out to a process pool sized by EXTRACT_WORKERS; a page that
+        exceeds `timeout` seconds is skipped (None) and its stuck worker is killed.
+        Results carry the cleaned text under "clean_text". Small batches run in-process
+        and reuse the crawler's parsed trees. Trees can't be sent to other processes, so
+        pool workers parse each page again: parsing is a small part of extraction, and
+        spreading all of it across cores outweighs parsing twice.
+        """
+        workers = Config.EXTRACT_WORKERS
+        if workers <= 1 or len(pages) < Config.EXTRACT_POOL_MIN_BATCH:
+            from backend.cleaner import Cleaner
+            cleaner = Cleaner()
+            results = []
+            for page in pages:
+                result = self.extract(page["html"], tree=page.get("tree"))
+                if result:
+                    result["clean_text"] = cleaner.clean(result["text"])
+                results.append(result)
+            return results
+
+        pool = _acquire_pool(workers)
+        results: List[Optional[Dict[str, str]]] = []
+        stalled = False
+        try:
+            pending = [pool.apply_async(_extract_in_worker, (page["html"],)) for page in pages]
+            for page, async_result in zip(pages, pending):
+                try:
+                    result = async_result.get(timeout=timeout)
+                except multiprocessing.TimeoutError:
+                    logger.error(f"Extraction timed out after {timeout}s for {page.get('url', 'page')}. Skipping.")
+                    stalled = True
+                    result = None
+                except Exception as e:
+                    logger.error(f"Extraction failed in worker: {e}")
+                    result = None
+
+                if result and self._is_duplicate(result["text"]):
+                    result = None
+                results.append(result)
+        finally:
+            # A worker still stuck on a pathological page: later batches get a new pool, and
+            # this one is terminated once batches of other jobs are done with it
+            _release_pool(pool, discard=stalled)
+
+        return results
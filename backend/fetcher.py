@@ -0,0 +1,208 @@
+import codecs
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from backend.page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_:.\-]+)""", re.IGNORECASE)
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([A-Za-z0-9_:.\-]+)", re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session shared by validation and crawling, so keep-alive connections are reused."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=Config.CRAWL_CONCURRENCY, pool_maxsize=Config.CRAWL_CONCURRENCY)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"User-Agent": Config.USER_AGENT})
+            _session = session
+        return _session
+
+def is_html(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return "text/html" in content_type or "application/xhtml+xml" in content_type
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.decode("ascii") if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+def detect_encoding(body: bytes, content_type: str = "") -> str:
+    """Declared charset first (BOM, header, <meta>), then UTF-8, then statistical detection."""
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding
+
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    declared = _valid_codec(match.group(1)) if match else None
+    if declared:
+        return declared
+
+    match = _META_CHARSET_RE.search(body[:4096])
+    declared = _valid_codec(match.group(1)) if match else None
+    if declared:
+        return declared
+
+    try:
+        # Not final: a body cut at MAX_PAGE_BYTES may end mid-character
+        codecs.getincrementaldecoder("utf-8")().decode(body, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    # Only reached for undeclared, non-UTF-8 pages
+    from charset_normalizer import from_bytes
+    best = from_bytes(body[:65536]).best()
+    return best.encoding if best else "latin-1"
+
+class HostLimiter:
+    """Per-host politeness: caps concurrent requests and spaces out request starts."""
+
+    def __init__(self, max_concurrency: int = Config.CRAWL_PER_HOST_CONCURRENCY, min_interval: float = Config.CRAWL_PER_HOST_DELAY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = max(0.0, min_interval)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._intervals: Dict[str, float] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def set_min_interval(self, host: str, interval: float):
+        with self._lock:
+            self._intervals[host] = max(0.0, interval)
+
+    @contextmanager
+    def acquire(self, host: str):
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.Semaphore(self.max_concurrency))
+
+        semaphore.acquire()
+        try:
+            # Reserve the next start slot for this host, then sleep outside the lock
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot.get(host, 0.0))
+                self._next_slot[host] = slot + self._intervals.get(host, self.min_interval)
+
+            if slot > now:
+                time.sleep(slot - now)
+            yield
+        finally:
+            semaphore.release()
+
+class Fetcher:
+    """Single fetch path for pages: streamed, size-capped, cache-aware, decoded once."""
+
+    def __init__(self, cache: Optional[PageCache] = None, limiter: Optional[HostLimiter] = None,
+                 max_bytes: int = Config.MAX_PAGE_BYTES, session: Optional[requests.Session] = None):
+        self.cache = cache
+        self.limiter = limiter
+        self.max_bytes = max_bytes
+        self.session = session or get_session()
+
+    @contextmanager
+    def _slot(self, url: str):
+        if self.limiter is None:
+            yield
+        else:
+            with self.limiter.acquire(urlparse(url).netloc):
+                yield
+
+    def _read_capped(self, response: requests.Response, url: str) -> Optional[bytes]:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            logger.warning(f"Skipping {url}: Content-Length {declared} exceeds {self.max_bytes} bytes")
+            return None
+
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=65536):
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= self.max_bytes:
+                logger.warning(f"Truncating {url} at {self.max_bytes} bytes")
+                break
+        return b"".join(chunks)[:self.max_bytes]
+
+    def fetch(self, url: str, revalidate: bool = False) -> Dict:
+        """Fetch an HTML page as {"status", "url", "content_type", "html"}; "html" is None for anything unusable.
+
+        With `revalidate`, a fresh cache entry is still confirmed with the server.
+        """
+        cached = self.cache.get(url) if self.cache else None
+
+        if cached and not revalidate and self.cache.is_fresh(cached):
+            logger.info(f"Serving from page cache: {url}")
+            self.cache.record_hit()
+            return self._cached_page(cached)
+
+        headers = self.cache.conditional_headers(cached) if cached else {}
+
+        # The host's slot is held until the body is read, so per-host concurrency covers downloads too
+        with self._slot(url):
+            logger.info(f"Fetching: {url}")
+            response = self.session.get(url, timeout=Config.REQUEST_TIMEOUT, headers=headers, stream=True)
+
+            with response:
+                if response.status_code == 304 and cached:
+                    logger.info(f"Not modified, serving from page cache: {url}")
+                    self.cache.touch(url, cached, response.headers)
+                    self.cache.record_hit(revalidated=True)
+                    return self._cached_page(cached)
+
+                content_type = response.headers.get("Content-Type", "")
+                page = {"status": response.status_code, "url": response.url, "content_type": content_type, "html": None}
+
+                # Decide from headers alone; the body of an error or non-HTML response is never downloaded
+                if response.status_code != 200 or not is_html(content_type):
+                    return page
+
+                body = self._read_capped(response, url)
+
+        if body is None:
+            return page
+
+        encoding = detect_encoding(body, content_type)
+        page["html"] = body.decode(encoding, errors="replace")
+        if self.cache:
+            self.cache.record_miss()
+            self.cache.store(url, page["url"], body, response.headers, encoding)
+        return page
+
+    def fetch_raw(self, url: str) -> Optional[Tuple[int, bytes]]:
+        """(status, body) for auxiliary files like robots.txt and sitemaps; None on network errors."""
+        try:
+            with self._slot(url), self.session.get(url, timeout=Config.REQUEST_TIMEOUT, stream=True) as response:
+                if response.status_code != 200:
+                    return response.status_code, b""
+                body = self._read_capped(response, url)
+                return response.status_code, body or b""
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch {url}: {e}")
+            return None
+
+    @staticmethod
+    def _cached_page(entry: Dict) -> Dict:
+        return {
+            "status": 200,
+            "url": entry["url"],
+            "content_type": entry.get("content_type", ""),
+            "html": entry["body"].decode(entry.get("encoding") or "utf-8", errors="replace")
+        }
@@ -0,0 +1,179 @@
+import gzip
+import heapq
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from lxml import etree
+from config import Config
+from backend.urlnorm import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Paths that rarely hold indexable content (auth, listings, feeds, pagination)
+LOW_VALUE_PATTERNS = re.compile(
+    r"/(login|log-in|signin|sign-in|signup|sign-up|register|logout|account|cart|checkout|"
+    r"search|tag|tags|category|categories|author|feed|rss|wp-admin|wp-login|print|share)(/|$|\?|\.)"
+    r"|[?&](page|replytocom|share|print)=|/page/\d+",
+    re.IGNORECASE
+)
+HIGH_VALUE_PATTERNS = re.compile(
+    r"/(docs?|documentation|guide|guides|tutorials?|manual|reference|api|faq|help|learn|blog|articles?|kb)(/|$)",
+    re.IGNORECASE
+)
+NON_HTML_EXTENSIONS = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|ico|css|js|json|xml|zip|gz|tar|tgz|rar|7z|mp3|mp4|avi|mov|woff2?|ttf|eot|exe|dmg|csv|xlsx?|docx?|pptx?)$",
+    re.IGNORECASE
+)
+
+class RobotsPolicy:
+    """robots.txt rules for one host; allows everything when robots.txt is missing or unreadable."""
+
+    def __init__(self, robots_txt: Optional[str] = None, user_agent: str = Config.USER_AGENT):
+        self.user_agent = user_agent
+        self.parser = None
+        if robots_txt:
+            self.parser = RobotFileParser()
+            self.parser.parse(robots_txt.splitlines())
+
+    def allowed(self, url: str) -> bool:
+        if not self.parser:
+            return True
+        return self.parser.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self) -> Optional[float]:
+        if not self.parser:
+            return None
+        delay = self.parser.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    def sitemaps(self) -> List[str]:
+        if not self.parser:
+            return []
+        return self.parser.site_maps() or []
+
+def parse_sitemap(content: bytes) -> Tuple[List[Dict], List[str]]:
+    """Parse a sitemap or sitemap index into (url entries, child sitemap URLs)."""
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, recover=True, huge_tree=False)
+    root = etree.fromstring(content, parser=parser)
+    if root is None:
+        return [], []
+
+    entries: List[Dict] = []
+    children: List[str] = []
+    is_index = etree.QName(root).localname == "sitemapindex"
+
+    for node in root:
+        if not isinstance(node.tag, str):
+            continue
+        fields = {etree.QName(child).localname: (child.text or "").strip() for child in node if isinstance(child.tag, str)}
+        loc = fields.get("loc")
+        if not loc:
+            continue
+        if is_index:
+            children.append(loc)
+            continue
+
+        entry = {"url": loc, "priority": None, "lastmod": None}
+        try:
+            entry["priority"] = float(fields["priority"]) if fields.get("priority") else None
+        except ValueError:
+            pass
+        entry["lastmod"] = _parse_lastmod(fields.get("lastmod"))
+        entries.append(entry)
+
+    return entries, children
+
+def _parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def score_url(url: str, sitemap_priority: Optional[float] = None, lastmod: Optional[datetime] = None) -> float:
+    path = urlparse(url).path
+    depth = len([segment for segment in path.split("/") if segment])
+    score = 1.0 - 0.15 * depth
+
+    if sitemap_priority is not None:
+        score += max(0.0, min(1.0, sitemap_priority))
+
+    if lastmod is not None:
+        age_days = max(0.0, (datetime.now(timezone.utc) - lastmod).total_seconds() / 86400)
+        score += 0.5 * max(0.0, 1.0 - age_days / 365)
+
+    if LOW_VALUE_PATTERNS.search(url):
+        score -= 1.5
+    elif HIGH_VALUE_PATTERNS.search(path):
+        score += 0.3
+
+    return score
+
+class Frontier:
+    """Priority queue of URLs to crawl: highest score first, FIFO among equal scores.
+
+    URLs are deduplicated on their canonical key (see backend.urlnorm).
+    """
+
+    def __init__(self, robots: Optional[RobotsPolicy] = None):
+        self.robots = robots or RobotsPolicy()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        self.seen: Set[str] = set()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, url: str, score: Optional[float] = None,
+             sitemap_priority: Optional[float] = None, lastmod: Optional[datetime] = None,
+             force: bool = False) -> bool:
+        if not self.mark_seen(url):
+            return False
+
+        if not force:
+            if NON_HTML_EXTENSIONS.search(urlparse(url).path):
+                return False
+            if not self.robots.allowed(url):
+                logger.info(f"Disallowed by robots.txt: {url}")
+                return False
+
+        if score is None:
+            score = score_url(url, sitemap_priority, lastmod)
+        heapq.heappush(self._heap, (-score, self._counter, url))
+        self._counter += 1
+        return True
+
+    def mark_seen(self, url: str) -> bool:
+        key = canonicalize_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def pop(self) -> str:
+        return heapq.heappop(self._heap)[2]
+
+    def entries(self) -> List[Tuple[str, float]]:
+        """Pending (url, score) pairs, best first; used for checkpointing."""
+        return [(url, -neg_score) for neg_score, _, url in sorted(self._heap)]
+
+    def restore(self, entries: List[Tuple[str, float]], seen: Set[str], exclude: Set[str] = frozenset()):
+        """Reload a checkpointed frontier, skipping URLs whose canonical key is in `exclude`."""
+        self.seen.update(seen)
+        for url, score in entries:
+            key = canonicalize_url(url)
+            if key in exclude:
+                continue
+            self.seen.add(key)
+            heapq.heappush(self._heap, (-score, self._counter, url))
+            self._counter += 1
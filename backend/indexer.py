@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, Optional, Set
+from config import Config
+from backend.content_store import ContentStore
+from backend.crawl_state import CrawlStateStore
+from backend.pipeline import IndexingCancelled, IngestionPipeline
+from backend.site_registry import CLAIM_TIMEOUT, SiteRegistry
+from backend.vectorstore import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks while another process indexes or evicts the site
+_CLAIM_POLL_INTERVAL = 1.0
+
+def _keep_claim(registry: SiteRegistry, site_id: str, owner: str, done: threading.Event):
+    # Heartbeats for the indexing claim, so other processes know this run is alive
+    while not done.wait(CLAIM_TIMEOUT / 4):
+        if not registry.heartbeat(site_id, owner):
+            logger.warning(f"Lost the indexing claim on site {site_id}; another run may have taken it over")
+            return
+
+def evict_old_sites(registry: SiteRegistry, protect: Set[str]):
+    for site_id in registry.eviction_candidates(protect=protect):
+        if not registry.begin_eviction(site_id):
+            # Started indexing (or being evicted) since the candidates were chosen
+            continue
+        try:
+            VectorStore.for_site(site_id).delete_collection()
+        except Exception as e:
+            logger.warning(f"Could not evict site collection {site_id}: {e}")
+            registry.mark_eviction_failed(site_id)
+            continue
+        registry.remove(site_id)
+        logger.info(f"Evicted least recently used site collection {site_id}")
+
+class SiteIndexer:
+    """Indexes a website into its own collection and keeps the SiteRegistry in sync.
+
+    Shared by the Streamlit app and the HTTP API, which each hold one embedding
+    function and registry for all their users.
+    """
+
+    def __init__(self, embedding_function, registry: SiteRegistry, content_store: Optional[ContentStore] = None):
+        self.embedding_function = embedding_function
+        self.registry = registry
+        if content_store is None and Config.CONTENT_STORE_ENABLED:
+            content_store = ContentStore()
+        self.content_store = content_store
+
+    def open_retriever(self, site_id: str):
+        vs_wrapper = VectorStore.for_site(site_id)
+        return vs_wrapper.as_retriever(vs_wrapper.open_collection(self.embedding_function, reset=False))
+
+    def run(self, start_url: str, limit: int = Config.MAX_PAGES_CRAWL, seed_page: Optional[Dict] = None,
+            force: bool = False, stop_event: Optional[threading.Event] = None) -> Iterator[Dict]:
+        """Yield the pipeline's progress events, then a "done" event with "site_id", "reused" and "retriever".
+
+        A site indexed less than SITE_INDEX_MAX_AGE ago is reused unless `force` is set.
+        Setting `stop_event` cancels the run, which then raises IndexingCancelled.
+        """
+        site_id = self.registry.site_id_for(start_url)
+        vs_wrapper = VectorStore.for_site(site_id)
+        owner = uuid.uuid4().hex
+
+        waiting = False
+        while True:
+            if not force and self.registry.is_fresh(site_id):
+                site = self.registry.get(site_id)
+                self.registry.touch(site_id)
+                built = time.strftime("%Y-%m-%d %H:%M", time.localtime(site["indexed_at"]))
+                yield {
+                    "stage": "done",
+                    "message": f"Reusing the existing index for {start_url} ({site['vector_count']} chunks, built {built}).",
+                    "site_id": site_id,
+                    "reused": True,
+                    "chunks": site["vector_count"],
+                    "retriever": self.open_retriever(site_id)
+                }
+                return
+            if self.registry.begin_indexing(site_id, start_url, owner):
+                break
+            # Another process (the API or another app instance) is indexing or evicting this site;
+            # once it has indexed it, its index is reused
+            if stop_event is not None and stop_event.is_set():
+                raise IndexingCancelled(f"Indexing of {start_url} was cancelled.")
+            if not waiting:
+                waiting = True
+                yield {"stage": "crawl", "message": f"Waiting for another indexing run of {start_url} to finish...", "count": 0}
+            time.sleep(_CLAIM_POLL_INTERVAL)
+
+        claim_done = threading.Event()
+        threading.Thread(target=_keep_claim, args=(self.registry, site_id, owner, claim_done),
+                         name=f"claim-{site_id}", daemon=True).start()
+        pipeline = IngestionPipeline(self.embedding_function, vs_wrapper, stop_event=stop_event, content_store=self.content_store)
+        try:
+            # Deterministic per site, so a crawl interrupted by a failure or restart resumes
+            summary = None
+            for event in pipeline.run(start_url, limit, crawl_id=CrawlStateStore.crawl_id_for(start_url), seed_page=seed_page):
+                if event["stage"] == "done":
+                    summary = event
+                    continue
+                yield event
+
+            if not pipeline.vectorstore:
+                raise RuntimeError("No content could be indexed from this website.")
+
+            self.registry.mark_ready(site_id, vs_wrapper.count())
+            evict_old_sites(self.registry, protect={site_id})
+        except IndexingCancelled:
+            if Config.INDEX_INCREMENTAL:
+                self.registry.mark_cancelled(site_id)
+            else:
+                self.registry.mark_failed(site_id)
+            raise
+        except BaseException:
+            # Also reached when the caller abandons the run (GeneratorExit)
+            self.registry.mark_failed(site_id)
+            raise
+        finally:
+            claim_done.set()
+
+        yield {
+            **summary,
+            "site_id": site_id,
+            "reused": False,
+            "retriever": vs_wrapper.as_retriever(pipeline.vectorstore),
+            "pipeline": pipeline
+        }
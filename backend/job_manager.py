@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from config import Config
+from backend.indexer import SiteIndexer
+from backend.pipeline import IndexingCancelled
+
+logger = logging.getLogger(__name__)
+
+# Objects in the final pipeline event that stay in-process (not part of job snapshots)
+_INTERNAL_KEYS = ("vectorstore", "lexical_index", "retriever", "pipeline")
+
+_ACTIVE = ("queued", "running")
+
+class JobQueueFull(Exception):
+    pass
+
+class IndexJob:
+    """One indexing run. Status goes queued → running → succeeded / failed / cancelled."""
+
+    def __init__(self, url: str, site_id: str, limit: int, seed_page: Optional[Dict], force: bool):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.site_id = site_id
+        self.limit = limit
+        self.seed_page = seed_page
+        self.force = force
+        self.status = "queued"
+        self.error: Optional[str] = None
+        # stage → {"count", "done", "message"}
+        self.progress: Dict[str, Dict] = {}
+        self.events: List[Dict] = []
+        self.result: Optional[Dict] = None
+        # Pages, extracted text and chunks of a finished run, for the caller that submitted it
+        self.pipeline = None
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in _ACTIVE
+
+    def record(self, event: Dict):
+        public = {k: v for k, v in event.items() if k not in _INTERNAL_KEYS}
+        with self._lock:
+            self.events.append(public)
+            if event["stage"] == "done":
+                return
+            stage = self.progress.setdefault(event["stage"], {"count": 0, "done": False, "message": ""})
+            stage["message"] = event["message"]
+            if "count" in event:
+                stage["count"] = event["count"]
+            elif event["stage"] in ("crawl", "extract") and not event.get("skipped"):
+                # One event per page until the stage's summary
+                stage["count"] += 1
+            stage["done"] = stage["done"] or bool(event.get("done"))
+
+    def events_since(self, offset: int) -> List[Dict]:
+        with self._lock:
+            return self.events[offset:]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            progress = {stage: dict(values) for stage, values in self.progress.items()}
+            message = self.events[-1]["message"] if self.events else ""
+        return {
+            "job_id": self.job_id,
+            "url": self.url,
+            "site_id": self.site_id,
+            "status": self.status,
+            "limit": self.limit,
+            "progress": progress,
+            "message": message,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class JobManager:
+    """Runs indexing jobs in the background on a fixed number of worker threads.
+
+    submit() returns at once; callers poll get() for per-stage progress and may
+    cancel(). A submit for a site that already has a queued or running job returns
+    that job instead of starting another. Finished jobs are forgotten after
+    INDEX_JOB_RETENTION seconds. With max_active set, a submit that would start a
+    job while that many are queued or running raises JobQueueFull.
+    """
+
+    def __init__(self, indexer: SiteIndexer, workers: int = Config.INDEX_JOB_WORKERS,
+                 retention: float = Config.INDEX_JOB_RETENTION, max_active: Optional[int] = None):
+        self.indexer = indexer
+        self.retention = retention
+        self.max_active = max_active
+        self._executor = ThreadPoolExecutor(max(1, workers), thread_name_prefix="index-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, IndexJob] = {}
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, url: str, limit: int = Config.MAX_PAGES_CRAWL, seed_page: Optional[Dict] = None,
+               force: bool = False) -> IndexJob:
+        site_id = self.indexer.registry.site_id_for(url)
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if job.site_id == site_id and job.active and not job.stop_event.is_set():
+                    logger.info(f"Indexing of {url} already in progress (job {job.job_id})")
+                    return job
+            if self.max_active is not None and sum(job.active for job in self._jobs.values()) >= self.max_active:
+                raise JobQueueFull(f"{self.max_active} indexing jobs are already queued or running")
+            job = IndexJob(url, site_id, limit, seed_page, force)
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued indexing job {job.job_id} for {url}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IndexJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            return [job.snapshot() for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a queued or running job to stop; False if it is unknown or already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or not job.active:
+                return False
+            job.stop_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+        logger.info(f"Cancellation requested for indexing job {job_id}")
+        return True
+
+    def _run(self, job: IndexJob):
+        with self._lock:
+            if job.stop_event.is_set():
+                # Cancelled while queued
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            for event in self.indexer.run(job.url, job.limit, seed_page=job.seed_page, force=job.force, stop_event=job.stop_event):
+                job.record(event)
+                if event["stage"] == "done":
+                    job.pipeline = event.get("pipeline")
+                    job.result = {
+                        "site_id": event["site_id"],
+                        "reused": event["reused"],
+                        "chunks": event["chunks"],
+                        "pages": event.get("pages")
+                    }
+            job.status = "succeeded"
+        except IndexingCancelled as e:
+            job.status = "cancelled"
+            job.error = str(e)
+        except Exception as e:
+            logger.error(f"Indexing job {job.job_id} for {job.url} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.seed_page = None
+            job.finished_at = time.time()
+            logger.info(f"Indexing job {job.job_id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job.stop_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
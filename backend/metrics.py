@@ -0,0 +1,239 @@
+import functools
+import logging
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+from langchain_core.embeddings import Embeddings
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket bounds in seconds, from a cache hit to a slow LLM answer
+_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+def _labels_key(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    __slots__ = ("metrics", "key", "start")
+
+    def __init__(self, metrics: "Metrics", key: Tuple):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics._record(self.key, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+class _SpanStats:
+    __slots__ = ("count", "total", "max", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.buckets = [0] * len(_BUCKETS)
+
+class Metrics:
+    """Process-wide timing spans and counters, exported as Prometheus text or a JSON summary.
+
+    When disabled, span() hands out a shared no-op context manager and timed()
+    leaves functions undecorated, so instrumented code pays almost nothing.
+    With `trace_memory`, tracemalloc runs too, and memory_snapshot() records
+    the largest allocation sites at points of interest.
+    """
+
+    def __init__(self, enabled: bool = Config.METRICS_ENABLED, trace_memory: bool = Config.METRICS_TRACEMALLOC,
+                 prefix: str = "webchat"):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._spans: Dict[Tuple, _SpanStats] = {}
+        self._counters: Dict[Tuple, float] = {}
+        self._snapshots: Dict[str, Dict] = {}
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            logger.info("tracemalloc started for metrics memory snapshots")
+
+    def span(self, name: str, **labels):
+        """Context manager timing its block under `name`; exceptions are counted as errors."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, (name, _labels_key(labels)))
+
+    def timed(self, name: str):
+        """Decorator form of span(); a no-op when metrics are disabled at import time."""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Span(self, (name, ())):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self._record((name, _labels_key(labels)), seconds, False)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _record(self, key: Tuple, seconds: float, failed: bool):
+        with self._lock:
+            stats = self._spans.get(key)
+            if stats is None:
+                stats = self._spans[key] = _SpanStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.errors += failed
+            for i, bound in enumerate(_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+                    break
+
+    def memory_snapshot(self, label: str, limit: int = 10):
+        """Keep the top allocation sites (by size) under `label`; needs METRICS_TRACEMALLOC."""
+        if not self.trace_memory:
+            return
+        snapshot = tracemalloc.take_snapshot()
+        top = snapshot.statistics("lineno")[:limit]
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._snapshots[label] = {
+                "taken_at": time.time(),
+                "traced_bytes": current,
+                "traced_peak_bytes": peak,
+                "top": [{"site": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count} for stat in top]
+            }
+
+    @staticmethod
+    def peak_rss_bytes() -> int:
+        """Peak resident memory of this process; 0 where getrusage() is unavailable (Windows)."""
+        try:
+            import resource
+        except ImportError:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes on Linux
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def _memory(self) -> Dict:
+        memory = {"peak_rss_bytes": self.peak_rss_bytes()}
+        if self.trace_memory:
+            memory["traced_bytes"], memory["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+        return memory
+
+    def summary(self) -> Dict:
+        """JSON-friendly view: per span count/total/mean/max, counters, memory and snapshots."""
+        with self._lock:
+            spans = {}
+            for (name, labels), stats in sorted(self._spans.items()):
+                label = name + _format_labels(labels)
+                spans[label] = {
+                    "count": stats.count,
+                    "total_s": round(stats.total, 4),
+                    "mean_ms": round(1000 * stats.total / stats.count, 2),
+                    "max_ms": round(1000 * stats.max, 2),
+                    "errors": stats.errors
+                }
+            counters = {name + _format_labels(labels): value for (name, labels), value in sorted(self._counters.items())}
+            snapshots = dict(self._snapshots)
+        return {"enabled": self.enabled, "spans": spans, "counters": counters, "memory": self._memory(), "snapshots": snapshots}
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        family = f"{self.prefix}_span_seconds"
+        lines: List[str] = [f"# HELP {family} Time spent in instrumented code paths.", f"# TYPE {family} histogram"]
+        with self._lock:
+            for (name, labels), stats in sorted(self._spans.items()):
+                pairs = (("span", name),) + labels
+                cumulative = 0
+                for bound, count in zip(_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f"{family}_bucket{_format_labels(pairs + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{family}_bucket{_format_labels(pairs + (('le', '+Inf'),))} {stats.count}")
+                lines.append(f"{family}_sum{_format_labels(pairs)} {stats.total:.6f}")
+                lines.append(f"{family}_count{_format_labels(pairs)} {stats.count}")
+            errors = [(name, labels, stats.errors) for (name, labels), stats in sorted(self._spans.items())]
+            counters = sorted(self._counters.items())
+
+        errors_metric = f"{self.prefix}_span_errors_total"
+        lines += [f"# HELP {errors_metric} Instrumented calls that raised.", f"# TYPE {errors_metric} counter"]
+        lines += [f"{errors_metric}{_format_labels((('span', name),) + labels)} {count}" for name, labels, count in errors]
+
+        by_name: Dict[str, List] = {}
+        for (name, labels), value in counters:
+            by_name.setdefault(f"{self.prefix}_{_NAME_RE.sub('_', name)}_total", []).append((labels, value))
+        for metric, samples in by_name.items():
+            lines.append(f"# TYPE {metric} counter")
+            lines += [f"{metric}{_format_labels(labels)} {value:g}" for labels, value in samples]
+
+        for name, value in self._memory().items():
+            metric = f"{self.prefix}_process_{name}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._snapshots.clear()
+
+class InstrumentedEmbeddings(Embeddings):
+    """Times each embedding batch; everything else is passed through to the wrapped embeddings."""
+
+    def __init__(self, embeddings, metrics: Metrics):
+        self.embeddings = embeddings
+        self.metrics = metrics
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.metrics.span("embed_batch"):
+            vectors = self.embeddings.embed_documents(texts)
+        self.metrics.incr("embedded_texts", len(texts))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.metrics.span("embed_query"):
+            return self.embeddings.embed_query(text)
+
+    def __getattr__(self, name):
+        return getattr(self.embeddings, name)
+
+metrics = Metrics()
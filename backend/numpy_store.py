@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore as LangChainVectorStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matrix product, so float16 stores are upcast a block at a time
+_SEARCH_BLOCK = 65536
+# Collections smaller than this are never compacted
+_COMPACT_MIN_ROWS = 1024
+
+# One open store per directory in this process, so every session writes through the same arrays
+_open_stores: Dict[str, "NumpyVectorStore"] = {}
+_open_stores_lock = threading.Lock()
+
+class NumpyVectorStore(LangChainVectorStore):
+    """Exact-search vector store: one normalized embedding matrix plus parallel record arrays.
+
+    Files in `<persist_directory>/<collection_name>/`:
+      vectors.dat  (capacity, dim) float16/float32 rows, memory-mapped
+      alive.dat    (capacity,) uint8, 0 for deleted rows
+      spans.dat    (capacity, 2) int64 offset/length of each row's record in records.jsonl
+      records.jsonl  {"id", "text", "metadata"} per row, append-only
+      ids.log      [row, id] per added row, append-only
+      state.json   dim, dtype, row count, capacity and generation
+
+    Only the ID → row map is held in RAM; vectors and records are paged in by the OS.
+    Deleting only clears rows in alive.dat. Once more than NUMPY_STORE_COMPACT_RATIO of
+    the rows are dead, the live rows are copied into files of a new generation
+    (`vectors.<generation>.dat`, ...), and state.json is switched over to them. The previous
+    generation's files are kept until the next compaction, for searches still reading them.
+    Cosine similarity is a dot product because rows and queries are normalized.
+    """
+
+    def __init__(self, collection_name: str, embedding_function: Optional[Embeddings] = None,
+                 persist_directory: str = Config.NUMPY_STORE_PATH, dtype: str = Config.NUMPY_STORE_DTYPE):
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+        self.directory = os.path.join(persist_directory, collection_name)
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.dim = 0
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._alive: Optional[np.memmap] = None
+        self._spans: Optional[np.memmap] = None
+        self._rows: Dict[str, int] = {}
+        self.generation = 0
+
+        try:
+            with open(self._path("state.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.dim, self.dtype = state["dim"], np.dtype(state["dtype"])
+            self.count, self.capacity = state["count"], state["capacity"]
+            self.generation = state.get("generation", 0)
+            self._map_arrays()
+            self._rows = {chunk_id: row for row, chunk_id in self._load_ids().items() if self._alive[row]}
+        except (OSError, ValueError, KeyError):
+            pass
+
+    @classmethod
+    def open(cls, collection_name: str, embedding_function: Optional[Embeddings] = None,
+             persist_directory: str = Config.NUMPY_STORE_PATH) -> "NumpyVectorStore":
+        path = os.path.abspath(os.path.join(persist_directory, collection_name))
+        with _open_stores_lock:
+            store = _open_stores.get(path)
+            if store is None:
+                store = _open_stores[path] = cls(collection_name, embedding_function, persist_directory)
+            elif embedding_function is not None:
+                store.embedding_function = embedding_function
+            return store
+
+    @classmethod
+    def exists(cls, collection_name: str, persist_directory: str = Config.NUMPY_STORE_PATH) -> bool:
+        """Whether the collection has been written to; unlike open(), creates nothing."""
+        path = os.path.abspath(os.path.join(persist_directory, collection_name))
+        with _open_stores_lock:
+            if path in _open_stores:
+                return True
+        return os.path.exists(os.path.join(path, "state.json"))
+
+    @classmethod
+    def drop(cls, collection_name: str, persist_directory: str = Config.NUMPY_STORE_PATH):
+        path = os.path.abspath(os.path.join(persist_directory, collection_name))
+        with _open_stores_lock:
+            store = _open_stores.pop(path, None)
+            if store is not None:
+                with store._lock:
+                    store._vectors = store._alive = store._spans = None
+                    store.count = 0
+                    store._rows = {}
+            shutil.rmtree(path, ignore_errors=True)
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding_function
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        """Path of a data file of `generation` (default: the current one); generation 0 has the plain names."""
+        generation = self.generation if generation is None else generation
+        if generation == 0:
+            return self._path(name)
+        stem, ext = os.path.splitext(name)
+        return self._path(f"{stem}.{generation}{ext}")
+
+    def _load_ids(self) -> Dict[int, str]:
+        ids: Dict[int, str] = {}
+        try:
+            with open(self._file("ids.log"), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row, chunk_id = json.loads(line)
+                    except ValueError:
+                        # Torn last line of an interrupted append
+                        continue
+                    ids[row] = chunk_id
+        except FileNotFoundError:
+            pass
+        # Rows past `count` were appended by a write that never committed its state
+        return {row: chunk_id for row, chunk_id in ids.items() if row < self.count}
+
+    @staticmethod
+    def _write_ids_log(path: str, entries: Iterable[Tuple[int, str]]):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps([row, chunk_id]) + "\n" for row, chunk_id in entries)
+        os.replace(tmp_path, path)
+
+    def _map_arrays(self):
+        def mapped(name, dtype, shape):
+            # Sized up front; opening with r+ never reads the data into RAM
+            with open(self._file(name), "ab") as f:
+                f.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            return np.memmap(self._file(name), dtype=dtype, mode="r+", shape=shape)
+
+        self._vectors = mapped("vectors.dat", self.dtype, (self.capacity, self.dim))
+        self._alive = mapped("alive.dat", np.uint8, (self.capacity,))
+        self._spans = mapped("spans.dat", np.int64, (self.capacity, 2))
+
+    def _grow(self, needed: int):
+        if needed <= self.capacity:
+            return
+        self.capacity = max(needed, self.capacity * 2, 1024)
+        for array in (self._vectors, self._alive, self._spans):
+            if array is not None:
+                array.flush()
+        self._map_arrays()
+
+    def _save_state(self):
+        if self._vectors is None:
+            return
+        for array in (self._vectors, self._alive, self._spans):
+            array.flush()
+        self._write_state()
+
+    def _write_state(self):
+        tmp_path = self._path("state.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "count": self.count, "capacity": self.capacity,
+                       "generation": self.generation}, f)
+        os.replace(tmp_path, self._path("state.json"))
+
+    def _maybe_compact(self):
+        dead = self.count - len(self._rows)
+        if self.count >= _COMPACT_MIN_ROWS and dead > self.count * Config.NUMPY_STORE_COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self):
+        """Copy the live rows into a new generation of files and switch to it; called with the lock held."""
+        generation = self.generation + 1
+        live = sorted(self._rows.items(), key=lambda item: item[1])
+        capacity = max(len(live) * 2, 1024)
+
+        def create(name, dtype, shape):
+            return np.memmap(self._file(name, generation), dtype=dtype, mode="w+", shape=shape)
+
+        vectors = create("vectors.dat", self.dtype, (capacity, self.dim))
+        alive = create("alive.dat", np.uint8, (capacity,))
+        spans = create("spans.dat", np.int64, (capacity, 2))
+        old_rows = np.array([row for _, row in live], dtype=np.int64)
+        for start in range(0, len(live), _SEARCH_BLOCK):
+            block = old_rows[start:start + _SEARCH_BLOCK]
+            vectors[start:start + len(block)] = self._vectors[block]
+        alive[:len(live)] = 1
+
+        with open(self._file("records.jsonl"), "rb") as src, open(self._file("records.jsonl", generation), "wb") as dst:
+            for new_row, old_row in enumerate(old_rows):
+                offset, length = self._spans[old_row]
+                src.seek(int(offset))
+                spans[new_row] = (dst.tell(), int(length))
+                dst.write(src.read(int(length)))
+        self._write_ids_log(self._file("ids.log", generation), ((row, chunk_id) for row, (chunk_id, _) in enumerate(live)))
+        for array in (vectors, alive, spans):
+            array.flush()
+        del vectors, alive, spans
+
+        dead = self.count - len(live)
+        previous = self.generation
+        self.generation, self.count, self.capacity = generation, len(live), capacity
+        # The switch-over: until state.json names the new generation, the old files stay authoritative
+        self._write_state()
+        self._rows = {chunk_id: row for row, (chunk_id, _) in enumerate(live)}
+        self._map_arrays()
+        logger.info(f"Compacted numpy store '{self.collection_name}': dropped {dead} deleted rows, {self.count} remain.")
+
+        # Searches that started before the switch may still read `previous`; the one before it is unused
+        if previous >= 1:
+            for name in ("vectors.dat", "alive.dat", "spans.dat", "records.jsonl", "ids.log"):
+                try:
+                    os.remove(self._file(name, previous - 1))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        return matrix / np.clip(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12, None)
+
+    def add_embeddings(self, texts: List[str], embeddings: List[List[float]], metadatas: Optional[List[Dict]] = None,
+                       ids: Optional[List[str]] = None) -> List[str]:
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        matrix = self._normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            if self.dim == 0:
+                self.dim = matrix.shape[1]
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store ({self.dim})")
+
+            # Re-adding an ID replaces it
+            self._delete_ids(ids)
+
+            start = self.count
+            self._grow(start + len(texts))
+            with open(self._file("records.jsonl"), "ab") as f:
+                offset = f.tell()
+                for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                    line = json.dumps({"id": chunk_id, "text": text, "metadata": metadata}).encode("utf-8") + b"\n"
+                    f.write(line)
+                    self._spans[start + i] = (offset, len(line))
+                    offset += len(line)
+
+            self._vectors[start:start + len(texts)] = matrix.astype(self.dtype)
+            self._alive[start:start + len(texts)] = 1
+            self._rows.update({chunk_id: start + i for i, chunk_id in enumerate(ids)})
+            with open(self._file("ids.log"), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps([start + i, chunk_id]) + "\n" for i, chunk_id in enumerate(ids))
+            self.count = start + len(texts)
+            self._save_state()
+            self._maybe_compact()
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[Dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding_function.embed_documents(texts), metadatas, ids)
+
+    def _delete_ids(self, ids: Iterable[str]):
+        for chunk_id in ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is not None:
+                self._alive[row] = 0
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            self._delete_ids(ids)
+            self._save_state()
+            self._maybe_compact()
+        return True
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def _record(spans: np.ndarray, records_path: str, row: int) -> Dict:
+        offset, length = spans[row]
+        with open(records_path, "rb") as f:
+            f.seek(int(offset))
+            return json.loads(f.read(int(length)))
+
+    def _top_k(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, Tuple]:
+        """Best rows and scores, plus the (spans, records path) of the generation they index into."""
+        with self._lock:
+            count = self.count
+            vectors, alive = self._vectors, self._alive
+            view = (self._spans, self._file("records.jsonl"))
+        if count == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), view
+
+        query = self._normalize(np.asarray(query, dtype=np.float32))
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SEARCH_BLOCK):
+            block = np.asarray(vectors[start:min(start + _SEARCH_BLOCK, count)], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        scores[alive[:count] == 0] = -np.inf
+
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top], view
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        rows, scores, (spans, records_path) = self._top_k(embedding, k)
+        results = []
+        for row, score in zip(rows, scores):
+            record = self._record(spans, records_path, int(row))
+            results.append((Document(page_content=record["text"], metadata=record["metadata"], id=record["id"]), float(score)))
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] → relevance in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def get_vectors(self, ids: List[str]) -> np.ndarray:
+        """Stored (normalized) vectors for `ids`, as float32 rows in the same order."""
+        with self._lock:
+            rows = [self._rows[chunk_id] for chunk_id in ids]
+            return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[Dict]] = None,
+                   ids: Optional[List[str]] = None, collection_name: str = "website_content", **kwargs: Any) -> "NumpyVectorStore":
+        store = cls.open(collection_name, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers model (mean pooling + L2 normalization) run through ONNX Runtime.
+
+    On first use the Hugging Face model is exported to ONNX and quantized to int8
+    with dynamic quantization; the files are kept under ONNX_MODEL_DIR. Inputs are
+    sorted by length before batching so each batch pads to a similar length.
+
+    Vectors stay compatible with indexes built by the PyTorch `huggingface` provider:
+    for all-MiniLM-L6-v2 the int8 model's vectors have mean cosine similarity >= 0.99
+    with the full-precision ones (see benchmarks/embedding_benchmark.py).
+    """
+
+    def __init__(self, model_name: str = Config.EMBEDDING_MODEL_NAME, model_dir: str = Config.ONNX_MODEL_DIR,
+                 quantize: bool = Config.ONNX_QUANTIZE, batch_size: int = Config.ONNX_BATCH_SIZE,
+                 max_length: int = Config.ONNX_MAX_LENGTH, intra_op_threads: int = Config.ONNX_INTRA_OP_THREADS,
+                 inter_op_threads: int = Config.ONNX_INTER_OP_THREADS):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.model_dir = os.path.join(model_dir, model_name.replace("/", "__"))
+        self._lock = threading.Lock()
+
+        model_path = self._ensure_model()
+
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        logger.info(f"ONNX embeddings ready ({model_path}, intra_op_threads={intra_op_threads or 'auto'})")
+
+    def _ensure_model(self) -> str:
+        fp32_path = os.path.join(self.model_dir, "model.onnx")
+        int8_path = os.path.join(self.model_dir, "model.int8.onnx")
+        target = int8_path if self.quantize else fp32_path
+
+        with self._lock:
+            if os.path.exists(target):
+                return target
+
+            os.makedirs(self.model_dir, exist_ok=True)
+            if not os.path.exists(fp32_path):
+                self._export(fp32_path)
+
+            if self.quantize:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                logger.info(f"Quantizing {fp32_path} to int8...")
+                quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            return target
+
+    def _export(self, path: str):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        logger.info(f"Exporting {self.model_name} to ONNX...")
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in names),
+                path,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        tokenizer.save_pretrained(self.model_dir)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization, as sentence-transformers does
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            batch = self._encode_batch([texts[i] for i in indices])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[indices] = batch
+
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,54 @@
+import logging
+from typing import List, Optional
+from urllib.parse import urljoin
+from lxml import etree
+from lxml.html import HtmlElement
+from trafilatura import load_html
+
+logger = logging.getLogger(__name__)
+
+# Compiled once; evaluated against every crawled page
+_LINK_XPATH = etree.XPath("//a[@href]/@href")
+_BASE_XPATH = etree.XPath("//head/base[@href]/@href")
+_CANONICAL_XPATH = etree.XPath(
+    "//link[contains(concat(' ', normalize-space(translate(@rel, 'CANONICAL', 'canonical')), ' '), ' canonical ')]/@href"
+)
+
+def parse_html(html_content: str) -> Optional[HtmlElement]:
+    """Parse a page into the lxml tree shared by link discovery and extraction.
+
+    Uses trafilatura's own loader so the tree is exactly what its extractor expects.
+    """
+    if not html_content:
+        return None
+    try:
+        return load_html(html_content)
+    except Exception as e:
+        logger.warning(f"HTML parsing failed: {e}")
+        return None
+
+def extract_links(tree: HtmlElement, page_url: str) -> List[str]:
+    """Return absolute hrefs of all anchors in document order, resolved against <base href> if present."""
+    base = _BASE_XPATH(tree)
+    base_url = urljoin(page_url, base[0].strip()) if base else page_url
+
+    links = []
+    for href in _LINK_XPATH(tree):
+        href = href.strip()
+        if not href or href.startswith(("javascript:", "mailto:", "tel:", "data:")):
+            continue
+        try:
+            links.append(urljoin(base_url, href))
+        except ValueError:
+            continue
+    return links
+
+def extract_canonical(tree: HtmlElement, page_url: str) -> Optional[str]:
+    """Absolute URL declared by <link rel="canonical">, if any."""
+    hrefs = _CANONICAL_XPATH(tree)
+    if not hrefs or not hrefs[0].strip():
+        return None
+    try:
+        return urljoin(page_url, hrefs[0].strip())
+    except ValueError:
+        return None
@@ -0,0 +1,277 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set
+from langchain_core.documents import Document
+from config import Config
+from backend.crawler import Crawler
+from backend.extractor import Extractor
+from backend.cleaner import Cleaner
+from backend.chunker import Chunker
+from backend.content_store import ContentStore, StoredList
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Queue sentinel marking the end of a stage's output
+_DONE = object()
+
+class IndexingCancelled(Exception):
+    pass
+
+class IngestionPipeline:
+    """Crawl → extract → clean/chunk → embed/upsert, with each stage on its own thread.
+
+    Stages are connected by bounded queues, so embedding of the first pages
+    overlaps with downloading of later ones and a slow stage applies back-pressure
+    upstream. run() yields progress events on the calling thread, which is where
+    Streamlit UI calls have to happen.
+    """
+
+    def __init__(self, embedding_function, vector_store: "VectorStore",
+                 crawler: Optional[Crawler] = None, extractor: Optional[Extractor] = None,
+                 cleaner: Optional[Cleaner] = None, chunker: Optional[Chunker] = None,
+                 buffer_size: int = Config.PIPELINE_BUFFER_SIZE, embed_batch_size: int = Config.EMBED_BATCH_SIZE,
+                 stop_event: Optional[threading.Event] = None, content_store: Optional[ContentStore] = None):
+        self.embedding_function = embedding_function
+        self.vector_store = vector_store
+        self.crawler = crawler or Crawler()
+        self.extractor = extractor or Extractor()
+        self.cleaner = cleaner or Cleaner()
+        self.chunker = chunker or Chunker()
+        self.buffer_size = buffer_size
+        self.embed_batch_size = max(1, embed_batch_size)
+        if Config.EMBEDDING_WORKERS > 1:
+            # Upsert batches big enough to be sharded across the embedding pool
+            self.embed_batch_size = max(self.embed_batch_size, Config.EMBEDDING_POOL_MIN_BATCH)
+
+        if content_store is not None:
+            # Written through to disk as they are produced; only digests stay in memory
+            self.pages = StoredList(content_store, "pages")
+            self.extracted_data = StoredList(content_store, "extracted")
+            # Read back to build the keyword index, so kept on disk until the run ends
+            self.chunks = StoredList(content_store, "chunks", pinned=True)
+        else:
+            self.pages: List[Dict] = []
+            self.extracted_data: List[Dict] = []
+            self.chunks: List[Document] = []
+        self.vectorstore = None
+        self.lexical_index = None
+
+        self._events: queue.Queue = queue.Queue()
+        # Setting it from another thread cancels the run
+        self._stop = stop_event or threading.Event()
+        self._errors: List[Exception] = []
+
+    def _emit(self, stage: str, message: str, **data):
+        self._events.put({"stage": stage, "message": message, **data})
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Bounded put that gives up once the pipeline is stopping
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _crawl_stage(self, out: queue.Queue, start_url: str, limit: int, crawl_id: Optional[str], seed_page: Optional[Dict]):
+        pages = self.crawler.iter_crawl(start_url, limit, crawl_id=crawl_id, seed_page=seed_page)
+        try:
+            for page in pages:
+                self.pages.append({"url": page["url"], "html": page["html"]})
+                self._emit("crawl", f"Fetched {page['url']}", url=page["url"])
+                if not self._put(out, page):
+                    break
+        finally:
+            pages.close()
+            self._put(out, _DONE)
+
+        summary = f"Found {len(self.pages)} pages."
+        if self.crawler.cache:
+            stats = self.crawler.cache.stats()
+            summary += f" Page cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+        self._emit("crawl", summary, done=True, count=len(self.pages))
+
+    def _drain(self, q: queue.Queue, first, max_items: int):
+        """`first` plus whatever else is already queued (up to max_items), and whether upstream is done."""
+        batch = [first]
+        while len(batch) < max_items:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _extract_stage(self, inp: queue.Queue, out: queue.Queue):
+        try:
+            upstream_done = False
+            while not upstream_done and (page := self._get(inp)) is not _DONE:
+                # Extract whatever has queued up together so the process pool has work for every core
+                pages, upstream_done = self._drain(inp, page, max(1, Config.EXTRACT_WORKERS * 2))
+                results = self.extractor.extract_many(pages)
+
+                for page, result in zip(pages, results):
+                    # The parsed tree is only needed for extraction; drop it to free memory
+                    page.pop("tree", None)
+                    if not result:
+                        self._emit("extract", f"⚠️ Skipped {page['url']} (Low quality/Empty/Duplicate)", url=page["url"], skipped=True)
+                        continue
+
+                    data = {"url": page["url"], "text": result["text"], "clean_text": result["clean_text"], "title": result["title"]}
+                    self.extracted_data.append({"url": page["url"], "text": result["text"], "title": result["title"]})
+                    self._emit("extract", f"Extracted {len(result['text'])} chars from {page['url']} ('{result['title']}')", url=page["url"])
+                    if not self._put(out, data):
+                        return
+        finally:
+            self._put(out, _DONE)
+
+        self._emit("extract", f"Extracted content from {len(self.extracted_data)} pages.", done=True, count=len(self.extracted_data))
+
+    def _chunk_stage(self, inp: queue.Queue, out: queue.Queue):
+        try:
+            while (data := self._get(inp)) is not _DONE:
+                # Normally already cleaned alongside extraction
+                clean_text = data.get("clean_text") or self.cleaner.clean(data["text"])
+                chunks = self.chunker.chunk(clean_text, data["url"], data["title"])
+                self.chunks.extend(chunks)
+                if chunks and not self._put(out, chunks):
+                    break
+        finally:
+            self._put(out, _DONE)
+
+        self._emit("chunk", f"Generated {len(self.chunks)} chunks from {len(self.extracted_data)} pages.", done=True, count=len(self.chunks))
+
+    def _embed_stage(self, inp: queue.Queue):
+        batch: List[Document] = []
+        stored = 0
+        incremental = Config.INDEX_INCREMENTAL
+        manifest: Dict[str, str] = {}
+        seen_ids: Set[str] = set()
+
+        def flush():
+            nonlocal batch, stored
+            if not batch:
+                return
+            if self.vectorstore is None:
+                if incremental:
+                    manifest.update(self.vector_store.load_manifest())
+                # Opened lazily, so a crawl that yields nothing leaves the previous index intact
+                self.vectorstore = self.vector_store.open_collection(self.embedding_function, reset=not incremental)
+            if incremental:
+                stored += self.vector_store.upsert_new(self.vectorstore, batch, manifest, seen_ids)
+            else:
+                self.vector_store.add_documents(self.vectorstore, batch)
+                stored += len(batch)
+            self._emit("embed", f"Embedded and stored {stored} chunks so far.", count=stored)
+            batch = []
+
+        while (chunks := self._get(inp)) is not _DONE:
+            batch.extend(chunks)
+            if len(batch) >= self.embed_batch_size:
+                flush()
+        if self._stop.is_set():
+            if incremental and self.vectorstore is not None:
+                # Record what was added so a retry doesn't embed it again
+                self.vector_store.save_manifest(manifest)
+            return
+        flush()
+
+        if hasattr(self.embedding_function, "stats"):
+            cache = self.embedding_function.stats()
+            self._emit("embed", f"Embedding cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%} hit rate)")
+
+        if incremental and self.vectorstore is not None:
+            # Only after a complete run: chunks of pages we failed to reach must not be deleted mid-way
+            deleted = self.vector_store.delete_stale(self.vectorstore, manifest, seen_ids)
+            self.vector_store.save_manifest(manifest)
+            unchanged = len(seen_ids) - stored
+            self._emit("embed", f"Synced {self.vector_store.provider.title()}: {stored} new, {unchanged} unchanged, {deleted} removed chunks.",
+                       done=True, count=stored, unchanged=unchanged, deleted=deleted)
+        else:
+            self._emit("embed", f"Stored {stored} chunks in {self.vector_store.provider.title()}.", done=True, count=stored)
+
+        if Config.HYBRID_RETRIEVAL and self.vectorstore is not None:
+            # Rebuilt from every chunk of this crawl, unchanged ones included
+            from backend.bm25 import BM25Index
+            with metrics.span("bm25_build"):
+                self.lexical_index = BM25Index.build(self.chunks, self.vector_store.collection_name)
+            self._emit("index", f"Built keyword index over {len(self.lexical_index)} chunks.", done=True, count=len(self.lexical_index))
+
+    def _run_stage(self, name: str, target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            logger.error(f"Ingestion stage '{name}' failed: {e}", exc_info=True)
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._events.put(_DONE)
+
+    def run(self, start_url: str, limit: int = Config.MAX_PAGES_CRAWL, crawl_id: Optional[str] = None,
+            seed_page: Optional[Dict] = None) -> Iterator[Dict]:
+        """Run the pipeline, yielding {"stage", "message", ...} progress events; the last one has stage "done"."""
+        t_start = time.time()
+        pages_q = queue.Queue(maxsize=self.buffer_size)
+        extracted_q = queue.Queue(maxsize=self.buffer_size)
+        chunks_q = queue.Queue(maxsize=self.buffer_size)
+
+        stages = [
+            ("crawl", self._crawl_stage, pages_q, start_url, limit, crawl_id, seed_page),
+            ("extract", self._extract_stage, pages_q, extracted_q),
+            ("chunk", self._chunk_stage, extracted_q, chunks_q),
+            ("embed", self._embed_stage, chunks_q),
+        ]
+        threads = [
+            threading.Thread(target=self._run_stage, args=(name, target, *args), name=f"ingest-{name}", daemon=True)
+            for name, target, *args in stages
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            finished = 0
+            while finished < len(threads):
+                event = self._events.get()
+                if event is _DONE:
+                    finished += 1
+                    continue
+                yield event
+            cancelled = self._stop.is_set() and not self._errors
+        finally:
+            # Also reached when the caller abandons the generator
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            if isinstance(self.chunks, StoredList):
+                self.chunks.release()
+
+        metrics.observe("ingest_run", time.time() - t_start)
+        metrics.memory_snapshot("after_ingest")
+        if self._errors:
+            raise RuntimeError(f"Indexing failed: {self._errors[0]}") from self._errors[0]
+        if cancelled:
+            raise IndexingCancelled(f"Indexing of {start_url} was cancelled.")
+
+        yield {
+            "stage": "done",
+            "message": f"Indexed {len(self.chunks)} chunks from {len(self.extracted_data)} pages in {time.time() - t_start:.1f}s.",
+            "pages": len(self.pages),
+            "extracted": len(self.extracted_data),
+            "chunks": len(self.chunks),
+            "vectorstore": self.vectorstore,
+            "lexical_index": self.lexical_index
+        }
@@ -0,0 +1,142 @@
+import logging
+import re
+from typing import Dict, List, Optional, Tuple, Union
+from langchain_core.documents import Document
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_encoding = None
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(Config.TOKENIZER_ENCODING)
+        except Exception as e:
+            # tiktoken downloads its BPE file on first use; without it, estimate ~4 chars per token
+            logger.warning(f"tiktoken encoding '{Config.TOKENIZER_ENCODING}' unavailable, estimating token counts: {e}")
+            _encoding = False
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+def truncate_sentences(text: str, max_tokens: int) -> str:
+    """Longest run of whole leading sentences within max_tokens; a hard cut only if the first sentence is too long."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_RE.split(text):
+        if not sentence.strip():
+            continue
+        cost = count_tokens(sentence) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:
+        return truncate_tokens(text, max_tokens)
+    return " ".join(kept)
+
+class PromptPacker:
+    """Splits a prompt token budget between retrieved context and chat history.
+
+    The template and question are counted first. History may take up to
+    `history_share` of the rest: the last `verbatim_turns` messages as they are,
+    older ones cut to their first sentence (at most `compressed_tokens`), oldest
+    dropped first. Context gets everything else, in rank order, with the last
+    document that doesn't fit cut at a sentence boundary.
+    """
+
+    def __init__(self, budget: int = Config.PROMPT_TOKEN_BUDGET, history_share: float = Config.PROMPT_HISTORY_SHARE,
+                 verbatim_turns: int = Config.HISTORY_VERBATIM_TURNS, compressed_tokens: int = Config.HISTORY_COMPRESSED_TOKENS,
+                 min_doc_tokens: int = 40):
+        self.budget = budget
+        self.history_share = history_share
+        self.verbatim_turns = verbatim_turns
+        self.compressed_tokens = compressed_tokens
+        self.min_doc_tokens = min_doc_tokens
+
+    @staticmethod
+    def _turn(message: Dict) -> str:
+        role_label = "Human" if message["role"] == "user" else "AI"
+        return f"{role_label}: {message['content']}"
+
+    def pack_history(self, history: Union[str, List[Dict]], budget: int) -> Tuple[str, int]:
+        if isinstance(history, str):
+            # Pre-formatted history: keep its most recent part
+            lines = history.strip().split("\n")
+            kept, used = [], 0
+            for line in reversed(lines):
+                cost = count_tokens(line) + 1
+                if used + cost > budget:
+                    break
+                kept.insert(0, line)
+                used += cost
+            return "\n".join(kept), used
+
+        kept, used = [], 0
+        for age, message in enumerate(reversed(history)):
+            turn = self._turn(message)
+            if age >= self.verbatim_turns:
+                turn = truncate_sentences(turn, self.compressed_tokens)
+            cost = count_tokens(turn) + 1
+            if used + cost > budget:
+                if age < self.verbatim_turns and budget - used > self.compressed_tokens:
+                    # A long recent turn still contributes its beginning
+                    turn = truncate_sentences(turn, budget - used - 1)
+                    kept.insert(0, turn)
+                    used += count_tokens(turn) + 1
+                break
+            kept.insert(0, turn)
+            used += cost
+        return "\n".join(kept), used
+
+    def pack_context(self, docs: List[Document], budget: int) -> Tuple[List[Document], int]:
+        packed, used = [], 0
+        for doc in docs:
+            # The stuff chain joins documents with a blank line
+            cost = count_tokens(doc.page_content) + 2
+            if used + cost <= budget:
+                packed.append(doc)
+                used += cost
+                continue
+            remaining = budget - used - 2
+            if remaining >= self.min_doc_tokens:
+                text = truncate_sentences(doc.page_content, remaining)
+                packed.append(Document(page_content=text, metadata=doc.metadata))
+                used += count_tokens(text) + 2
+            break
+        return packed, used
+
+    def pack(self, template: str, question: str, docs: List[Document],
+             history: Optional[Union[str, List[Dict]]] = None) -> Tuple[List[Document], str]:
+        fixed = count_tokens(template) + count_tokens(question)
+        available = max(0, self.budget - fixed)
+
+        history_text, history_tokens = self.pack_history(history or [], int(available * self.history_share))
+        packed_docs, context_tokens = self.pack_context(docs, available - history_tokens)
+
+        n_turns = len(history) if isinstance(history, list) else len((history or "").strip().splitlines())
+        logger.info(
+            f"Packed prompt: {context_tokens} context + {history_tokens} history + {fixed} fixed = "
+            f"{context_tokens + history_tokens + fixed}/{self.budget} tokens "
+            f"({len(packed_docs)}/{len(docs)} docs, {len(history_text.splitlines()) if history_text else 0}/{n_turns} turns)"
+        )
+        return packed_docs, history_text
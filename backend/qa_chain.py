@@ -1,24 +1,71 @@
+import hashlib
+import json
 import logging
+import time
 from langchain_groq import ChatGroq
 from langchain.chains.question_answering import load_qa_chain
 from langchain.prompts import PromptTemplate
+from typing import Dict, Iterator, List, Optional, Union
 from config import Config
+from backend.prompt_packer import PromptPacker
+from backend.metrics import metrics
+from backend.retriever import Retriever
 
 logger = logging.getLogger(__name__)
 
+NOT_AVAILABLE = "The answer is not available on the provided website."
+
+class StreamingAnswer:
+    """An answer delivered as text chunks while the LLM generates it.
+
+    `sources` is known before the first chunk; `answer` holds the full text once iteration ends.
+    close() stops the LLM stream and releases the answer-cache claim, also when the
+    answer was never iterated; it runs when iteration ends and is safe to call again.
+    """
+
+    def __init__(self, sources: List, chunks: Iterator[str], on_close=None):
+        self.sources = sources
+        self.answer = ""
+        self._chunks = chunks
+        self._on_close = on_close
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for chunk in self._chunks:
+                self.answer += chunk
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+def create_llm(http_client=None) -> ChatGroq:
+    """Groq chat model; a long-lived process should create one and share it, so its connections are kept alive and reused."""
+    return ChatGroq(
+        model_name=Config.LLM_MODEL_NAME,
+        temperature=Config.LLM_TEMPERATURE,
+        groq_api_key=Config.GROQ_API_KEY,
+        base_url=Config.LLM_BASE_URL,
+        http_client=http_client
+    )
+
 class QAChain:
     
-    def __init__(self, vectorstore_retriever):
+    def __init__(self, vectorstore_retriever, answer_cache=None, cache_scope: Optional[str] = None, llm=None):
         self.retriever = vectorstore_retriever
+        # Shared AnswerCache; scope is "<site_id>:<index version>" so a re-index invalidates it (see _scope_for)
+        self.answer_cache = answer_cache
+        self.cache_scope = cache_scope
         
-        self.llm = ChatGroq(
-            model_name=Config.LLM_MODEL_NAME,
-            temperature=Config.LLM_TEMPERATURE,
-            groq_api_key=Config.GROQ_API_KEY
-        )
+        self.llm = llm or create_llm()
         
         template = """Use the following pieces of context to answer the question at the end. 
-If you don't know the answer, just say 'The answer is not available on the provided website.', don't try to make up an answer.
+If you don't know the answer, just say '""" + NOT_AVAILABLE + """', don't try to make up an answer.
 
 {context}
 
@@ -33,44 +80,160 @@ Answer:"""
             input_variables=["context", "chat_history", "question"]
         )
         
+        self.packer = PromptPacker()
+        
         self.chain = load_qa_chain(
             llm=self.llm, 
             chain_type="stuff", 
             prompt=self.prompt
         )
     
-    def answer(self, query: str, chat_history: str = ""):
+    def _scope_for(self, chat_history: Union[str, List[Dict]]) -> Optional[str]:
+        """Cache scope for this question; answers depend on the conversation, so each distinct history gets its own."""
+        if not self.cache_scope or not chat_history:
+            return self.cache_scope
+        if not isinstance(chat_history, str):
+            chat_history = json.dumps([[m.get("role"), m.get("content")] for m in chat_history])
+        return f"{self.cache_scope}:{hashlib.sha256(chat_history.encode('utf-8')).hexdigest()[:16]}"
+
+    def _embedding_function(self):
+        vectorstore = getattr(self.retriever, "vectorstore", None)
+        return getattr(vectorstore, "embeddings", None)
+
+    def _query_vector(self, query: str) -> Optional[List[float]]:
+        """The query embedding, computed once and shared by the answer cache, vector search and MMR."""
+        embedding_function = self._embedding_function()
+        uses_cache = self.answer_cache is not None and self.cache_scope
+        # Other retrievers embed the query themselves
+        if embedding_function is None or not (uses_cache or isinstance(self.retriever, Retriever)):
+            return None
+        return embedding_function.embed_query(query)
+
+    def answer(self, query: str, chat_history: Union[str, List[Dict]] = ""):
+        """`chat_history` is either earlier {"role", "content"} messages (oldest first) or a preformatted string."""
         logger.info(f"Generating answer for query: {query}")
         try:
-            if hasattr(self.retriever, 'invoke'):
-                docs = self.retriever.invoke(query)
-            else:
-                docs = self.retriever.get_relevant_documents(query)
-            
-            if not docs:
-                logger.warning(f"No relevant documents found for: {query}")
-                return {
-                    "answer": "The answer is not available on the provided website.",
-                    "sources": []
-                }
-            
-            inputs = {"input_documents": docs, "question": query, "chat_history": chat_history}
+            query_vector = self._query_vector(query)
+            if self.answer_cache is not None and self.cache_scope and query_vector is not None:
+                return self.answer_cache.get_or_compute(
+                    self._scope_for(chat_history), query, query_vector,
+                    lambda: self._generate(query, chat_history, query_vector)
+                )
+            return self._generate(query, chat_history, query_vector)
             
+        except Exception as e:
+            logger.error(f"Error executing QA chain: {e}", exc_info=True)
+            return {
+                "answer": f"An error occurred: {str(e)}",
+                "sources": []
+            }
+
+    @metrics.timed("qa_retrieve")
+    def _retrieve(self, query: str, chat_history: Union[str, List[Dict]], query_vector: Optional[List[float]] = None):
+        if isinstance(self.retriever, Retriever):
+            docs = self.retriever.invoke(query, query_vector=query_vector)
+        elif hasattr(self.retriever, 'invoke'):
+            docs = self.retriever.invoke(query)
+        else:
+            docs = self.retriever.get_relevant_documents(query)
+        
+        if not docs:
+            logger.warning(f"No relevant documents found for: {query}")
+            return [], ""
+        
+        # Fit context and history into PROMPT_TOKEN_BUDGET
+        return self.packer.pack(self.prompt.template, query, docs, chat_history)
+
+    def _generate(self, query: str, chat_history: Union[str, List[Dict]], query_vector: Optional[List[float]] = None) -> Dict:
+        """Retrieve and run the LLM; raises on failure so errors are never cached."""
+        t_start = time.perf_counter()
+        docs, chat_history = self._retrieve(query, chat_history, query_vector)
+        if not docs:
+            return {
+                "answer": NOT_AVAILABLE,
+                "sources": []
+            }
+        
+        inputs = {"input_documents": docs, "question": query, "chat_history": chat_history}
+        
+        with metrics.span("qa_generate"):
             if hasattr(self.chain, 'invoke'):
                 response = self.chain.invoke(inputs, return_only_outputs=True)
                 answer_text = response['output_text']
             else:
                 response = self.chain(inputs, return_only_outputs=True)
                 answer_text = response['output_text']
-            
-            return {
-                "answer": answer_text,
-                "sources": docs
-            }
-            
+        
+        logger.info(f"Answer generated in {time.perf_counter() - t_start:.2f}s (not streamed)")
+        return {
+            "answer": answer_text,
+            "sources": docs
+        }
+
+    def stream_answer(self, query: str, chat_history: Union[str, List[Dict]] = "") -> StreamingAnswer:
+        """Like answer(), but the text arrives in chunks; retrieval happens before this returns.
+
+        Errors are raised rather than turned into an answer.
+        """
+        logger.info(f"Streaming answer for query: {query}")
+        t_start = time.perf_counter()
+        claim = None
+        query_vector = self._query_vector(query)
+        if self.answer_cache is not None and self.cache_scope and query_vector is not None:
+            cached, claim = self.answer_cache.begin(self._scope_for(chat_history), query, query_vector)
+            if cached is not None:
+                return StreamingAnswer(cached["sources"], iter([cached["answer"]]))
+        
+        try:
+            docs, chat_history = self._retrieve(query, chat_history, query_vector)
+        except BaseException as e:
+            if claim:
+                self.answer_cache.finish(claim, error=e)
+            raise
+        
+        if not docs:
+            if claim:
+                self.answer_cache.finish(claim, {"answer": NOT_AVAILABLE, "sources": []})
+            return StreamingAnswer([], iter([NOT_AVAILABLE]))
+        
+        # Same text the stuff chain would build
+        prompt = self.prompt.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            chat_history=chat_history,
+            question=query
+        )
+        on_close = None
+        if claim:
+            # No-op once the stream has settled the claim; otherwise waiting callers answer for themselves
+            on_close = lambda: self.answer_cache.release(claim)
+        return StreamingAnswer(docs, self._stream_tokens(prompt, docs, t_start, claim), on_close=on_close)
+
+    def _stream_tokens(self, prompt: str, docs: List, t_start: float, claim) -> Iterator[str]:
+        parts = []
+        t_first = None
+        try:
+            for message in self.llm.stream(prompt):
+                if not message.content:
+                    continue
+                if t_first is None:
+                    t_first = time.perf_counter()
+                    logger.info(f"Time to first token: {t_first - t_start:.2f}s")
+                    metrics.observe("qa_time_to_first_token", t_first - t_start)
+                parts.append(message.content)
+                yield message.content
         except Exception as e:
-            logger.error(f"Error executing QA chain: {e}", exc_info=True)
-            return {
-                "answer": f"An error occurred: {str(e)}",
-                "sources": []
-            }
+            if claim:
+                self.answer_cache.finish(claim, error=e)
+            raise
+        except BaseException:
+            # The consumer stopped early (GeneratorExit); waiting callers answer for themselves
+            if claim:
+                self.answer_cache.release(claim)
+            raise
+        
+        t_total = time.perf_counter() - t_start
+        ttft = f"{t_first - t_start:.2f}s" if t_first is not None else "n/a"
+        logger.info(f"Answer streamed in {t_total:.2f}s (time to first token {ttft}, {len(parts)} chunks)")
+        metrics.observe("qa_stream", t_total)
+        if claim:
+            self.answer_cache.finish(claim, {"answer": "".join(parts), "sources": docs})
@@ -1,13 +1,92 @@
 import logging
-from typing import List
+from typing import Dict, List, Optional, Sequence
+from langchain_core.documents import Document
+from config import Config
+from backend.bm25 import BM25Index, is_exact_term, tokenize
+from backend.context_reducer import ContextReducer
 
 logger = logging.getLogger(__name__)
 
 class Retriever:
-    
-    def retrieve(self, query: str, top_k: int = 3) -> List[str]:
+    """Hybrid retrieval: BM25 over chunk tokens plus vector search, fused with reciprocal rank fusion.
+
+    Drop-in for the vector store retriever in QAChain (`invoke(query)` returns Documents).
+    Without a keyword index it is plain vector search. The query is embedded once, for both
+    vector search and MMR; callers that already embedded it pass `query_vector`.
+    """
+
+    def __init__(self, vectorstore, lexical_index: Optional[BM25Index] = None, top_k: int = Config.RETRIEVAL_TOP_K,
+                 candidates: int = Config.HYBRID_CANDIDATES, rrf_k: int = Config.HYBRID_RRF_K,
+                 reducer: Optional[ContextReducer] = None, fetch_k: int = Config.MMR_FETCH_K):
+        self.vectorstore = vectorstore
+        self.lexical_index = lexical_index
+        self.top_k = top_k
+        self.reducer = reducer
+        # With a reducer, more candidates are fused so MMR has alternatives to choose from
+        self.fetch_k = max(fetch_k, top_k) if reducer else top_k
+        self.candidates = max(candidates, self.fetch_k)
+        self.rrf_k = rrf_k
+
+    def _lexical_weight(self, query: str) -> float:
+        # Error codes, versions and API names are matched exactly by BM25 but blurred by embeddings
+        if any(is_exact_term(token) and self.lexical_index.has_term(token) for token in tokenize(query)):
+            return Config.HYBRID_EXACT_TERM_WEIGHT
+        return 1.0
+
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        embeddings = getattr(self.vectorstore, "embeddings", None)
+        if embeddings is None or not hasattr(self.vectorstore, "similarity_search_by_vector"):
+            return None
+        return embeddings.embed_query(query)
+
+    def retrieve(self, query: str, top_k: Optional[int] = None,
+                 query_vector: Optional[Sequence[float]] = None) -> List[Document]:
         if not query:
             return []
-            
+        top_k = top_k or self.top_k
+        if query_vector is None:
+            query_vector = self._embed_query(query)
+
         logger.info(f"Retrieving top {top_k} results for query: {query}")
-        return []
+        candidates = self._fused(query, max(top_k, self.fetch_k), query_vector)
+        if self.reducer:
+            return self.reducer.reduce(query, candidates, top_k, query_vector=query_vector)
+        return candidates[:top_k]
+
+    def _fused(self, query: str, limit: int, query_vector: Optional[Sequence[float]] = None) -> List[Document]:
+        if query_vector is not None:
+            vector_docs = self.vectorstore.similarity_search_by_vector(list(query_vector), k=self.candidates)
+        else:
+            vector_docs = self.vectorstore.similarity_search(query, k=self.candidates)
+        if not self.lexical_index:
+            return vector_docs[:limit]
+
+        lexical_hits = self.lexical_index.search(query, self.candidates)
+        try:
+            lexical_docs = self.lexical_index.documents([row for row, _ in lexical_hits])
+        except OSError as e:
+            # Loaded from a version that a later rebuild has since removed
+            logger.warning(f"Keyword index is out of date, using vector search only: {e}")
+            return vector_docs[:limit]
+        lexical_weight = self._lexical_weight(query)
+
+        fused: Dict[str, float] = {}
+        docs: Dict[str, Document] = {}
+        for rank, doc in enumerate(vector_docs):
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            fused[key] = fused.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            docs.setdefault(key, doc)
+        for rank, doc in enumerate(lexical_docs):
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            fused[key] = fused.get(key, 0.0) + lexical_weight / (self.rrf_k + rank + 1)
+            docs.setdefault(key, doc)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:limit]
+        logger.info(f"Hybrid retrieval: {len(vector_docs)} vector + {len(lexical_hits)} keyword candidates → {len(ranked)} results")
+        return [docs[key] for key in ranked]
+
+    def invoke(self, query: str, query_vector: Optional[Sequence[float]] = None, **kwargs) -> List[Document]:
+        return self.retrieve(query, query_vector=query_vector)
+
+    def get_relevant_documents(self, query: str) -> List[Document]:
+        return self.retrieve(query)
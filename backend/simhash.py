@@ -0,0 +1,66 @@
+import hashlib
+import re
+import threading
+from typing import Dict, List
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles; near-identical texts differ in only a few bits."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return 0
+    if len(tokens) < shingle_size:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    # Per bit: how many shingle hashes have it set; majority vote gives the fingerprint bit
+    bit_counts = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    bits = (bit_counts * 2 > len(shingles)).astype(np.uint64)
+    return int((bits << _BIT_SHIFTS).sum())
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class NearDuplicateIndex:
+    """Finds stored fingerprints within `max_distance` bits of a new one.
+
+    Fingerprints are split into `max_distance + 1` bands; by pigeonhole, any match
+    within the distance agrees exactly on at least one band, so only fingerprints
+    sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.bands)]
+
+    def find(self, fingerprint: int):
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for candidate in self._buckets[band].get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return candidate
+        return None
+
+    def add_if_new(self, fingerprint: int) -> bool:
+        """Store the fingerprint and return True, or return False if a near-duplicate exists."""
+        with self._lock:
+            if self.find(fingerprint) is not None:
+                return False
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                self._buckets[band].setdefault(key, []).append(fingerprint)
+            return True
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from config import Config
+from backend.urlnorm import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# An indexing or eviction claim whose heartbeat is older than this belongs to a process that died
+CLAIM_TIMEOUT = 120
+
+class SiteRegistry:
+    """SQLite registry of per-site collections, shared by every Streamlit session.
+
+    Tracks each site's collection, vector count and last access, so an index that
+    is still fresh is reused instead of rebuilt, and the least recently used sites
+    are evicted once the total vector count exceeds SITE_MAX_TOTAL_VECTORS.
+
+    A row's status doubles as a lock shared across processes: "indexing" and
+    "evicting" are only set by conditional updates, so a site is indexed by one run
+    at a time and never while it is evicted. The holder refreshes `heartbeat`; a claim
+    without one for CLAIM_TIMEOUT seconds can be taken over.
+    """
+
+    def __init__(self, path: str = Config.SITE_REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sites (
+                site_id TEXT PRIMARY KEY,
+                start_url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                vector_count INTEGER NOT NULL DEFAULT 0,
+                indexed_at REAL,
+                last_access REAL NOT NULL,
+                owner TEXT,
+                heartbeat REAL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def site_id_for(start_url: str) -> str:
+        return hashlib.sha256(canonicalize_url(start_url).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def collection_name_for(site_id: str) -> str:
+        return f"site_{site_id}"
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, site_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT site_id, start_url, status, vector_count, indexed_at, last_access FROM sites WHERE site_id = ?",
+                (site_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("site_id", "start_url", "status", "vector_count", "indexed_at", "last_access"), row))
+
+    def is_fresh(self, site_id: str, max_age: float = Config.SITE_INDEX_MAX_AGE) -> bool:
+        site = self.get(site_id)
+        return bool(
+            site and site["status"] == "ready" and site["vector_count"] > 0
+            and time.time() - site["indexed_at"] <= max_age
+        )
+
+    def begin_indexing(self, site_id: str, start_url: str, owner: str) -> bool:
+        """Claim the site for indexing by `owner`; False while another live run indexes or evicts it."""
+        # Keeps the row (and its vector count) of a previous index, since re-indexing is incremental
+        now = time.time()
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                """INSERT INTO sites (site_id, start_url, status, last_access, owner, heartbeat)
+                   VALUES (?, ?, 'indexing', ?, ?, ?)
+                   ON CONFLICT(site_id) DO UPDATE SET status = 'indexing', last_access = excluded.last_access,
+                       owner = excluded.owner, heartbeat = excluded.heartbeat
+                   WHERE sites.status NOT IN ('indexing', 'evicting') OR COALESCE(sites.heartbeat, 0) < ?""",
+                (site_id, start_url, now, owner, now, now - CLAIM_TIMEOUT)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, site_id: str, owner: str) -> bool:
+        """Keep `owner`'s indexing claim alive; False if it has been lost."""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE sites SET heartbeat = ? WHERE site_id = ? AND owner = ? AND status = 'indexing'",
+                (time.time(), site_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def begin_eviction(self, site_id: str) -> bool:
+        """Mark the site as being evicted; False if it is being indexed or evicted elsewhere."""
+        now = time.time()
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                """UPDATE sites SET status = 'evicting', owner = NULL, heartbeat = ?
+                   WHERE site_id = ? AND (status NOT IN ('indexing', 'evicting') OR COALESCE(heartbeat, 0) < ?)""",
+                (now, site_id, now - CLAIM_TIMEOUT)
+            )
+            return cursor.rowcount == 1
+
+    def mark_eviction_failed(self, site_id: str):
+        # The collection may be partly deleted: never reuse it, and retry it first on the next pass
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE sites SET status = 'failed', last_access = 0 WHERE site_id = ?", (site_id,))
+
+    def mark_ready(self, site_id: str, vector_count: int):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE sites SET status = 'ready', vector_count = ?, indexed_at = ?, last_access = ? WHERE site_id = ?",
+                (vector_count, now, now, site_id)
+            )
+
+    def mark_cancelled(self, site_id: str):
+        # An interrupted incremental run only added chunks, so an earlier index is still usable
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE sites SET status = CASE WHEN indexed_at IS NULL THEN 'failed' ELSE 'ready' END WHERE site_id = ?",
+                (site_id,)
+            )
+
+    def mark_failed(self, site_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE sites SET status = 'failed' WHERE site_id = ?", (site_id,))
+
+    def touch(self, site_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE sites SET last_access = ? WHERE site_id = ?", (time.time(), site_id))
+
+    def remove(self, site_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sites WHERE site_id = ?", (site_id,))
+
+    def total_vectors(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(SUM(vector_count), 0) FROM sites").fetchone()[0]
+
+    def eviction_candidates(self, budget: int = Config.SITE_MAX_TOTAL_VECTORS, protect: Set[str] = frozenset()) -> List[str]:
+        """Least recently used sites to drop so the total vector count fits in `budget`.
+
+        Sites being indexed or evicted and the ones in `protect` are never chosen.
+        """
+        with self._lock:
+            total = self.conn.execute("SELECT COALESCE(SUM(vector_count), 0) FROM sites").fetchone()[0]
+            rows = self.conn.execute(
+                """SELECT site_id, vector_count FROM sites
+                   WHERE status NOT IN ('indexing', 'evicting') OR COALESCE(heartbeat, 0) < ? ORDER BY last_access""",
+                (time.time() - CLAIM_TIMEOUT,)
+            ).fetchall()
+
+        victims = []
+        for site_id, vector_count in rows:
+            if total <= budget:
+                break
+            if site_id in protect:
+                continue
+            victims.append(site_id)
+            total -= vector_count
+        return victims
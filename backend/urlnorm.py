@@ -0,0 +1,69 @@
+import posixpath
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that never change page content. Generic names like "ref" are
+# left out: some sites use them for real content (a git ref, a reference ID).
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "spm",
+    "sessionid", "phpsessid", "jsessionid", "print", "printable"
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+# Parameters whose value here is the same page as omitting them ("p" is left out, it is often a post or product ID)
+DEFAULT_PARAMS = {("page", "1"), ("paged", "1"), ("start", "0"), ("offset", "0")}
+DEFAULT_DOCUMENTS = re.compile(r"/(index|default)\.(html?|php|aspx?)$", re.IGNORECASE)
+
+def canonical_host(netloc: str) -> str:
+    host = netloc.lower().rsplit("@", 1)[-1]
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+def canonicalize_url(url: str) -> str:
+    """Return a dedup key for a URL; pages with the same key are treated as the same page.
+
+    The key folds http/https, www/non-www, default ports, trailing slashes, default
+    documents, tracking/default query parameters and parameter order. It is only
+    used for comparison: pages are still fetched from their original URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme in ("http", "https"):
+        scheme = "https"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if path != "/":
+        trailing = path.endswith("/")
+        path = posixpath.normpath(path)
+        if trailing and path != "/":
+            path += "/"
+    path = DEFAULT_DOCUMENTS.sub("/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    params = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        lowered = key.lower()
+        if lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES):
+            continue
+        if (lowered, value) in DEFAULT_PARAMS:
+            continue
+        params.append((key, value))
+    params.sort()
+
+    return urlunsplit((scheme, canonical_host(parts.netloc), path, urlencode(params), ""))
+
+def same_site(url: str, base_netloc: str) -> bool:
+    return canonical_host(urlsplit(url).netloc) == canonical_host(base_netloc)
+
+def resolve_canonical(page_url: str, canonical_href: Optional[str]) -> Optional[str]:
+    """Canonical key declared by <link rel=canonical>, or None if absent or off-site."""
+    if not canonical_href:
+        return None
+    if not same_site(canonical_href, urlsplit(page_url).netloc):
+        return None
+    return canonicalize_url(canonical_href)
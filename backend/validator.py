@@ -20,25 +20,34 @@ class Validator:
         try:
             from config import Config
             import requests
+            from backend.fetcher import Fetcher, is_html
+            from backend.page_cache import PageCache
 
-            headers = {"User-Agent": Config.USER_AGENT}
-            response = requests.get(url, timeout=Config.REQUEST_TIMEOUT, headers=headers)
+            # Same fetch path as the crawler; the page is returned so the crawler doesn't download it again
+            fetcher = Fetcher(cache=PageCache() if Config.PAGE_CACHE_ENABLED else None)
+            page = fetcher.fetch(url, revalidate=True)
             
-            if response.status_code != 200:
+            if page["status"] != 200:
                 return {
                     "valid": False, 
-                    "error": f"Website unreachable. Status Code: {response.status_code}"
+                    "error": f"Website unreachable. Status Code: {page['status']}"
                 }
             
-            content_type = response.headers.get("Content-Type", "").lower()
-            if "text/html" not in content_type:
+            content_type = page["content_type"].lower()
+            if not is_html(content_type):
                 logger.warning(f"Invalid Content-Type for {url}: {content_type}")
                 return {
                     "valid": False, 
                     "error": f"URL does not point to a website (Content-Type: {content_type}). Expecting text/html."
                 }
+            
+            if page["html"] is None:
+                return {
+                    "valid": False,
+                    "error": f"Page is larger than the {Config.MAX_PAGE_BYTES // (1024 * 1024)} MB limit."
+                }
                 
-            return {"valid": True, "error": None}
+            return {"valid": True, "error": None, "page": page}
 
         except requests.Timeout:
             return {"valid": False, "error": f"Connection timed out (Limit: {Config.REQUEST_TIMEOUT}s)."}
@@ -1,21 +1,33 @@
+import json
 import logging
 import chromadb
 import os
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set
 from langchain_community.vectorstores import Chroma
 from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document
 from pinecone import Pinecone
 from config import Config
+from backend.numpy_store import NumpyVectorStore
+from backend.bm25 import BM25Index
+from backend.metrics import metrics
+
+try:
+    from chromadb.errors import NotFoundError as ChromaNotFoundError
+except ImportError:
+    # chromadb before 0.6 raises ValueError for a missing collection
+    ChromaNotFoundError = ValueError
 
 logger = logging.getLogger(__name__)
 
 class VectorStore:
     
-    def __init__(self, collection_name: str = "website_content"):
+    def __init__(self, collection_name: str = "website_content", namespace: Optional[str] = None):
         os.environ["ANONYMIZED_TELEMETRY"] = "False"
         
         self.collection_name = collection_name
+        # Pinecone keeps every site in one index, separated by namespace
+        self.namespace = namespace
         self.provider = Config.VECTOR_STORE_PROVIDER
         
         if self.provider == "chroma":
@@ -30,6 +42,8 @@ class VectorStore:
             self.index_name = Config.PINECONE_INDEX_NAME
             if not Config.PINECONE_API_KEY:
                 raise ValueError("Pinecone API Key is missing.")
+        elif self.provider == "numpy":
+            self.persist_directory = Config.NUMPY_STORE_PATH
     
     def _reset_collection(self):
         try:
@@ -39,7 +53,7 @@ class VectorStore:
                 try:
                     self.client.delete_collection(name=self.collection_name)
                     logger.info(f"Deleted existing Chroma collection '{self.collection_name}'.")
-                except ValueError:
+                except (ValueError, ChromaNotFoundError):
                     # Collection might not exist, which is fine
                     pass 
                     
@@ -47,19 +61,31 @@ class VectorStore:
                 try:
                     pc = Pinecone(api_key=Config.PINECONE_API_KEY)
                     index = pc.Index(self.index_name)
-                    index.delete(delete_all=True)
-                    logger.info(f"Cleared Pinecone index '{self.index_name}'.")
+                    index.delete(delete_all=True, namespace=self.namespace)
+                    logger.info(f"Cleared Pinecone index '{self.index_name}' (namespace: {self.namespace or 'default'}).")
                 except Exception as e:
                     if "NOT_FOUND" in str(e) or "404" in str(e):
                         logger.warning(f"Index '{self.index_name}' does not exist yet. Skipping reset.")
                     else:
                         logger.error(f"Failed to reset Pinecone index: {e}")
                         raise RuntimeError("Could not reset Pinecone index.")
+            
+            elif self.provider == "numpy":
+                NumpyVectorStore.drop(self.collection_name, self.persist_directory)
+                logger.info(f"Deleted NumPy collection '{self.collection_name}'.")
 
         except Exception as e:
             logger.error(f"Failed to reset collection: {e}")
             raise RuntimeError(f"Could not reset vector store for new site: {e}")
+        
+        try:
+            os.remove(self._manifest_path())
+        except OSError:
+            pass
+        # The keyword index describes this collection's chunks, so it goes with it
+        BM25Index.delete(self.collection_name)
 
+    @metrics.timed("vector_create_collection")
     def create_collection(self, documents: List[Document], embedding_function):
         if not documents:
             logger.warning("No documents provided to create collection.")
@@ -81,11 +107,153 @@ class VectorStore:
                 documents=documents,
                 embedding=embedding_function,
                 index_name=self.index_name,
-                pinecone_api_key=Config.PINECONE_API_KEY
+                pinecone_api_key=Config.PINECONE_API_KEY,
+                namespace=self.namespace
+            )
+        elif self.provider == "numpy":
+            vectorstore = NumpyVectorStore.from_documents(
+                documents=documents,
+                embedding=embedding_function,
+                collection_name=self.collection_name,
+                persist_directory=self.persist_directory
             )
         
         logger.info("Vector store created and persisted.")
         return vectorstore
 
+    def open_collection(self, embedding_function, reset: bool = True):
+        """Return an empty (or, without `reset`, existing) store to be filled incrementally via add_documents."""
+        logger.info(f"Opening vector store ({self.provider}) for incremental writes.")
+        
+        if reset:
+            self._reset_collection()
+        
+        if self.provider == "chroma":
+            return Chroma(
+                client=self.client,
+                collection_name=self.collection_name,
+                embedding_function=embedding_function
+            )
+        elif self.provider == "pinecone":
+            return PineconeVectorStore(
+                index_name=self.index_name,
+                embedding=embedding_function,
+                pinecone_api_key=Config.PINECONE_API_KEY,
+                namespace=self.namespace
+            )
+        elif self.provider == "numpy":
+            return NumpyVectorStore.open(self.collection_name, embedding_function, self.persist_directory)
+        raise ValueError(f"Unsupported vector store provider: {self.provider}")
+
+    @metrics.timed("vector_upsert")
+    def add_documents(self, vectorstore, documents: List[Document]):
+        if not documents:
+            return
+        vectorstore.add_documents(documents)
+        logger.info(f"Upserted {len(documents)} documents into {self.provider}.")
+
+    def delete_collection(self):
+        """Drop this collection (or Pinecone namespace) and its manifest."""
+        self._reset_collection()
+
+    def count(self) -> int:
+        """Number of vectors currently stored in this collection (or namespace)."""
+        try:
+            if self.provider == "chroma":
+                return self.client.get_collection(name=self.collection_name).count()
+            elif self.provider == "pinecone":
+                stats = Pinecone(api_key=Config.PINECONE_API_KEY).Index(self.index_name).describe_index_stats()
+                namespace = stats.get("namespaces", {}).get(self.namespace or "", {})
+                return namespace.get("vector_count", 0)
+            elif self.provider == "numpy":
+                if not NumpyVectorStore.exists(self.collection_name, self.persist_directory):
+                    return 0
+                return len(NumpyVectorStore.open(self.collection_name, persist_directory=self.persist_directory))
+        except Exception as e:
+            logger.warning(f"Could not count vectors in {self.provider}: {e}")
+        return 0
+
+    def _manifest_path(self) -> str:
+        name = self.index_name if self.provider == "pinecone" else self.collection_name
+        if self.provider == "pinecone" and self.namespace:
+            name = f"{name}_{self.namespace}"
+        return os.path.join(Config.INDEX_MANIFEST_DIR, f"{self.provider}_{name}.json")
+
+    def load_manifest(self) -> Dict[str, str]:
+        """Chunk IDs already stored in this collection, mapped to their source URL."""
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        
+        if self.provider == "chroma":
+            # The collection itself is authoritative: drop IDs it no longer has, keep ones the manifest missed
+            try:
+                stored_ids = set(self.client.get_collection(name=self.collection_name).get(include=[])["ids"])
+            except Exception:
+                stored_ids = set()
+            manifest = {chunk_id: manifest.get(chunk_id, "") for chunk_id in stored_ids}
+        elif self.provider == "numpy":
+            stored_ids = set()
+            if NumpyVectorStore.exists(self.collection_name, self.persist_directory):
+                stored_ids = NumpyVectorStore.open(self.collection_name, persist_directory=self.persist_directory).ids()
+            manifest = {chunk_id: manifest.get(chunk_id, "") for chunk_id in stored_ids}
+        
+        return manifest
+
+    def save_manifest(self, manifest: Dict[str, str]):
+        os.makedirs(Config.INDEX_MANIFEST_DIR, exist_ok=True)
+        path = self._manifest_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    @metrics.timed("vector_upsert")
+    def upsert_new(self, vectorstore, documents: List[Document], manifest: Dict[str, str], seen_ids: Set[str]) -> int:
+        """Embed and add only chunks whose ID isn't stored yet; records every ID seen in this run."""
+        new_docs, new_ids = [], []
+        for doc in documents:
+            chunk_id = doc.metadata["chunk_id"]
+            if chunk_id not in manifest and chunk_id not in seen_ids:
+                new_docs.append(doc)
+                new_ids.append(chunk_id)
+            seen_ids.add(chunk_id)
+        
+        if new_docs:
+            vectorstore.add_documents(new_docs, ids=new_ids)
+            for doc, chunk_id in zip(new_docs, new_ids):
+                manifest[chunk_id] = doc.metadata.get("source", "")
+        
+        logger.info(f"Upserted {len(new_docs)} new chunks ({len(documents) - len(new_docs)} unchanged) into {self.provider}.")
+        return len(new_docs)
+
+    @metrics.timed("vector_delete_stale")
+    def delete_stale(self, vectorstore, manifest: Dict[str, str], keep_ids: Iterable[str]) -> int:
+        """Delete stored chunks that weren't produced by the latest crawl."""
+        keep_ids = set(keep_ids)
+        stale = [chunk_id for chunk_id in manifest if chunk_id not in keep_ids]
+        for start in range(0, len(stale), 500):
+            vectorstore.delete(ids=stale[start:start + 500])
+        for chunk_id in stale:
+            manifest.pop(chunk_id, None)
+        
+        if stale:
+            logger.info(f"Deleted {len(stale)} stale chunks from {self.provider}.")
+        return len(stale)
+
+    @classmethod
+    def for_site(cls, site_id: str) -> "VectorStore":
+        from backend.site_registry import SiteRegistry
+        name = SiteRegistry.collection_name_for(site_id)
+        return cls(collection_name=name, namespace=name)
+
     def as_retriever(self, vectorstore):
+        if Config.HYBRID_RETRIEVAL or Config.CONTEXT_REDUCTION:
+            from backend.retriever import Retriever
+            from backend.context_reducer import ContextReducer
+            lexical_index = BM25Index.load(self.collection_name) if Config.HYBRID_RETRIEVAL else None
+            reducer = ContextReducer(vectorstore.embeddings, vectorstore=vectorstore) if Config.CONTEXT_REDUCTION else None
+            return Retriever(vectorstore, lexical_index, reducer=reducer)
         return vectorstore.as_retriever(search_kwargs={"k": Config.RETRIEVAL_TOP_K})
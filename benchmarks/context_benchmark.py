@@ -0,0 +1,77 @@
+"""Prompt tokens saved per query by redundancy-aware retrieval (MMR + adjacent-chunk merging + line trimming).
+
+Runs a fixed question set against a site that has already been indexed (through
+the app or the pipeline) and compares the context that the "stuff" chain would
+send with and without the ContextReducer. Tokens are counted with tiktoken's
+cl100k_base, an approximation of the Groq model's tokenizer.
+
+Usage:
+    python benchmarks/context_benchmark.py --url https://example.com
+    python benchmarks/context_benchmark.py --url https://example.com --questions my_questions.txt
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tiktoken
+from config import Config
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.txt")
+
+def context_tokens(encoding, docs) -> int:
+    # The stuff chain joins documents with blank lines
+    return len(encoding.encode("\n\n".join(doc.page_content for doc in docs)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="Start URL of an indexed site")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--k", type=int, default=Config.RETRIEVAL_TOP_K)
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    from backend.embedder import Embedder
+    from backend.site_registry import SiteRegistry
+    from backend.vectorstore import VectorStore
+    from backend.bm25 import BM25Index
+    from backend.retriever import Retriever
+    from backend.context_reducer import ContextReducer
+
+    embedding_function = Embedder().get_embedding_function()
+    vs_wrapper = VectorStore.for_site(SiteRegistry.site_id_for(args.url))
+    if not vs_wrapper.count():
+        sys.exit(f"{args.url} has not been indexed yet; index it in the app first.")
+    vectorstore = vs_wrapper.open_collection(embedding_function, reset=False)
+    lexical_index = BM25Index.load(vs_wrapper.collection_name) if Config.HYBRID_RETRIEVAL else None
+
+    baseline = Retriever(vectorstore, lexical_index, top_k=args.k)
+    reduced = Retriever(vectorstore, lexical_index, top_k=args.k, reducer=ContextReducer(embedding_function))
+    encoding = tiktoken.get_encoding("cl100k_base")
+
+    rows = []
+    for question in questions:
+        before = context_tokens(encoding, baseline.invoke(question))
+        after_docs = reduced.invoke(question)
+        after = context_tokens(encoding, after_docs)
+        rows.append({"question": question, "tokens_before": before, "tokens_after": after,
+                     "saved": before - after, "passages": len(after_docs)})
+
+    total_before = sum(row["tokens_before"] for row in rows)
+    total_saved = sum(row["saved"] for row in rows)
+    print(json.dumps({
+        "url": args.url,
+        "queries": len(rows),
+        "k": args.k,
+        "mean_tokens_before": round(total_before / len(rows), 1),
+        "mean_tokens_saved": round(total_saved / len(rows), 1),
+        "saved_pct": round(100 * total_saved / max(total_before, 1), 1),
+        "per_query": rows
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Compare the `huggingface` (PyTorch) and `onnx` (ONNX Runtime, int8) embedding providers.
+
+Reports throughput (chunks/s) for each provider, the cosine similarity between
+their vectors for the same chunk, and recall@k of ONNX retrieval against the
+PyTorch results, both with an all-ONNX index and with ONNX queries against a
+PyTorch-built index (the mixed case an existing index sees after switching).
+
+Usage:
+    python benchmarks/embedding_benchmark.py                 # synthetic corpus
+    python benchmarks/embedding_benchmark.py --url https://example.com --pages 20
+    python benchmarks/embedding_benchmark.py --text-file corpus.txt
+
+Tolerance: the ONNX provider is considered compatible when the mean cosine
+similarity is >= 0.99 and cross-index recall@k is >= 0.9. The script exits
+non-zero when either check fails.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from config import Config
+
+MIN_MEAN_COSINE = 0.99
+MIN_CROSS_RECALL = 0.9
+
+WORDS = (
+    "pricing plan account billing invoice support team customer guide install setup configure server "
+    "database backup restore security password login api request response token limit error timeout "
+    "retry cache index search query result page document upload download export import report chart "
+    "user admin role permission project workspace integration webhook email notification schedule"
+).split()
+
+def synthetic_corpus(count: int, seed: int = 13):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(1, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        texts.append(" ".join(sentences))
+    return texts
+
+def crawled_corpus(url: str, pages: int):
+    from backend.crawler import Crawler
+    from backend.extractor import Extractor
+    from backend.chunker import Chunker
+
+    extractor, chunker = Extractor(), Chunker()
+    texts = []
+    for page in Crawler().crawl(url, pages):
+        result = extractor.extract(page["html"], tree=page.get("tree"))
+        if result:
+            texts.extend(doc.page_content for doc in chunker.chunk(result["text"], page["url"], result["title"]))
+    return texts
+
+def file_corpus(path: str):
+    from backend.chunker import Chunker
+    with open(path, "r", encoding="utf-8") as f:
+        return [doc.page_content for doc in Chunker().chunk(f.read(), path, os.path.basename(path))]
+
+def timed_embed(embeddings, texts, repeat: int):
+    embeddings.embed_documents(texts[:8])  # Warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        best = min(best, time.perf_counter() - start)
+    return np.asarray(vectors, dtype=np.float32), len(texts) / best
+
+def top_k(index: np.ndarray, queries: np.ndarray, k: int):
+    scores = queries @ index.T
+    return [set(row) for row in np.argpartition(-scores, k, axis=1)[:, :k]]
+
+def recall(expected, actual):
+    return float(np.mean([len(e & a) / len(e) for e, a in zip(expected, actual)]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Crawl this site for the corpus")
+    parser.add_argument("--pages", type=int, default=Config.MAX_PAGES_CRAWL)
+    parser.add_argument("--text-file", help="Chunk this text file for the corpus")
+    parser.add_argument("--chunks", type=int, default=1000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=Config.RETRIEVAL_TOP_K)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=Config.ONNX_INTRA_OP_THREADS)
+    args = parser.parse_args()
+
+    if args.url:
+        texts = crawled_corpus(args.url, args.pages)
+    elif args.text_file:
+        texts = file_corpus(args.text_file)
+    else:
+        texts = synthetic_corpus(args.chunks)
+    if len(texts) <= args.k:
+        sys.exit(f"Corpus too small ({len(texts)} chunks) for k={args.k}")
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from backend.onnx_embeddings import OnnxEmbeddings
+
+    # Uncached on purpose: this measures the models, not the embedding cache
+    torch_vectors, torch_rate = timed_embed(HuggingFaceEmbeddings(model_name=Config.EMBEDDING_MODEL_NAME), texts, args.repeat)
+    onnx_vectors, onnx_rate = timed_embed(OnnxEmbeddings(intra_op_threads=args.threads), texts, args.repeat)
+
+    cosine = np.sum(torch_vectors * onnx_vectors, axis=1)
+
+    rng = random.Random(7)
+    query_ids = rng.sample(range(len(texts)), min(args.queries, len(texts)))
+    # First sentence of a chunk stands in for a user question about it
+    queries = [texts[i].split(". ")[0] for i in query_ids]
+    torch_queries = np.asarray(HuggingFaceEmbeddings(model_name=Config.EMBEDDING_MODEL_NAME).embed_documents(queries), dtype=np.float32)
+    onnx_queries = np.asarray(OnnxEmbeddings(intra_op_threads=args.threads).embed_documents(queries), dtype=np.float32)
+
+    baseline = top_k(torch_vectors, torch_queries, args.k)
+    result = {
+        "chunks": len(texts),
+        "queries": len(queries),
+        "k": args.k,
+        "huggingface_chunks_per_s": round(torch_rate, 1),
+        "onnx_chunks_per_s": round(onnx_rate, 1),
+        "speedup": round(onnx_rate / torch_rate, 2),
+        "cosine_mean": round(float(cosine.mean()), 4),
+        "cosine_min": round(float(cosine.min()), 4),
+        "recall_at_k_onnx_index": round(recall(baseline, top_k(onnx_vectors, onnx_queries, args.k)), 4),
+        "recall_at_k_cross_index": round(recall(baseline, top_k(torch_vectors, onnx_queries, args.k)), 4),
+    }
+    print(json.dumps(result, indent=2))
+
+    if result["cosine_mean"] < MIN_MEAN_COSINE or result["recall_at_k_cross_index"] < MIN_CROSS_RECALL:
+        sys.exit("ONNX vectors are outside the documented tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Local fake of the Groq/OpenAI chat completions endpoint, with configurable latency.
+
+Answers POST /openai/v1/chat/completions (and /v1/chat/completions) with a canned
+reply, either as one JSON response or as a server-sent event stream. The first
+token arrives after --ttft seconds and each further token after --token-delay.
+
+Usage:
+    python benchmarks/fake_llm_server.py --port 8099
+    LLM_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=fake streamlit run app.py
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("The site explains how to install the product, lists the available plans and their prices, "
+         "and describes how to reach the support team by email or chat. ")
+
+def make_handler(ttft: float, token_delay: float, tokens: int):
+    words = (REPLY * (tokens // len(REPLY.split()) + 1)).split()[:tokens]
+    pieces = [word + " " for word in words]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _chunk(self, model: str, delta: dict, finish_reason=None) -> bytes:
+            body = {
+                "id": self._id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            return f"data: {json.dumps(body)}\n\n".encode("utf-8")
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = request.get("model", "fake")
+            self._id = f"chatcmpl-{uuid.uuid4().hex}"
+            usage = {"prompt_tokens": 100, "completion_tokens": len(pieces), "total_tokens": 100 + len(pieces)}
+
+            if not request.get("stream"):
+                time.sleep(ttft + token_delay * (len(pieces) - 1))
+                body = json.dumps({
+                    "id": self._id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(pieces)}, "finish_reason": "stop"}],
+                    "usage": usage
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._write_chunk(self._chunk(model, {"role": "assistant", "content": ""}))
+            time.sleep(ttft)
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(token_delay)
+                self._write_chunk(self._chunk(model, {"content": piece}))
+            final = self._chunk(model, {}, "stop")
+            self._write_chunk(final)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+def start_server(port: int = 0, ttft: float = 0.5, token_delay: float = 0.02, tokens: int = 120) -> ThreadingHTTPServer:
+    """Start the server on a background thread; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(ttft, token_delay, tokens))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--ttft", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between tokens")
+    parser.add_argument("--tokens", type=int, default=120)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.ttft, args.token_delay, args.tokens)
+    print(f"Fake LLM server on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
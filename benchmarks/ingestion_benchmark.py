@@ -0,0 +1,302 @@
+"""End-to-end ingestion throughput on a synthetic local website: crawl → extract → clean/chunk → embed/store.
+
+Serves a deterministic site (benchmarks/synthetic_site.py) from a local
+http.server and runs the real IngestionPipeline against it in a scratch
+directory, so no network or API keys are needed. With --fake-embedder, no model
+is needed either; otherwise the configured embedding model must already be in the
+local model cache.
+
+Reports pages/s, bytes/s, chunks/s, embeddings/s, peak RSS and per-stage times
+as JSON. Stages run concurrently, so each has two numbers: "busy_s" is the time
+spent inside the stage's own work (fetching, extract_many, clean + chunk,
+embedding, vector store writes), and "done_at_s" is when the stage finished,
+counted from the start of the run. Crawl politeness delays are disabled unless
+--polite is given, so the crawler is measured rather than the rate limit. The
+JSON report is the only output on stdout (logs and warnings go to stderr), so it
+can be piped straight into jq.
+
+Save a run with --output and compare later runs against it with --compare. The
+exit status is 1 when a metric is worse than the baseline by more than
+--tolerance.
+
+Usage:
+    python benchmarks/ingestion_benchmark.py --pages 200 --fake-embedder --output baseline.json
+    python benchmarks/ingestion_benchmark.py --pages 200 --fake-embedder --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from config import Config
+from benchmarks.synthetic_site import add_site_arguments, site_from_args
+
+# Metric → True if higher is better
+COMPARED_METRICS = {
+    "pages_per_s": True,
+    "bytes_per_s": True,
+    "chunks_per_s": True,
+    "embeddings_per_s": True,
+    "wall_s": False,
+    "peak_rss_mb": False,
+}
+
+class StageTimer:
+    """Accumulates time spent inside wrapped methods, per stage."""
+
+    def __init__(self):
+        self.busy = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def wrap(self, obj, name: str, stage: str):
+        method = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.busy[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+
+        setattr(obj, name, timed)
+
+    def wrap_iterator(self, obj, name: str, stage: str):
+        """Like wrap(), for a method returning a generator: times each next() instead of the call."""
+        method = getattr(obj, name)
+        timer = self
+
+        def timed(*args, **kwargs):
+            inner = method(*args, **kwargs)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(inner)
+                    except StopIteration:
+                        return
+                    finally:
+                        timer.busy[stage] += time.perf_counter() - start
+                    timer.calls[stage] += 1
+                    yield item
+            finally:
+                inner.close()
+
+        setattr(obj, name, timed)
+
+class TimedEmbeddings(Embeddings):
+    """Delegates to an embedding model, adding the time spent in embed_documents to the "embed" stage."""
+
+    def __init__(self, embeddings, timer: StageTimer):
+        self.embeddings = embeddings
+        self.timer = timer
+
+    def embed_documents(self, texts):
+        start = time.perf_counter()
+        try:
+            return self.embeddings.embed_documents(texts)
+        finally:
+            self.timer.busy["embed"] += time.perf_counter() - start
+            self.timer.calls["embed"] += 1
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+def peak_rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def git_commit() -> str:
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return ""
+
+def configure(args, workdir: str):
+    # Every relative data path (vector store, manifests, BM25 index, registry) lands in the scratch directory
+    os.chdir(workdir)
+    Config.VECTOR_STORE_PROVIDER = args.store
+    Config.PAGE_CACHE_ENABLED = False
+    Config.CRAWL_STATE_ENABLED = False
+    Config.EMBEDDING_CACHE_ENABLED = args.embedding_cache
+    Config.MAX_PAGES_CRAWL = args.pages
+
+def embedding_function(args):
+    if args.fake_embedder:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=args.fake_dim)
+    from backend.embedder import Embedder
+    return Embedder().get_embedding_function()
+
+def run_once(args, url: str, embeddings, run: int) -> dict:
+    from backend.pipeline import IngestionPipeline
+    from backend.crawler import Crawler
+    from backend.fetcher import HostLimiter
+    from backend.extractor import Extractor
+    from backend.cleaner import Cleaner
+    from backend.chunker import Chunker
+    from backend.vectorstore import VectorStore
+
+    timer = StageTimer()
+    # Without --polite, a single host may use every crawl connection with no delay
+    limiter = None if args.polite else HostLimiter(max_concurrency=Config.CRAWL_CONCURRENCY, min_interval=0)
+    crawler, extractor, cleaner, chunker = Crawler(limiter=limiter), Extractor(), Cleaner(), Chunker()
+    vector_store = VectorStore(collection_name=f"bench_{run}")
+    timer.wrap_iterator(crawler, "iter_crawl", "crawl")
+    timer.wrap(extractor, "extract_many", "extract")
+    timer.wrap(cleaner, "clean", "chunk")
+    timer.wrap(chunker, "chunk", "chunk")
+    # Vector store writes include the embedding call made inside them; it is subtracted below
+    timer.wrap(vector_store, "upsert_new" if Config.INDEX_INCREMENTAL else "add_documents", "store")
+
+    pipeline = IngestionPipeline(TimedEmbeddings(embeddings, timer), vector_store, crawler=crawler, extractor=extractor, cleaner=cleaner, chunker=chunker)
+    done_at = {}
+    start = time.perf_counter()
+    for event in pipeline.run(url, args.pages):
+        if event.get("done") or event["stage"] == "done":
+            done_at[event["stage"]] = round(time.perf_counter() - start, 3)
+    wall = time.perf_counter() - start
+
+    page_bytes = sum(len(page["html"].encode("utf-8")) if isinstance(page["html"], str) else len(page["html"])
+                     for page in pipeline.pages)
+    busy = dict(timer.busy)
+    busy["store"] = max(0.0, busy.get("store", 0.0) - busy.get("embed", 0.0))
+    if "index" in done_at and "embed" in done_at:
+        busy["index"] = done_at["index"] - done_at["embed"]
+    chunks = len(pipeline.chunks)
+    return {
+        "wall_s": round(wall, 3),
+        "pages": len(pipeline.pages),
+        "extracted_pages": len(pipeline.extracted_data),
+        "bytes": page_bytes,
+        "chunks": chunks,
+        "pages_per_s": round(len(pipeline.pages) / wall, 2),
+        "bytes_per_s": round(page_bytes / wall, 1),
+        "chunks_per_s": round(chunks / wall, 2),
+        # Embedding throughput while embedding, independent of how fast chunks arrived
+        "embeddings_per_s": round(chunks / busy["embed"], 1) if busy.get("embed") else None,
+        "stages": {
+            # Writes to the vector store happen inside the embed stage
+            stage: {"busy_s": round(busy.get(stage, 0.0), 3), "done_at_s": done_at.get("embed" if stage == "store" else stage),
+                    "calls": timer.calls.get(stage, 0)}
+            for stage in ("crawl", "extract", "chunk", "embed", "store", "index")
+        },
+    }
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> dict:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    baseline = previous["summary"]
+    comparison, regressions = {}, []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        before, after = baseline.get(metric), results["summary"].get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        comparison[metric] = {"baseline": before, "current": after, "change_pct": round(100 * change, 1)}
+        if worse > tolerance:
+            regressions.append(metric)
+    return {
+        "baseline": baseline_path,
+        "baseline_commit": previous.get("commit"),
+        # Numbers from a different site or settings are not comparable
+        "same_setup": previous.get("site") == results["site"] and previous.get("settings") == results["settings"],
+        "tolerance_pct": round(100 * tolerance, 1),
+        "metrics": comparison,
+        "regressions": regressions
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_site_arguments(parser)
+    parser.add_argument("--runs", type=int, default=1, help="Runs with a fresh vector store each; the summary is the median")
+    parser.add_argument("--store", choices=("chroma", "numpy"), default=Config.VECTOR_STORE_PROVIDER if Config.VECTOR_STORE_PROVIDER != "pinecone" else "chroma")
+    parser.add_argument("--fake-embedder", action="store_true", help="Hash-based vectors instead of the configured model")
+    parser.add_argument("--fake-dim", type=int, default=384)
+    parser.add_argument("--embedding-cache", action="store_true", help="Keep the persistent embedding cache on (off by default)")
+    parser.add_argument("--polite", action="store_true", help="Keep the configured per-host crawl delay and concurrency")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--output", help="Write the results JSON here as well")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+    for path in ("output", "compare"):
+        if getattr(args, path):
+            setattr(args, path, os.path.abspath(getattr(args, path)))
+
+    site = site_from_args(args)
+    server = site.serve()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    workdir = tempfile.mkdtemp(prefix="ingestion_benchmark_")
+    cwd = os.getcwd()
+    configure(args, workdir)
+
+    try:
+        baseline_rss = peak_rss_mb(resource.RUSAGE_SELF)
+        embeddings = embedding_function(args)
+        runs = [run_once(args, url, embeddings, run) for run in range(max(1, args.runs))]
+    finally:
+        server.shutdown()
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = {metric: statistics.median(run[metric] for run in runs) for metric in
+               ("wall_s", "pages_per_s", "bytes_per_s", "chunks_per_s")}
+    embed_rates = [run["embeddings_per_s"] for run in runs if run["embeddings_per_s"]]
+    summary["embeddings_per_s"] = statistics.median(embed_rates) if embed_rates else None
+    summary["peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_SELF)
+    # Largest extraction worker (or other child) process. Only reaped children are
+    # counted, so stop the worker pool first.
+    from backend.extractor import shutdown_pool
+    shutdown_pool()
+    summary["peak_child_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    summary["rss_before_run_mb"] = baseline_rss
+
+    results = {
+        "benchmark": "ingestion",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "site": {"pages": site.pages, "page_bytes": site.page_bytes, "links": site.links, "graph": site.graph,
+                 "boilerplate": site.boilerplate, "seed": site.seed, "total_bytes": site.total_bytes()},
+        "settings": {"store": args.store, "embedder": "fake" if args.fake_embedder else f"{Config.EMBEDDING_PROVIDER}:{Config.EMBEDDING_MODEL_NAME}",
+                     "embedding_cache": args.embedding_cache, "polite": args.polite, "incremental": Config.INDEX_INCREMENTAL,
+                     "extract_workers": Config.EXTRACT_WORKERS, "crawl_concurrency": Config.CRAWL_CONCURRENCY,
+                     "chunk_size": Config.CHUNK_SIZE, "embed_batch_size": Config.EMBED_BATCH_SIZE},
+        "summary": summary,
+        "runs": runs,
+    }
+    from backend.metrics import metrics
+    if metrics.enabled:
+        # Span timings from the in-code instrumentation (METRICS_ENABLED)
+        results["metrics"] = metrics.summary()
+    if args.compare:
+        results["comparison"] = compare(results, args.compare, args.tolerance)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    if args.compare and results["comparison"]["regressions"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Server memory with N simulated sessions, each indexing its own synthetic site.
+
+Each session runs the real IngestionPipeline against a local synthetic site
+(benchmarks/synthetic_site.py, a different seed per session) and keeps what the
+Streamlit app keeps in session state afterwards: the crawled pages, the
+extracted text and the chunks. Then every session reads back a few chunks. This
+is done twice, each time in a fresh child process:
+
+    memory  the lists are held in memory (CONTENT_STORE_ENABLED = False)
+    store   they go to the on-disk ContentStore and sessions hold handles
+
+For each mode, the results give the peak RSS, the RSS after every session,
+and the steady-state RSS once all sessions are idle (after gc). Embeddings are
+hash-based unless --real-embedder is given.
+
+Usage:
+    python benchmarks/session_memory_benchmark.py --sessions 10 --pages 100 --page-kb 40
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from benchmarks.ingestion_benchmark import configure, embedding_function, peak_rss_mb
+from benchmarks.synthetic_site import SyntheticSite, add_site_arguments
+
+MODES = ("memory", "store")
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident = int(f.read().split()[1])
+        return round(resident * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError):
+        # Not Linux; only the peak is reported
+        return None
+
+def run_sessions(args, urls) -> dict:
+    from backend.content_store import ContentStore
+    from backend.pipeline import IngestionPipeline
+    from backend.vectorstore import VectorStore
+
+    store = ContentStore() if args.child == "store" else None
+    embeddings = embedding_function(args)
+    sessions, rss_after_session = [], []
+    start_rss = current_rss_mb()
+
+    for i, url in enumerate(urls):
+        pipeline = IngestionPipeline(embeddings, VectorStore(collection_name=f"session_{i}"), content_store=store)
+        for _ in pipeline.run(url, args.pages):
+            pass
+        owner = f"session-{i}"
+        # As app.py's render_index_job leaves session state
+        session = {}
+        for key, items in (("raw_data", pipeline.pages), ("extracted_data", pipeline.extracted_data), ("chunks", pipeline.chunks)):
+            session[key] = items.handle(owner) if store else items
+        sessions.append(session)
+        del pipeline
+        gc.collect()
+        rss_after_session.append(current_rss_mb())
+
+    # Lazy access from every session, which fills the store's read cache
+    read = 0
+    for session in sessions:
+        for i, chunk in enumerate(session["chunks"]):
+            if i >= args.reads:
+                break
+            read += len(chunk.page_content)
+    gc.collect()
+
+    return {
+        "mode": args.child,
+        "sessions": len(sessions),
+        "pages": sum(len(session["raw_data"]) for session in sessions),
+        "chunks": sum(len(session["chunks"]) for session in sessions),
+        "rss_at_start_mb": start_rss,
+        "rss_after_session_mb": rss_after_session,
+        "steady_rss_mb": current_rss_mb(),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "content_store": store.stats() if store else None,
+        "chars_read_back": read
+    }
+
+def child_main(args):
+    workdir = tempfile.mkdtemp(prefix="session_memory_benchmark_")
+    cwd = os.getcwd()
+    configure(args, workdir)
+    Config.CONTENT_STORE_SESSION_MEMORY_BYTES = args.session_cache_mb * 1024 * 1024
+    Config.CONTENT_STORE_MEMORY_BYTES = args.cache_mb * 1024 * 1024
+    try:
+        results = run_sessions(args, args.urls.split(","))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("RESULT " + json.dumps(results))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_site_arguments(parser)
+    parser.set_defaults(page_kb=40)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--reads", type=int, default=50, help="Chunks each session reads back after indexing")
+    parser.add_argument("--store", choices=("chroma", "numpy"), default="numpy")
+    parser.add_argument("--real-embedder", dest="fake_embedder", action="store_false", help="Use the configured embedding model")
+    parser.add_argument("--fake-dim", type=int, default=384)
+    parser.add_argument("--cache-mb", type=int, default=Config.CONTENT_STORE_MEMORY_BYTES // (1024 * 1024))
+    parser.add_argument("--session-cache-mb", type=int, default=Config.CONTENT_STORE_SESSION_MEMORY_BYTES // (1024 * 1024))
+    parser.add_argument("--polite", action="store_true", help="Keep the configured per-host crawl delay and concurrency")
+    parser.add_argument("--output", help="Write the results JSON here as well")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--urls", help=argparse.SUPPRESS)
+    parser.set_defaults(embedding_cache=False)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args)
+        return
+
+    sites = [SyntheticSite(args.pages, int(args.page_kb * 1024), args.links, args.graph, args.boilerplate, args.seed + i)
+             for i in range(max(1, args.sessions))]
+    servers = [site.serve() for site in sites]
+    urls = ",".join(f"http://127.0.0.1:{server.server_address[1]}/" for server in servers)
+
+    results = {
+        "benchmark": "session_memory",
+        "site": {"pages": args.pages, "page_bytes": sites[0].page_bytes, "total_bytes_per_session": sites[0].total_bytes()},
+        "settings": {"store": args.store, "embedder": "fake" if args.fake_embedder else Config.EMBEDDING_MODEL_NAME,
+                     "reads": args.reads, "cache_mb": args.cache_mb, "session_cache_mb": args.session_cache_mb},
+    }
+    try:
+        for mode in MODES:
+            command = [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--child", mode, "--urls", urls]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            results[mode] = json.loads(next(line[len("RESULT "):] for line in output.splitlines() if line.startswith("RESULT ")))
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    results["change"] = {
+        metric: round(results["store"][metric] - results["memory"][metric], 1)
+        for metric in ("peak_rss_mb", "steady_rss_mb") if results["memory"][metric] is not None
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Time to first token vs total latency for QAChain.answer and QAChain.stream_answer.
+
+Points the Groq client at benchmarks/fake_llm_server.py, so no API key or network
+is needed, and uses a fixed in-memory retriever, so only the LLM path is measured.
+
+Usage:
+    python benchmarks/streaming_benchmark.py --ttft 0.5 --token-delay 0.02 --tokens 120
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from config import Config
+from benchmarks.fake_llm_server import start_server
+
+class _FixedRetriever:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def invoke(self, query):
+        return self.docs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_server(0, args.ttft, args.token_delay, args.tokens)
+    Config.LLM_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    Config.GROQ_API_KEY = Config.GROQ_API_KEY or "fake"
+
+    from backend.qa_chain import QAChain
+    docs = [Document(page_content="Install with pip install example. Plans start at $10 per month.", metadata={"source": "https://example.com"})]
+    qa_chain = QAChain(_FixedRetriever(docs))
+
+    blocking, first, streamed = [], [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        qa_chain.answer("How do I install it?")
+        blocking.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        t_first = None
+        for _chunk in qa_chain.stream_answer("How do I install it?"):
+            if t_first is None:
+                t_first = time.perf_counter() - start
+        first.append(t_first)
+        streamed.append(time.perf_counter() - start)
+    server.shutdown()
+
+    print(json.dumps({
+        "runs": args.runs,
+        "server": {"ttft_s": args.ttft, "token_delay_s": args.token_delay, "tokens": args.tokens},
+        # Without streaming, nothing is shown until the whole answer is in
+        "blocking_first_text_s": round(statistics.median(blocking), 3),
+        "streaming_first_token_s": round(statistics.median(first), 3),
+        "streaming_total_s": round(statistics.median(streamed), 3),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Deterministic synthetic website served from a local http.server, for offline ingestion benchmarks.
+
+The same arguments always produce byte-identical pages. Every page has an
+article of unique generated text plus a header, navigation and footer that are
+the same on every page (the boilerplate), sized so that boilerplate makes up
+`boilerplate` of the page's bytes. Pages link to each other through a
+"Related pages" list shaped by `graph`:
+    random  `links` random other pages
+    tree    pages 2i+1 ... (a `links`-ary tree from the home page)
+    chain   the next `links` pages
+
+Usage:
+    python benchmarks/synthetic_site.py --pages 200 --page-kb 20 --port 8090
+"""
+import argparse
+import functools
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+_SYLLABLES = ["ka", "lo", "mi", "ren", "to", "sa", "vel", "no", "ti", "par", "en", "gu", "dor", "fi", "la", "quo",
+              "ser", "bi", "mon", "ta", "xe", "ru", "pli", "den", "ca", "vo", "nis", "ar", "te", "lum"]
+
+class SyntheticSite:
+
+    def __init__(self, pages: int = 100, page_bytes: int = 20 * 1024, links: int = 5, graph: str = "random",
+                 boilerplate: float = 0.3, seed: int = 0):
+        if graph not in ("random", "tree", "chain"):
+            raise ValueError(f"Unknown link graph: {graph}")
+        self.pages = max(1, pages)
+        self.page_bytes = page_bytes
+        self.links = links
+        self.graph = graph
+        self.boilerplate = min(max(boilerplate, 0.0), 0.95)
+        self.seed = seed
+
+        rng = random.Random(f"{seed}:vocabulary")
+        self.vocabulary = sorted({"".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(3000)})
+        self._chrome = self._make_chrome()
+
+    @staticmethod
+    def path(i: int) -> str:
+        return "/" if i == 0 else f"/docs/page-{i}.html"
+
+    def _sentence(self, rng: random.Random) -> str:
+        words = [rng.choice(self.vocabulary) for _ in range(rng.randint(8, 20))]
+        return " ".join(words).capitalize() + "."
+
+    def _paragraphs(self, rng: random.Random, size: int) -> List[str]:
+        paragraphs, total = [], 0
+        while total < size:
+            paragraph = " ".join(self._sentence(rng) for _ in range(rng.randint(3, 6)))
+            paragraphs.append(paragraph)
+            total += len(paragraph) + 7
+        return paragraphs
+
+    def _make_chrome(self):
+        """Header/nav and footer shared by every page, together about boilerplate * page_bytes."""
+        rng = random.Random(f"{self.seed}:chrome")
+        budget = int(self.page_bytes * self.boilerplate)
+        nav_links = "".join(f'<li><a href="{self.path(i)}">Section {i}</a></li>' for i in range(min(self.pages, 8)))
+        header = f"<header><div class=\"logo\">Synthetic Docs</div><nav><ul>{nav_links}</ul></nav></header>"
+        footer_items, size = [], len(header)
+        while size < budget:
+            item = f"<li>{self._sentence(rng)}</li>"
+            footer_items.append(item)
+            size += len(item)
+        footer = f"<footer><ul>{''.join(footer_items)}</ul><p>Copyright Synthetic Docs. All rights reserved.</p></footer>"
+        return header, footer
+
+    def out_links(self, i: int) -> List[int]:
+        if self.pages == 1:
+            return []
+        if self.graph == "tree":
+            return [j for j in range(self.links * i + 1, self.links * i + self.links + 1) if j < self.pages]
+        if self.graph == "chain":
+            return [j % self.pages for j in range(i + 1, i + 1 + self.links) if j % self.pages != i]
+        rng = random.Random(f"{self.seed}:links:{i}")
+        others = [j for j in range(self.pages) if j != i]
+        return rng.sample(others, min(self.links, len(others)))
+
+    @functools.lru_cache(maxsize=4096)
+    def page(self, i: int) -> bytes:
+        rng = random.Random(f"{self.seed}:page:{i}")
+        header, footer = self._chrome
+        article_size = max(200, int(self.page_bytes * (1 - self.boilerplate)))
+        paragraphs = "".join(f"<p>{p}</p>" for p in self._paragraphs(rng, article_size))
+        related = "".join(f'<li><a href="{self.path(j)}">Page {j}</a></li>' for j in self.out_links(i))
+        title = f"Page {i}: {self._sentence(rng)[:-1]}"
+        html = (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title></head><body>{header}"
+            f"<main><article><h1>{title}</h1>{paragraphs}</article><aside><h2>Related pages</h2><ul>{related}</ul></aside></main>"
+            f"{footer}</body></html>"
+        )
+        return html.encode("utf-8")
+
+    def total_bytes(self) -> int:
+        return sum(len(self.page(i)) for i in range(self.pages))
+
+    def _handler(self):
+        site = self
+        paths = {self.path(i): i for i in range(self.pages)}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/robots.txt":
+                    self._send(200, b"User-agent: *\nAllow: /\n", "text/plain")
+                elif path in paths:
+                    self._send(200, site.page(paths[path]), "text/html; charset=utf-8")
+                else:
+                    self._send(404, b"Not found", "text/plain")
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def serve(self, port: int = 0) -> ThreadingHTTPServer:
+        """Serve on 127.0.0.1 from a background thread; port 0 picks a free port."""
+        server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+def add_site_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-kb", type=float, default=20, help="Approximate size of each page")
+    parser.add_argument("--links", type=int, default=5, help="Out-links per page")
+    parser.add_argument("--graph", choices=("random", "tree", "chain"), default="random")
+    parser.add_argument("--boilerplate", type=float, default=0.3, help="Share of each page that is shared header/nav/footer")
+    parser.add_argument("--seed", type=int, default=0)
+
+def site_from_args(args) -> SyntheticSite:
+    return SyntheticSite(args.pages, int(args.page_kb * 1024), args.links, args.graph, args.boilerplate, args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_site_arguments(parser)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    site = site_from_args(args)
+    server = site.serve(args.port)
+    print(f"Serving {site.pages} synthetic pages on http://127.0.0.1:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Query latency of the `numpy` vector store provider against the Chroma path.
+
+Both stores get the same random unit vectors (MiniLM-sized by default) and are
+queried through LangChain's similarity_search_by_vector, so embedding time is
+left out and only the store itself is measured. Also reports Chroma's recall@k
+against the exact NumPy results, since HNSW is approximate.
+
+Usage:
+    python benchmarks/vectorstore_benchmark.py --vectors 100000 --queries 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config import Config
+
+class _NoEmbeddings(Embeddings):
+    # Vectors are passed in directly; the stores only need an object to hold
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+def latencies(search, queries, k: int):
+    search(queries[0], k)  # Warm-up
+    timings = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query, k))
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.asarray(timings)
+    return results, {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "mean_ms": round(float(timings.mean()), 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=Config.RETRIEVAL_TOP_K)
+    parser.add_argument("--dtype", default=Config.NUMPY_STORE_DTYPE)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    texts = [f"text {i}" for i in range(args.vectors)]
+    metadatas = [{"source": f"https://example.com/{i // 10}"} for i in range(args.vectors)]
+
+    from backend.numpy_store import NumpyVectorStore
+    import chromadb
+    from langchain_community.vectorstores import Chroma
+
+    result = {"vectors": args.vectors, "dim": args.dim, "queries": args.queries, "k": args.k, "numpy_dtype": args.dtype}
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        numpy_store = NumpyVectorStore("bench", _NoEmbeddings(), os.path.join(tmp, "numpy"), dtype=args.dtype)
+        for i in range(0, args.vectors, args.batch):
+            numpy_store.add_embeddings(texts[i:i + args.batch], vectors[i:i + args.batch], metadatas[i:i + args.batch], ids[i:i + args.batch])
+        result["numpy_build_s"] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        numpy_store = NumpyVectorStore("bench", _NoEmbeddings(), os.path.join(tmp, "numpy"), dtype=args.dtype)
+        result["numpy_open_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+        collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+        start = time.perf_counter()
+        for i in range(0, args.vectors, args.batch):
+            collection.add(ids=ids[i:i + args.batch], embeddings=vectors[i:i + args.batch],
+                           documents=texts[i:i + args.batch], metadatas=metadatas[i:i + args.batch])
+        result["chroma_build_s"] = round(time.perf_counter() - start, 2)
+        chroma_store = Chroma(client=client, collection_name="bench", embedding_function=_NoEmbeddings())
+
+        query_lists = [query.tolist() for query in queries]
+        numpy_results, result["numpy"] = latencies(numpy_store.similarity_search_by_vector, query_lists, args.k)
+        chroma_results, result["chroma"] = latencies(chroma_store.similarity_search_by_vector, query_lists, args.k)
+
+        result["speedup_p50"] = round(result["chroma"]["p50_ms"] / max(result["numpy"]["p50_ms"], 1e-6), 2)
+        result["chroma_recall_at_k"] = round(float(np.mean([
+            len({doc.page_content for doc in exact} & {doc.page_content for doc in approx}) / args.k
+            for exact, approx in zip(numpy_results, chroma_results)
+        ])), 4)
+
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,24 +22,142 @@ class Config:
     
     CHROMA_DB_PATH = "chroma_db"
     
+    # VECTOR_STORE_PROVIDER = "numpy": exact search over memory-mapped normalized embeddings
+    NUMPY_STORE_PATH = "numpy_store"
+    NUMPY_STORE_DTYPE = "float32"  # "float16" halves memory and disk but each search pays an upcast
+    NUMPY_STORE_COMPACT_RATIO = 0.3  # Rewrite a collection without its deleted rows once this fraction of rows is dead
+    
+    # Per-site collections (Chroma collection / Pinecone namespace) shared by all sessions
+    SITE_REGISTRY_PATH = "site_registry.db"
+    SITE_INDEX_MAX_AGE = 24 * 3600  # Seconds an index is reused before the site is crawled again
+    SITE_MAX_TOTAL_VECTORS = 500000  # Least recently used sites are evicted beyond this
+    
     REQUEST_TIMEOUT = 10
+    MAX_PAGE_BYTES = 5 * 1024 * 1024  # Larger pages are truncated; bigger declared Content-Length is skipped
     USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"
     
     MAX_PAGES_CRAWL = 5
+    CRAWL_CONCURRENCY = 8  # Requests kept in flight across the whole crawl
+    CRAWL_PER_HOST_CONCURRENCY = 4
+    CRAWL_PER_HOST_DELAY = 0.1  # Minimum seconds between request starts to one host
+    CRAWL_RESPECT_ROBOTS = True
+    CRAWL_MAX_DELAY = 10  # Upper bound applied to robots.txt Crawl-delay
+    CRAWL_USE_SITEMAPS = True
+    SITEMAP_MAX_FILES = 10  # Sitemaps (including nested index entries) read per crawl
+    SITEMAP_MAX_URLS = 5000
+
+    # Crawl checkpointing, so interrupted crawls resume instead of starting over
+    CRAWL_STATE_ENABLED = True
+    CRAWL_STATE_PATH = "crawl_state.db"
+    CRAWL_CHECKPOINT_INTERVAL = 10  # Pages fetched between frontier snapshots
+    CRAWL_STATE_MAX_AGE = 6 * 3600  # Seconds since its last write before an unfinished crawl starts over instead of resuming
+
+    # Persistent page cache for re-crawls (conditional GET with ETag/Last-Modified)
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_DIR = "page_cache"
+    PAGE_CACHE_MAX_AGE = 300  # Seconds an entry is served without revalidation
+    
+    # Disk-backed store for crawled pages, extracted text and chunks; sessions only hold small handles to them
+    CONTENT_STORE_ENABLED = True
+    CONTENT_STORE_DIR = "content_store"
+    CONTENT_STORE_MAX_BYTES = 512 * 1024 * 1024  # Compressed, on disk; least recently used entries are deleted first
+    CONTENT_STORE_MEMORY_BYTES = 64 * 1024 * 1024  # Items read back and cached in memory, across all sessions
+    CONTENT_STORE_SESSION_MEMORY_BYTES = 8 * 1024 * 1024  # Same, per session
+    
+    # Parallel extraction: batches of at least EXTRACT_POOL_MIN_BATCH pages go to a process pool
+    EXTRACT_WORKERS = os.cpu_count() or 1
+    EXTRACT_POOL_MIN_BATCH = 4
+    EXTRACT_TIMEOUT = 30  # Seconds before a single page's extraction is abandoned
+    
+    # Near-duplicate page suppression (SimHash over extracted text)
+    DEDUP_NEAR_DUPLICATES = True
+    SIMHASH_MAX_DISTANCE = 3  # Max differing bits (of 64) to treat two pages as duplicates
     
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 150
     
+    # Streaming ingestion pipeline (crawl → extract → chunk → embed run concurrently)
+    PIPELINE_BUFFER_SIZE = 16  # Max items waiting between two stages
+    EMBED_BATCH_SIZE = 64  # Chunks embedded and upserted per vector store call
+    
+    # Incremental re-indexing: only new/changed chunks are embedded, vanished ones are deleted
+    INDEX_INCREMENTAL = True
+    INDEX_MANIFEST_DIR = "index_manifests"
+    
     EMBEDDING_PROVIDER = "huggingface"
     EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
     
+    # ONNX Runtime provider (EMBEDDING_PROVIDER = "onnx"): same model, exported once and int8-quantized
+    ONNX_MODEL_DIR = "onnx_models"
+    ONNX_QUANTIZE = True
+    ONNX_BATCH_SIZE = 32  # Texts per inference call, grouped by length to minimize padding
+    ONNX_MAX_LENGTH = 256  # Token limit, matching the sentence-transformers model config
+    ONNX_INTRA_OP_THREADS = 0  # 0 lets ONNX Runtime use all physical cores
+    ONNX_INTER_OP_THREADS = 1
+    
+    # Opt-in multi-process embedding: large batches are sharded across worker processes pinned to cores
+    EMBEDDING_WORKERS = 0  # 0 or 1 disables; e.g. os.cpu_count() on dedicated indexing nodes
+    EMBEDDING_POOL_MIN_BATCH = 256  # Smaller batches are embedded in-process, so small sites never start the pool
+    EMBEDDING_PIN_WORKERS = True
+    
+    # Persistent embedding cache keyed by model + text hash, with LRU eviction
+    EMBEDDING_CACHE_ENABLED = True
+    EMBEDDING_CACHE_DIR = "embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES = 200000  # ~300 MB on disk for 384-dim vectors
+    
     RETRIEVAL_TOP_K = 4
     
+    # Hybrid retrieval: BM25 keyword index + vector search, fused with reciprocal rank fusion
+    HYBRID_RETRIEVAL = True
+    BM25_INDEX_DIR = "bm25_index"
+    HYBRID_CANDIDATES = 20  # Results taken from each of keyword and vector search before fusion
+    HYBRID_RRF_K = 60
+    HYBRID_EXACT_TERM_WEIGHT = 2.0  # Keyword rank weight when the query has a known code/version/identifier
+    
+    # Redundancy-aware context: MMR over the fused candidates, then adjacent-chunk merging and repeated-line trimming
+    CONTEXT_REDUCTION = True
+    MMR_FETCH_K = 12  # Candidates MMR chooses RETRIEVAL_TOP_K from
+    MMR_LAMBDA = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+    TRIM_MIN_LINE_CHARS = 30  # Shorter lines are never treated as repeats
+    
+    # Semantic answer cache, per site and index version; identical in-flight questions share one LLM call
+    ANSWER_CACHE_ENABLED = True
+    ANSWER_CACHE_THRESHOLD = 0.92  # Min cosine similarity between questions to reuse an answer
+    ANSWER_CACHE_TTL = 3600  # Seconds
+    ANSWER_CACHE_MAX_ENTRIES = 2000
+    ANSWER_CACHE_WAIT_TIMEOUT = 120  # Seconds to wait for an identical in-flight question before answering it separately
+    
+    # Prompt packing: token budget shared by retrieved context and chat history (template + question counted first)
+    PROMPT_TOKEN_BUDGET = 3000
+    PROMPT_HISTORY_SHARE = 0.25  # Max share of the remaining budget for history; unused history budget goes to context
+    HISTORY_VERBATIM_TURNS = 2  # Most recent messages kept as-is; older ones are cut to their first sentence
+    HISTORY_COMPRESSED_TOKENS = 40
+    TOKENIZER_ENCODING = "cl100k_base"  # tiktoken encoding used to count tokens
+    
     # LLM Config (Groq)
     GROQ_API_KEY = get_secret("GROQ_API_KEY")
     LLM_MODEL_NAME = "llama-3.3-70b-versatile"
-    LLM_BASE_URL = "https://api.groq.com/openai/v1"
+    LLM_BASE_URL = get_secret("LLM_BASE_URL", "https://api.groq.com")  # API root, the client appends /openai/v1; can point at any OpenAI-compatible server
     LLM_TEMPERATURE = 0
+    LLM_STREAMING = True  # Render answers token by token
+    LLM_MAX_CONNECTIONS = 20  # Keep-alive connections to the LLM endpoint, shared by all requests of the HTTP API
+    
+    # Background indexing jobs, shared by all sessions and the HTTP API
+    INDEX_JOB_WORKERS = 2  # Indexing runs at once; more jobs wait in the queue
+    INDEX_JOB_RETENTION = 3600  # Seconds a finished job's status stays available
+    INDEX_JOB_POLL_INTERVAL = 1.0  # Seconds between UI progress refreshes
+    
+    # Headless HTTP API (api.py)
+    API_HOST = get_secret("API_HOST", "127.0.0.1")
+    API_PORT = int(get_secret("API_PORT", "8000"))
+    API_TOKEN = get_secret("API_TOKEN")  # If set, requests need "Authorization: Bearer <token>"
+    API_ASK_CONCURRENCY = 16  # Questions answered at once, streams included
+    API_INDEX_CONCURRENCY = 4  # /index requests validated at once
+    API_MAX_ACTIVE_JOBS = 16  # Queued or running indexing jobs; further /index requests get 503
+    
+    # Instrumentation: timing spans and counters on the hot paths, exported as Prometheus text (api.py /metrics) and in the sidebar
+    METRICS_ENABLED = get_secret("METRICS_ENABLED", "false").lower() in ("1", "true")
+    METRICS_TRACEMALLOC = get_secret("METRICS_TRACEMALLOC", "false").lower() in ("1", "true")  # Top allocation sites per snapshot; slows allocation-heavy code
     
     # Pinecone/Vector Store Config
     PINECONE_API_KEY = get_secret("PINECONE_API_KEY")
@@ -50,10 +169,10 @@ class Config:
     def validate(cls):
         """Validate critical configuration."""
         if not cls.GROQ_API_KEY:
-             print("⚠️ WARNING: GROQ_API_KEY is missing. RAG features will fail.")
+             print("⚠️ WARNING: GROQ_API_KEY is missing. RAG features will fail.", file=sys.stderr)
         
         if cls.VECTOR_STORE_PROVIDER == "pinecone" and not cls.PINECONE_API_KEY:
-            print("⚠️ WARNING: PINECONE_API_KEY is missing but provider is set to 'pinecone'. RAG features will fail.")
+            print("⚠️ WARNING: PINECONE_API_KEY is missing but provider is set to 'pinecone'. RAG features will fail.", file=sys.stderr)
         pass
 
 # Validate on import
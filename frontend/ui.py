@@ -80,6 +80,15 @@ class UI:
             if st.button("Sign Out", type="secondary", use_container_width=True):
                 auth_handler.logout()
 
+    @staticmethod
+    def render_metrics(summary: dict, prometheus_text: str):
+        with st.sidebar:
+            with st.expander("📊 Metrics"):
+                for name, span in summary["spans"].items():
+                    st.caption(f"**{name}**: {span['count']} × {span['mean_ms']} ms (max {span['max_ms']} ms)")
+                st.json(summary, expanded=False)
+                st.download_button("Prometheus export", prometheus_text, file_name="metrics.prom", mime="text/plain", use_container_width=True)
+
     @staticmethod
     def render_header():
         st.markdown("# 🧠 Knowledge Agent")
@@ -112,6 +121,8 @@ class UI:
                         st.error(validation_result["error"])
                         return None
                     
+                    # Handed to the crawler so the start page isn't fetched twice
+                    st.session_state.prefetched_page = {"url": url, "page": validation_result.get("page")}
                     return url
             
             if st.session_state.get("indexed") and st.session_state.get("current_url"):
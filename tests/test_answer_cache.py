@@ -0,0 +1,113 @@
+import threading
+import pytest
+from backend.answer_cache import AnswerCache
+
+def test_hit_for_similar_question_in_same_scope_only():
+    cache = AnswerCache(threshold=0.9, ttl=60, max_entries=10)
+    cache.get_or_compute("site:1", "How do I install?", [1.0, 0.0], lambda: {"answer": "pip"})
+    assert cache.get_or_compute("site:1", "how do i install", [0.99, 0.05], lambda: {"answer": "other"}) == {"answer": "pip"}
+    assert cache.get_or_compute("site:2", "How do I install?", [1.0, 0.0], lambda: {"answer": "new"}) == {"answer": "new"}
+    assert cache.stats()["hits"] == 1
+
+def test_errors_are_not_cached():
+    cache = AnswerCache(threshold=0.9, ttl=60, max_entries=10)
+
+    def fail():
+        raise ValueError("LLM down")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("s", "q", [1.0], fail)
+    assert cache.get_or_compute("s", "q", [1.0], lambda: {"answer": "ok"}) == {"answer": "ok"}
+
+def test_concurrent_identical_questions_compute_once():
+    cache = AnswerCache(threshold=0.9, ttl=60, max_entries=10)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"answer": "once"}
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute("s", "q", [1.0], compute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get_or_compute("s", "q", [1.0], compute)))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+    assert len(calls) == 1
+    assert results == [{"answer": "once"}] * 2
+
+def test_abandoned_claim_releases_waiters():
+    cache = AnswerCache(threshold=0.9, ttl=60, max_entries=10, wait_timeout=0.1)
+    _, claim = cache.begin("s", "q", [1.0])
+    # The first caller never finishes; the next one answers without the cache
+    assert cache.begin("s", "q", [1.0]) == (None, None)
+    cache.finish(claim, error=RuntimeError("closed"))
+    cache.finish(claim, {"answer": "late"})
+    _, claim = cache.begin("s", "q", [1.0])
+    assert claim is not None
+
+def test_lru_bound():
+    cache = AnswerCache(threshold=0.99, ttl=60, max_entries=2)
+    for i, vector in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+        cache.get_or_compute("s", f"q{i}", vector, lambda i=i: {"answer": i})
+    assert cache.stats()["entries"] == 2
+    assert cache.get_or_compute("s", "q0", [1.0, 0.0, 0.0], lambda: {"answer": "recomputed"}) == {"answer": "recomputed"}
+
+def _waiter(cache):
+    """A second caller blocked on the in-flight question, and where its result goes."""
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(cache.begin("s", "q", [1.0])))
+    waiter.start()
+    while cache.stats()["coalesced"] == 0 and waiter.is_alive():
+        waiter.join(0.01)
+    return waiter, results
+
+@pytest.mark.parametrize("settle", [
+    lambda cache, claim: cache.release(claim),
+    # A stream closed by its client settles with GeneratorExit
+    lambda cache, claim: cache.finish(claim, error=GeneratorExit()),
+], ids=["release", "abandoned-stream"])
+def test_claim_given_up_without_an_answer(settle):
+    cache = AnswerCache(threshold=0.9, ttl=60, max_entries=10, wait_timeout=5)
+    _, claim = cache.begin("s", "q", [1.0])
+    waiter, results = _waiter(cache)
+    settle(cache, claim)
+    waiter.join()
+    # The waiter answers for itself instead of failing, nothing is cached, and the question can be claimed again
+    assert results == [(None, None)]
+    assert cache.begin("s", "q", [1.0])[1] is not None
+
+def test_qa_chain_embeds_the_question_once(tmp_path):
+    pytest.importorskip("langchain_groq")
+    pytest.importorskip("langchain")
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.language_models.fake import FakeListLLM
+    from backend.context_reducer import ContextReducer
+    from backend.numpy_store import NumpyVectorStore
+    from backend.qa_chain import QAChain
+    from backend.retriever import Retriever
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        queries: int = 0
+
+        def embed_query(self, text):
+            self.queries += 1
+            return super().embed_query(text)
+
+    embedding = CountingEmbedding(size=8)
+    store = NumpyVectorStore("qa", embedding, persist_directory=str(tmp_path))
+    store.add_documents([Document(page_content=f"Fact {i}.", metadata={"chunk_id": f"c{i}"}) for i in range(5)],
+                        ids=[f"c{i}" for i in range(5)])
+    retriever = Retriever(store, top_k=2, reducer=ContextReducer(embedding, vectorstore=store))
+    qa_chain = QAChain(retriever, answer_cache=AnswerCache(), cache_scope="site:1", llm=FakeListLLM(responses=["ok"] * 2))
+    result = qa_chain.answer("What is fact 1?")
+    assert len(result["sources"]) == 2, result["answer"]
+    # Answer-cache key, vector search and MMR share one embedding
+    assert embedding.queries == 1
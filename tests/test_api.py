@@ -0,0 +1,174 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import api
+from config import Config
+from backend.job_manager import JobManager
+from backend.validator import Validator
+
+class StubRegistry:
+    @staticmethod
+    def site_id_for(url):
+        return url.rstrip("/")
+
+    def get(self, site_id):
+        return None
+
+    def total_vectors(self):
+        return 42
+
+class StubIndexer:
+    def __init__(self):
+        self.registry = StubRegistry()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def run(self, url, limit, seed_page=None, force=False, stop_event=None):
+        yield {"stage": "crawl", "message": f"Fetched {url}", "url": url}
+        self.gate.wait(5)
+        yield {"stage": "done", "message": "Indexed.", "site_id": self.registry.site_id_for(url), "reused": False,
+               "chunks": 3, "pages": 1}
+
+class StubHttpClient:
+    def close(self):
+        pass
+
+def _service(indexer, max_active=4):
+    """ChatService without the embedding model and LLM client."""
+    service = api.ChatService.__new__(api.ChatService)
+    service.indexer, service.registry = indexer, indexer.registry
+    service.jobs = JobManager(indexer, workers=1, max_active=max_active)
+    service.answer_cache, service.llm, service.http_client = None, None, StubHttpClient()
+    service.ask_slots = asyncio.Semaphore(Config.API_ASK_CONCURRENCY)
+    service.ask_executor = ThreadPoolExecutor(2)
+    service.index_slots = asyncio.Semaphore(Config.API_INDEX_CONCURRENCY)
+    service.index_executor = ThreadPoolExecutor(2)
+    service._retrievers = {}
+    return service
+
+def _call(service, requests):
+    """Run `requests(client)` against the app with `service` in place of the real one."""
+    async def main():
+        app = api.create_app()
+        app.on_startup.clear()
+        app["service"] = service
+        async with TestClient(TestServer(app)) as client:
+            return await requests(client)
+    return asyncio.run(main())
+
+@pytest.fixture
+def indexer():
+    return StubIndexer()
+
+@pytest.fixture(autouse=True)
+def valid_urls(monkeypatch):
+    monkeypatch.setattr(Config, "API_TOKEN", None)
+    monkeypatch.setattr(Validator, "validate_gateway", staticmethod(lambda url: {"valid": True, "error": None, "page": None}))
+
+def test_max_pages_and_history_validation(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_PAGES_CRAWL", 50)
+    assert api._max_pages({}) == 50
+    assert api._max_pages({"max_pages": 10}) == 10
+    assert api._max_pages({"max_pages": 500}) == 50
+    for value in (0, -1, "10", True, 2.5):
+        with pytest.raises(web.HTTPBadRequest):
+            api._max_pages({"max_pages": value})
+
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    assert api._history({"history": history}) == history
+    assert api._history({}) == []
+    for value in ("hi", [{"role": "user"}], [{"role": "user", "content": 1}], [["user", "hi"]]):
+        with pytest.raises(web.HTTPBadRequest):
+            api._history({"history": value})
+
+def test_token_is_required_when_configured(indexer, monkeypatch):
+    monkeypatch.setattr(Config, "API_TOKEN", "s3cret")
+
+    async def requests(client):
+        return [
+            (await client.get("/health")).status,
+            (await client.get("/health", headers={"Authorization": "Bearer wrong"})).status,
+            (await client.get("/health", headers={"Authorization": "Bearer é"})).status,
+            await (await client.get("/health", headers={"Authorization": "Bearer s3cret"})).json(),
+        ]
+
+    assert _call(_service(indexer), requests) == [401, 401, 401, {"status": "ok", "vectors": 42}]
+
+def test_index_streams_progress_then_the_job(indexer):
+    async def requests(client):
+        response = await client.post("/index", json={"url": "https://a.example/", "max_pages": 5})
+        return response.status, [json.loads(line) for line in (await response.text()).splitlines()]
+
+    status, lines = _call(_service(indexer), requests)
+    assert status == 200
+    assert "job_id" in lines[0]
+    assert [line["stage"] for line in lines[1:-1]] == ["crawl", "done"]
+    assert lines[-1]["job"]["status"] == "succeeded"
+    assert lines[-1]["job"]["limit"] == 5
+
+def test_index_rejects_bad_input(indexer, monkeypatch):
+    async def requests(client):
+        return [
+            (await client.post("/index", data="not json")).status,
+            (await client.post("/index", json=["https://a.example/"])).status,
+            (await client.post("/index", json={"url": "ftp://a.example/"})).status,
+            (await client.post("/index", json={"url": "https://a.example/", "max_pages": 0})).status,
+        ]
+
+    assert _call(_service(indexer), requests) == [400, 400, 400, 400]
+    monkeypatch.setattr(Validator, "validate_gateway", staticmethod(lambda url: {"valid": False, "error": "Unreachable."}))
+    assert _call(_service(indexer), lambda client: client.post("/index", json={"url": "https://a.example/"})).status == 400
+
+def test_index_answers_503_once_the_job_queue_is_full(indexer):
+    indexer.gate.clear()
+
+    async def requests(client):
+        first = await client.post("/index", json={"url": "https://a.example/", "wait": False})
+        joined = await client.post("/index", json={"url": "https://a.example", "wait": False})
+        rejected = await client.post("/index", json={"url": "https://b.example/", "wait": False})
+        result = (first.status, (await first.json())["job_id"], (await joined.json())["job_id"],
+                  rejected.status, rejected.headers.get("Retry-After"))
+        indexer.gate.set()
+        return result
+
+    status, job_id, joined_id, rejected, retry_after = _call(_service(indexer, max_active=1), requests)
+    assert status == 202
+    assert joined_id == job_id
+    assert rejected == 503 and retry_after
+
+def test_jobs_endpoints(indexer):
+    indexer.gate.clear()
+
+    async def requests(client):
+        job_id = (await (await client.post("/index", json={"url": "https://a.example/", "wait": False})).json())["job_id"]
+        listed = await (await client.get("/jobs")).json()
+        status = await (await client.get(f"/jobs/{job_id}")).json()
+        cancelled = await (await client.delete(f"/jobs/{job_id}")).json()
+        missing = [(await client.get("/jobs/nope")).status, (await client.delete("/jobs/nope")).status]
+        indexer.gate.set()
+        return job_id, listed, status, cancelled, missing
+
+    job_id, listed, status, cancelled, missing = _call(_service(indexer), requests)
+    assert [job["job_id"] for job in listed["jobs"]] == [job_id]
+    assert status["url"] == "https://a.example/"
+    assert cancelled == {"job_id": job_id, "cancelled": True}
+    assert missing == [404, 404]
+
+def test_ask_validates_and_needs_an_indexed_site(indexer):
+    # The handler imports QAChain
+    pytest.importorskip("langchain_groq")
+    pytest.importorskip("langchain")
+
+    async def requests(client):
+        return [
+            (await client.post("/ask", json={"url": "https://a.example/"})).status,
+            (await client.post("/ask", json={"question": "What?"})).status,
+            (await client.post("/ask", json={"question": "What?", "url": "https://a.example/", "history": "x"})).status,
+            (await client.post("/ask", json={"question": "What?", "url": "https://a.example/"})).status,
+        ]
+
+    assert _call(_service(indexer), requests) == [400, 400, 400, 404]
@@ -0,0 +1,47 @@
+import pytest
+from langchain_core.documents import Document
+from config import Config
+from backend.bm25 import BM25Index, tokenize
+
+def _doc(chunk_id, text):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id, "source": f"https://example.com/{chunk_id}"})
+
+DOCS = [
+    _doc("a", "Install the package with pip and run the server."),
+    _doc("b", "Error ERR-404 means the page was not found."),
+    _doc("c", "Pricing plans start at ten dollars per month."),
+    _doc("a", "Duplicate chunk ID, ignored."),
+]
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "BM25_INDEX_DIR", str(tmp_path))
+
+def test_tokenize_keeps_compounds_and_parts():
+    assert tokenize("See api.get_user v2.3") == ["see", "api.get_user", "api", "get", "user", "v2.3", "v2", "3"]
+
+def test_build_search_and_document():
+    index = BM25Index.build(DOCS, "tst")
+    assert len(index) == 3
+    row, _ = index.search("ERR-404", k=2)[0]
+    assert index.document(row).metadata["chunk_id"] == "b"
+    assert index.search("nothing matches this", k=2) == []
+
+def test_load_returns_latest_build():
+    BM25Index.build(DOCS[:1], "tst")
+    old = BM25Index.load("tst")
+    BM25Index.build(DOCS, "tst")
+    assert len(BM25Index.load("tst")) == 3
+    # An index loaded before the rebuild still reads its own version
+    assert old.document(0).metadata["chunk_id"] == "a"
+    assert BM25Index.load("missing") is None
+
+def test_versions_older_than_the_previous_build_are_pruned():
+    BM25Index.build(DOCS[:1], "tst")
+    oldest = BM25Index.load("tst")
+    BM25Index.build(DOCS[:2], "tst")
+    BM25Index.build(DOCS, "tst")
+    with pytest.raises(OSError):
+        oldest.documents([0])
+    BM25Index.delete("tst")
+    assert BM25Index.load("tst") is None
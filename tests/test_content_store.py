@@ -0,0 +1,39 @@
+import pytest
+from langchain_core.documents import Document
+from backend.content_store import ContentStore, StoredList
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(root=str(tmp_path), max_disk_bytes=10 ** 9, memory_bytes=10 ** 6, session_memory_bytes=10 ** 5)
+
+def test_put_get_deduplicates(store):
+    digest, size = store.put({"url": "https://example.com", "html": "<p>hi</p>"})
+    assert store.put({"url": "https://example.com", "html": "<p>hi</p>"}) == (digest, size)
+    assert store.get(digest) == {"url": "https://example.com", "html": "<p>hi</p>"}
+    assert store.get("0" * 64) is None
+
+def test_stored_list_and_handle_round_trip(store):
+    chunks = StoredList(store, "chunks")
+    chunks.extend(Document(page_content=f"chunk {i}", metadata={"i": i}) for i in range(5))
+    assert [doc.page_content for doc in chunks] == [f"chunk {i}" for i in range(5)]
+
+    handle = chunks.handle("session-1")
+    assert len(handle) == 5
+    assert handle[3].metadata == {"i": 3}
+    assert store.stats()["sessions"] == 1
+    store.release("session-1")
+    assert store.stats()["cached_items"] == 0
+
+def test_eviction_skips_pinned_items(tmp_path):
+    store = ContentStore(root=str(tmp_path), max_disk_bytes=4000)
+    pinned = StoredList(store, "pages", pinned=True)
+    other = StoredList(store, "pages")
+    for i in range(100):
+        pinned.append({"url": f"https://example.com/pinned/{i}", "html": f"{i:x}" * 50})
+        other.append({"url": f"https://example.com/other/{i}", "html": f"{i:o}" * 50})
+    assert len(list(pinned)) == 100
+    assert len(list(other)) < 100
+
+    pinned.release()
+    store.evict_disk()
+    assert len(list(pinned)) < 100
@@ -0,0 +1,83 @@
+import random
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from config import Config
+from backend.context_reducer import ContextReducer
+
+# Random words, so unrelated chunks never share a long prefix/suffix by chance
+_rng = random.Random(0)
+PAGE = " ".join("".join(_rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(_rng.randint(2, 9))) for _ in range(200))
+
+class TableEmbeddings(Embeddings):
+    """Fixed vectors per text; unknown texts fail."""
+
+    def __init__(self, table):
+        self.table = table
+        self.queries = 0
+
+    def embed_documents(self, texts):
+        return [self.table[text] for text in texts]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return self.table[text]
+
+def _chunk(start, end, source="https://example.com/guide", start_index=None):
+    metadata = {"source": source, "start_index": start if start_index is None else start_index}
+    return Document(page_content=PAGE[start:end], metadata=metadata)
+
+@pytest.fixture(autouse=True)
+def overlap(monkeypatch):
+    monkeypatch.setattr(Config, "CHUNK_OVERLAP", 40)
+
+@pytest.fixture
+def reducer():
+    return ContextReducer(None, min_line_chars=10)
+
+def test_overlapping_chunks_merge_into_the_page_text(reducer):
+    merged = reducer.merge_adjacent([_chunk(200, 400), _chunk(0, 240)])
+    assert [doc.page_content for doc in merged] == [PAGE[0:400]]
+    # Keeps the position and metadata of the more relevant chunk
+    assert merged[0].metadata["start_index"] == 0
+
+def test_stale_offsets_fall_back_to_matching_the_overlap(reducer):
+    # Unchanged chunks keep their start_index when earlier text on the page changes
+    left, right = _chunk(0, 240, start_index=500), _chunk(200, 400, start_index=720)
+    assert reducer.merge_adjacent([left, right])[0].page_content == PAGE[0:400]
+    # Offsets that claim an overlap the text doesn't have are not trusted
+    left, right = _chunk(0, 240), _chunk(300, 500, start_index=230)
+    assert len(reducer.merge_adjacent([left, right])) == 2
+
+def test_other_pages_and_distant_chunks_stay_separate(reducer):
+    docs = [_chunk(0, 240), _chunk(200, 400, source="https://example.com/other"), _chunk(600, 800)]
+    assert len(reducer.merge_adjacent(docs)) == 3
+
+def test_repeated_lines_are_dropped(reducer):
+    docs = [
+        Document(page_content="Navigation: Home | Docs | Blog\nFirst page body text.", metadata={}),
+        Document(page_content="navigation:  home | docs | blog\nSecond page body.\nok", metadata={}),
+        Document(page_content="Navigation: Home | Docs | Blog", metadata={}),
+    ]
+    assert [doc.page_content for doc in reducer.trim_repeated_lines(docs)] == [
+        "Navigation: Home | Docs | Blog\nFirst page body text.", "Second page body.\nok"
+    ]
+
+def test_mmr_skips_near_duplicates():
+    table = {"q": [1.0, 0.0], "a": [1.0, 0.1], "a again": [1.0, 0.11], "b": [0.8, -0.6]}
+    embeddings = TableEmbeddings(table)
+    reducer = ContextReducer(embeddings, lambda_mult=0.5)
+    docs = [Document(page_content=text, metadata={}) for text in ("a", "a again", "b")]
+    picked = reducer.mmr("q", docs, 2)
+    assert [doc.page_content for doc in picked] == ["a", "b"]
+    assert embeddings.queries == 1
+    # A precomputed query vector is used as is
+    assert [doc.page_content for doc in reducer.mmr("unknown", docs, 2, query_vector=np.array([1.0, 0.0]))] == ["a", "b"]
+    assert embeddings.queries == 1
+
+def test_mmr_without_vectors_keeps_the_fused_order():
+    docs = [Document(page_content=text, metadata={}) for text in ("x", "y", "z")]
+    assert ContextReducer(None).mmr("q", docs, 2) == docs[:2]
+    # Embedding failures don't fail retrieval
+    assert ContextReducer(TableEmbeddings({})).mmr("q", docs, 2) == docs[:2]
@@ -0,0 +1,100 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from config import Config
+from backend.crawl_state import CrawlStateStore
+from backend.crawler import Crawler
+from backend.fetcher import HostLimiter
+
+PAGES = [f"/p{i}" for i in range(6)]
+
+class _Site(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.path == "/" or self.path in PAGES:
+            links = "".join(f'<a href="{path}">{path}</a>' for path in PAGES)
+            body = f"<html><head><title>{self.path}</title></head><body><p>Page {self.path}</p>{links}</body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+        else:
+            body = b"not found"
+            self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site_url():
+    _Site.requests.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    # CRAWL_STATE_PATH is relative
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "PAGE_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "CRAWL_USE_SITEMAPS", False)
+    monkeypatch.setattr(Config, "CRAWL_CHECKPOINT_INTERVAL", 1)
+
+def _crawler():
+    return Crawler(concurrency=1, limiter=HostLimiter(min_interval=0))
+
+def _interrupted_crawl(url: str, crawl_id: str, pages: int):
+    crawl = _crawler().iter_crawl(url, limit=10, crawl_id=crawl_id)
+    fetched = [next(crawl)["url"] for _ in range(pages)]
+    crawl.close()
+    return fetched
+
+def test_store_roundtrip_and_complete(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.db"))
+    store.start("c", "https://example.com/")
+    store.add_page("c", "https://example.com/", "<p>home</p>", ["https://example.com/"])
+    store.checkpoint("c", [("https://example.com/b", 2.0), ("https://example.com/a", 1.0)], {"https://example.com/a"})
+    saved = store.load("c")
+    assert saved["pages"] == [{"url": "https://example.com/", "html": "<p>home</p>"}]
+    assert saved["fetched_keys"] == {"https://example.com/"}
+    assert saved["frontier"] == [("https://example.com/b", 2.0), ("https://example.com/a", 1.0)]
+    assert store.resumable("c")
+    store.complete("c")
+    assert not store.resumable("c")
+    assert store.load("c")["pages"] == []
+    store.close()
+
+def test_stale_checkpoint_is_not_resumable(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.db"))
+    store.start("c", "https://example.com/")
+    assert store.resumable("c", max_age=60)
+    store.conn.execute("UPDATE crawls SET updated_at = ?", (time.time() - 120,))
+    store.conn.commit()
+    assert not store.resumable("c", max_age=60)
+    store.close()
+
+def test_interrupted_crawl_resumes_without_refetching(site_url):
+    first = _interrupted_crawl(site_url, "site", 3)
+    _Site.requests.clear()
+    resumed = [page["url"] for page in _crawler().iter_crawl(site_url, limit=10, crawl_id="site")]
+    # Pages from the first run come back from the checkpoint, then the crawl carries on
+    assert resumed[:3] == first
+    assert len(resumed) == len(set(resumed)) == 1 + len(PAGES)
+    assert "/" not in _Site.requests
+    assert not CrawlStateStore().resumable("site")
+
+def test_old_checkpoint_starts_over(site_url):
+    _interrupted_crawl(site_url, "site", 3)
+    state = CrawlStateStore()
+    state.conn.execute("UPDATE crawls SET updated_at = 0")
+    state.conn.commit()
+    state.close()
+    _Site.requests.clear()
+    pages = [page["url"] for page in _crawler().iter_crawl(site_url, limit=10, crawl_id="site")]
+    assert pages[0] == site_url
+    assert "/" in _Site.requests
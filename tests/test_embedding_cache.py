@@ -0,0 +1,90 @@
+import multiprocessing
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from backend.embedding_cache import CachedEmbeddings, EmbeddingStore
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    @staticmethod
+    def _vector(text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self._vector(text)
+
+def _cached(tmp_path, base, model="model-a", max_entries=100):
+    return CachedEmbeddings(base, model, cache_dir=str(tmp_path), max_entries=max_entries)
+
+def test_repeated_texts_are_embedded_once_and_persist(tmp_path):
+    base = CountingEmbeddings()
+    first = _cached(tmp_path, base)
+    vectors = first.embed_documents(["alpha", "beta", "alpha"])
+    assert base.documents == ["alpha", "beta"]
+    assert vectors[0] == vectors[2] == CountingEmbeddings._vector("alpha")
+    assert first.stats()["misses"] == 3
+
+    # A new instance (another session or process) reads the same files
+    second = _cached(tmp_path, base)
+    assert second.embed_documents(["beta", "gamma"]) == [CountingEmbeddings._vector(t) for t in ("beta", "gamma")]
+    assert base.documents == ["alpha", "beta", "gamma"]
+    assert second.stats()["hits"] == 1
+
+def test_models_do_not_share_entries(tmp_path):
+    base = CountingEmbeddings()
+    _cached(tmp_path, base, "model-a").embed_documents(["alpha"])
+    _cached(tmp_path, base, "model-b").embed_documents(["alpha"])
+    assert base.documents == ["alpha", "alpha"]
+
+def test_queries_bypass_the_cache(tmp_path):
+    base = CountingEmbeddings()
+    cached = _cached(tmp_path, base)
+    cached.embed_query("what is alpha?")
+    cached.embed_query("what is alpha?")
+    assert base.queries == ["what is alpha?"] * 2
+    assert cached.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    base = CountingEmbeddings()
+    cached = _cached(tmp_path, base, max_entries=2)
+    cached.embed_documents(["a", "bb"])
+    cached.embed_documents(["a"])
+    cached.embed_documents(["ccc"])
+    assert cached.stats()["entries"] == 2
+    base.documents.clear()
+    cached.embed_documents(["a", "bb", "ccc"])
+    assert base.documents == ["bb"]
+
+def _put(directory, worker, count, capacity):
+    store = EmbeddingStore(directory, capacity)
+    for i in range(count):
+        store.put_many({f"{worker}-{i}": [float(worker), float(i)]})
+
+def test_processes_never_share_a_slot(tmp_path):
+    directory, capacity, count = str(tmp_path / "shared"), 64, 20
+    EmbeddingStore(directory, capacity).put_many({"seed": [-1.0, -1.0]})
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_put, args=(directory, worker, count, capacity)) for worker in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = EmbeddingStore(directory, capacity)
+    rows = store.conn.execute("SELECT key, slot FROM entries").fetchall()
+    assert len(rows) == 1 + 3 * count
+    assert len({slot for _, slot in rows}) == len(rows)
+    found = store.get_many([key for key, _ in rows])
+    for key, vector in found.items():
+        if key != "seed":
+            worker, i = key.split("-")
+            assert np.array_equal(vector, [float(worker), float(i)])
@@ -0,0 +1,85 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend.fetcher import Fetcher, detect_encoding
+
+CAP = 1000
+# "é" is two bytes in UTF-8; the cap falls between the two bytes of the 17th
+UTF8_PAGE = ("<html><body>" + "a" * (CAP - 45) + "é" * 50 + "</body></html>").encode("utf-8")
+
+class _Site(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content_type, body, declare_length = "text/html", b"<html><body>ok</body></html>", True
+        if self.path == "/declared-large":
+            body = b"x" * (CAP * 2)
+        elif self.path == "/undeclared-large":
+            body, declare_length = b"<p>" + b"y" * (CAP * 2), False
+        elif self.path == "/utf8":
+            body, declare_length = UTF8_PAGE, False
+        elif self.path == "/image":
+            content_type = "image/png"
+        self.send_response(404 if self.path == "/missing" else 200)
+        self.send_header("Content-Type", content_type)
+        if declare_length:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.fixture
+def fetcher():
+    return Fetcher(max_bytes=CAP)
+
+def test_small_page(fetcher, base_url):
+    page = fetcher.fetch(f"{base_url}/")
+    assert page["status"] == 200
+    assert page["html"] == "<html><body>ok</body></html>"
+
+def test_declared_oversize_page_is_skipped(fetcher, base_url):
+    assert fetcher.fetch(f"{base_url}/declared-large")["html"] is None
+
+def test_undeclared_oversize_page_is_truncated(fetcher, base_url):
+    html = fetcher.fetch(f"{base_url}/undeclared-large")["html"]
+    assert len(html) == CAP
+    assert html.startswith("<p>yyy")
+
+def test_truncated_utf8_is_still_detected_as_utf8(fetcher, base_url):
+    html = fetcher.fetch(f"{base_url}/utf8")["html"]
+    assert html.endswith("a" + "é" * 16 + "\ufffd")
+    assert "Ã" not in html
+
+def test_error_and_non_html_responses_have_no_body(fetcher, base_url):
+    assert fetcher.fetch(f"{base_url}/missing") == {
+        "status": 404, "url": f"{base_url}/missing", "content_type": "text/html", "html": None
+    }
+    assert fetcher.fetch(f"{base_url}/image")["html"] is None
+
+def test_fetch_raw_is_capped(fetcher, base_url):
+    status, body = fetcher.fetch_raw(f"{base_url}/undeclared-large")
+    assert status == 200 and len(body) == CAP
+    assert fetcher.fetch_raw(f"{base_url}/missing") == (404, b"")
+
+def test_detect_encoding_order():
+    assert detect_encoding(b"\xef\xbb\xbf<p>hi</p>") == "utf-8-sig"
+    assert detect_encoding(b"<p>hi</p>", "text/html; charset=ISO-8859-1") == "iso8859-1"
+    assert detect_encoding(b'<meta charset="windows-1252"><p>hi</p>') == "cp1252"
+    # Cut in the middle of a multi-byte character
+    assert detect_encoding("é".encode("utf-8") * 3 + b"\xc3") == "utf-8"
+
+def test_validation_returns_the_page_for_the_crawler(base_url, monkeypatch):
+    from config import Config
+    from backend.validator import Validator
+    monkeypatch.setattr(Config, "PAGE_CACHE_ENABLED", False)
+    result = Validator.validate_gateway(f"{base_url}/")
+    assert result["valid"]
+    assert result["page"]["html"] == "<html><body>ok</body></html>"
+    assert not Validator.validate_gateway(f"{base_url}/image")["valid"]
@@ -0,0 +1,71 @@
+import gzip
+from backend.frontier import Frontier, RobotsPolicy, parse_sitemap, score_url
+
+ROBOTS = """User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+Sitemap: https://example.com/sitemap_index.xml
+"""
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/docs/start</loc><priority>0.9</priority><lastmod>2026-01-02</lastmod></url>
+  <url><loc>https://example.com/about</loc><priority>oops</priority></url>
+  <url><priority>0.5</priority></url>
+</urlset>"""
+
+SITEMAP_INDEX = b"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-docs.xml</loc></sitemap>
+</sitemapindex>"""
+
+def test_robots_rules_delay_and_sitemaps():
+    robots = RobotsPolicy(ROBOTS)
+    assert robots.allowed("https://example.com/docs/")
+    assert not robots.allowed("https://example.com/private/page")
+    assert robots.crawl_delay() == 2.0
+    assert robots.sitemaps() == ["https://example.com/sitemap_index.xml"]
+
+def test_missing_robots_allows_everything():
+    robots = RobotsPolicy(None)
+    assert robots.allowed("https://example.com/private/page")
+    assert robots.crawl_delay() is None
+    assert robots.sitemaps() == []
+
+def test_parse_sitemap_entries():
+    entries, children = parse_sitemap(SITEMAP)
+    assert children == []
+    assert [entry["url"] for entry in entries] == ["https://example.com/docs/start", "https://example.com/about"]
+    assert entries[0]["priority"] == 0.9
+    assert entries[0]["lastmod"].year == 2026
+    assert entries[1]["priority"] is None and entries[1]["lastmod"] is None
+
+def test_parse_gzipped_sitemap_index():
+    entries, children = parse_sitemap(gzip.compress(SITEMAP_INDEX))
+    assert entries == []
+    assert children == ["https://example.com/sitemap-docs.xml"]
+
+def test_scores_prefer_content_over_low_value_pages():
+    assert score_url("https://example.com/docs/install") > score_url("https://example.com/blog/2020/05/post")
+    assert score_url("https://example.com/login") < score_url("https://example.com/pricing")
+    assert score_url("https://example.com/a", sitemap_priority=1.0) > score_url("https://example.com/a")
+
+def test_frontier_orders_dedups_and_filters():
+    frontier = Frontier(RobotsPolicy(ROBOTS))
+    assert frontier.push("https://example.com/about", score=1.0)
+    assert frontier.push("https://example.com/docs", score=2.0)
+    assert frontier.push("https://example.com/team", score=1.0)
+    assert not frontier.push("https://example.com/docs/#intro")
+    assert not frontier.push("https://example.com/private/page")
+    assert not frontier.push("https://example.com/report.pdf")
+    assert [frontier.pop() for _ in range(len(frontier))] == [
+        "https://example.com/docs", "https://example.com/about", "https://example.com/team"
+    ]
+
+def test_restore_skips_fetched_urls():
+    frontier = Frontier()
+    frontier.push("https://example.com/a", score=1.0)
+    frontier.push("https://example.com/b", score=3.0)
+    restored = Frontier()
+    restored.restore(frontier.entries(), frontier.seen, exclude={"https://example.com/b"})
+    assert restored.entries() == [("https://example.com/a", 1.0)]
+    assert not restored.push("https://example.com/b")
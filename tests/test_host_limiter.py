@@ -0,0 +1,50 @@
+import threading
+import time
+from backend.fetcher import HostLimiter
+
+def test_caps_concurrent_requests_per_host():
+    limiter = HostLimiter(max_concurrency=2, min_interval=0)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def request():
+        with limiter.acquire("example.com"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+def test_spaces_request_starts_per_host():
+    limiter = HostLimiter(max_concurrency=4, min_interval=0.05)
+    limiter.set_min_interval("slow.example", 0.1)
+    starts = {"example.com": [], "slow.example": []}
+    for host in starts:
+        for _ in range(3):
+            with limiter.acquire(host):
+                starts[host].append(time.monotonic())
+    gaps = {host: [b - a for a, b in zip(times, times[1:])] for host, times in starts.items()}
+    assert min(gaps["example.com"]) >= 0.04
+    assert min(gaps["slow.example"]) >= 0.09
+
+def test_hosts_do_not_share_slots():
+    limiter = HostLimiter(max_concurrency=1, min_interval=0)
+    with limiter.acquire("a.example"):
+        entered = threading.Event()
+
+        def other_host():
+            with limiter.acquire("b.example"):
+                entered.set()
+
+        thread = threading.Thread(target=other_host)
+        thread.start()
+        assert entered.wait(1)
+        thread.join()
@@ -0,0 +1,75 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from config import Config
+from backend.chunker import Chunker
+from backend.vectorstore import VectorStore
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_STORE_PROVIDER", "numpy")
+
+@pytest.fixture
+def embedding():
+    return CountingEmbedding(size=8, embedded=[])
+
+def _doc(url: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"source": url, "chunk_id": Chunker.chunk_id(url, text)})
+
+def _sync(store: VectorStore, embedding, docs):
+    """One incremental indexing run, as the pipeline's embed stage does it."""
+    vectorstore = store.open_collection(embedding, reset=False)
+    manifest, seen = store.load_manifest(), set()
+    added = store.upsert_new(vectorstore, docs, manifest, seen)
+    deleted = store.delete_stale(vectorstore, manifest, seen)
+    store.save_manifest(manifest)
+    return vectorstore, added, deleted
+
+def test_chunk_ids_depend_on_url_and_content():
+    assert Chunker.chunk_id("https://a/", "text") == Chunker.chunk_id("https://a/", "text")
+    assert Chunker.chunk_id("https://a/", "text") != Chunker.chunk_id("https://b/", "text")
+    assert Chunker.chunk_id("https://a/", "text") != Chunker.chunk_id("https://a/", "text!")
+
+def test_reindex_embeds_only_new_chunks_and_drops_removed_ones(embedding):
+    store = VectorStore("incremental")
+    first = [_doc("https://a/", "alpha"), _doc("https://a/", "beta"), _doc("https://b/", "gamma")]
+    vectorstore, added, deleted = _sync(store, embedding, first)
+    assert (added, deleted) == (3, 0)
+
+    embedding.embedded.clear()
+    second = [first[0], first[2], _doc("https://b/", "gamma, edited")]
+    vectorstore, added, deleted = _sync(store, embedding, second)
+    assert (added, deleted) == (1, 1)
+    assert embedding.embedded == ["gamma, edited"]
+    assert set(vectorstore.ids()) == {doc.metadata["chunk_id"] for doc in second}
+    assert store.load_manifest() == {doc.metadata["chunk_id"]: doc.metadata["source"] for doc in second}
+
+def test_duplicates_within_a_run_are_embedded_once(embedding):
+    store = VectorStore("duplicates")
+    doc = _doc("https://a/", "same")
+    _, added, _ = _sync(store, embedding, [doc, doc])
+    assert added == 1
+    assert embedding.embedded == ["same"]
+
+def test_manifest_follows_the_store(embedding):
+    store = VectorStore("manifest")
+    _sync(store, embedding, [_doc("https://a/", "alpha")])
+    # A manifest entry the store doesn't have is dropped; a stored ID the manifest lost is kept
+    store.save_manifest({"ghost": "https://gone/"})
+    assert list(store.load_manifest()) == [Chunker.chunk_id("https://a/", "alpha")]
+    assert VectorStore("never_indexed").load_manifest() == {}
+
+def test_reset_drops_vectors_and_manifest(embedding):
+    store = VectorStore("reset")
+    _sync(store, embedding, [_doc("https://a/", "alpha")])
+    store.delete_collection()
+    assert store.count() == 0
+    assert store.load_manifest() == {}
@@ -0,0 +1,103 @@
+import threading
+import time
+import pytest
+from backend.job_manager import JobManager
+from backend.pipeline import IndexingCancelled
+
+class StubRegistry:
+    @staticmethod
+    def site_id_for(url):
+        return url.rstrip("/")
+
+class StubIndexer:
+    """Emits two crawl pages and a done event; `gate` holds a run until it is set."""
+
+    def __init__(self, fail=False):
+        self.registry = StubRegistry()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Event()
+        self.fail = fail
+        self.runs = []
+
+    def run(self, url, limit, seed_page=None, force=False, stop_event=None):
+        self.runs.append(url)
+        self.started.set()
+        yield {"stage": "crawl", "message": f"Fetched {url}a"}
+        while not self.gate.wait(0.01):
+            if stop_event.is_set():
+                raise IndexingCancelled(f"Indexing of {url} was cancelled.")
+        yield {"stage": "crawl", "message": f"Fetched {url}b"}
+        if self.fail:
+            raise RuntimeError("embedding model missing")
+        yield {"stage": "crawl", "message": "Found 2 pages.", "done": True, "count": 2}
+        yield {"stage": "done", "message": "Indexed.", "site_id": self.registry.site_id_for(url), "reused": False,
+               "chunks": 7, "pages": 2, "pipeline": object(), "vectorstore": object()}
+
+def _wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.finished_at is None and time.time() < deadline:
+        time.sleep(0.01)
+    return job.snapshot()
+
+@pytest.fixture
+def indexer():
+    return StubIndexer()
+
+@pytest.fixture
+def jobs(indexer):
+    manager = JobManager(indexer, workers=1)
+    yield manager
+    indexer.gate.set()
+    manager.shutdown()
+
+def test_job_reports_progress_and_result(jobs):
+    job = jobs.submit("https://a.example/", 10)
+    snapshot = _wait(job)
+    assert snapshot["status"] == "succeeded"
+    assert snapshot["progress"]["crawl"] == {"count": 2, "done": True, "message": "Found 2 pages."}
+    assert snapshot["result"] == {"site_id": "https://a.example", "reused": False, "chunks": 7, "pages": 2}
+    # In-process objects stay out of the public events
+    assert "vectorstore" not in job.events[-1] and "pipeline" not in job.events[-1]
+    assert job.pipeline is not None
+    assert [event["message"] for event in job.events_since(3)] == ["Indexed."]
+    assert jobs.get(job.job_id) is job
+    assert [item["job_id"] for item in jobs.list_jobs()] == [job.job_id]
+
+def test_second_submit_for_a_site_joins_the_running_job(jobs, indexer):
+    indexer.gate.clear()
+    first = jobs.submit("https://a.example/", 10)
+    assert jobs.submit("https://a.example", 10) is first
+    indexer.gate.set()
+    _wait(first)
+    assert indexer.runs == ["https://a.example/"]
+    assert jobs.submit("https://a.example/", 10) is not first
+
+def test_cancel_running_and_queued_jobs(jobs, indexer):
+    indexer.gate.clear()
+    running = jobs.submit("https://a.example/", 10)
+    queued = jobs.submit("https://b.example/", 10)
+    assert indexer.started.wait(5)
+    assert jobs.cancel(queued.job_id)
+    assert queued.status == "cancelled"
+    assert jobs.cancel(running.job_id)
+    assert _wait(running)["status"] == "cancelled"
+    assert not jobs.cancel(running.job_id)
+    assert not jobs.cancel("unknown")
+    time.sleep(0.05)
+    assert indexer.runs == ["https://a.example/"]
+
+def test_failure_is_reported():
+    manager = JobManager(StubIndexer(fail=True), workers=1)
+    snapshot = _wait(manager.submit("https://a.example/", 10))
+    manager.shutdown()
+    assert snapshot["status"] == "failed"
+    assert snapshot["error"] == "embedding model missing"
+
+def test_finished_jobs_expire(indexer):
+    manager = JobManager(indexer, workers=1, retention=0)
+    job = manager.submit("https://a.example/", 10)
+    _wait(job)
+    manager.submit("https://b.example/", 10)
+    assert manager.get(job.job_id) is None
+    manager.shutdown()
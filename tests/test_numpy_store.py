@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pytest
+from backend import numpy_store
+from backend.numpy_store import NumpyVectorStore
+
+def _unit(i, dim=4):
+    vector = [0.0] * dim
+    vector[i % dim] = 1.0
+    return vector
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path)
+
+def _add(store, ids, dim=4):
+    store.add_embeddings([f"text {i}" for i in ids], [_unit(i, dim) for i in ids],
+                         [{"n": i} for i in ids], ids=[f"c{i}" for i in ids])
+
+def test_search_returns_closest_rows_with_records(directory):
+    store = NumpyVectorStore("col", persist_directory=directory)
+    _add(store, range(4))
+    results = store.similarity_search_with_score_by_vector([0.1, 0.9, 0.0, 0.0], k=2)
+    assert [doc.id for doc, _ in results] == ["c1", "c0"]
+    assert results[0][0].page_content == "text 1" and results[0][0].metadata == {"n": 1}
+    assert results[0][1] == pytest.approx(0.9 / np.hypot(0.1, 0.9))
+    assert np.allclose(store.get_vectors(["c2"]), [_unit(2)])
+
+def test_readding_an_id_replaces_it_and_delete_hides_it(directory):
+    store = NumpyVectorStore("col", persist_directory=directory)
+    _add(store, range(4))
+    store.add_embeddings(["new text"], [_unit(3)], [{}], ids=["c0"])
+    assert len(store) == 4
+    assert store.similarity_search_by_vector(_unit(0), k=1)[0].id != "c0"
+    store.delete(ids=["c1", "missing"])
+    assert sorted(store.ids()) == ["c0", "c2", "c3"]
+    assert "c1" not in [doc.id for doc in store.similarity_search_by_vector(_unit(1), k=4)]
+
+def test_reopened_store_reads_the_files(directory):
+    store = NumpyVectorStore("col", persist_directory=directory, dtype="float16")
+    _add(store, range(4))
+    store.delete(ids=["c2"])
+    reopened = NumpyVectorStore("col", persist_directory=directory)
+    assert sorted(reopened.ids()) == ["c0", "c1", "c3"]
+    assert reopened.dtype == np.float16
+    assert reopened.similarity_search_by_vector(_unit(3), k=1)[0].page_content == "text 3"
+
+def test_dimension_mismatch_is_rejected(directory):
+    store = NumpyVectorStore("col", persist_directory=directory)
+    _add(store, range(2))
+    with pytest.raises(ValueError):
+        store.add_embeddings(["x"], [[1.0, 0.0]], ids=["x"])
+
+def test_compaction_drops_dead_rows_and_old_generations(directory, monkeypatch):
+    monkeypatch.setattr(numpy_store, "_COMPACT_MIN_ROWS", 4)
+    store = NumpyVectorStore("col", persist_directory=directory)
+    _add(store, range(8))
+    store.delete(ids=["c0", "c1", "c2"])
+    assert store.generation == 1
+    assert store.count == len(store) == 5
+    store.delete(ids=["c3", "c4"])
+    assert store.generation == 2
+    files = os.listdir(os.path.join(directory, "col"))
+    # Generation 1 stays for searches that started before the switch; generation 0 is gone
+    assert "vectors.1.dat" in files and "vectors.dat" not in files
+
+    reopened = NumpyVectorStore("col", persist_directory=directory)
+    assert sorted(reopened.ids()) == ["c5", "c6", "c7"]
+    assert reopened.similarity_search_by_vector(_unit(6), k=1)[0].id == "c6"
+
+def test_exists_open_and_drop(directory):
+    assert not NumpyVectorStore.exists("col", directory)
+    assert not os.path.exists(os.path.join(directory, "col"))
+    store = NumpyVectorStore.open("col", persist_directory=directory)
+    assert NumpyVectorStore.open("col", persist_directory=directory) is store
+    _add(store, range(2))
+    assert NumpyVectorStore.exists("col", directory)
+    NumpyVectorStore.drop("col", directory)
+    assert not NumpyVectorStore.exists("col", directory)
+    assert len(store) == 0
@@ -0,0 +1,67 @@
+import threading
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from config import Config
+from benchmarks.synthetic_site import SyntheticSite
+from backend.crawler import Crawler
+from backend.fetcher import HostLimiter
+from backend.pipeline import IngestionPipeline, IndexingCancelled
+from backend.vectorstore import VectorStore
+
+PAGES = 8
+
+@pytest.fixture(scope="module")
+def site_url():
+    server = SyntheticSite(pages=PAGES, page_bytes=4096, seed=1).serve()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    # Every data path is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_STORE_PROVIDER", "numpy")
+    monkeypatch.setattr(Config, "PAGE_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "CRAWL_STATE_ENABLED", False)
+
+def _pipeline(**kwargs) -> IngestionPipeline:
+    crawler = Crawler(limiter=HostLimiter(min_interval=0))
+    return IngestionPipeline(DeterministicFakeEmbedding(size=16), VectorStore("pipeline_test"), crawler=crawler,
+                             buffer_size=2, embed_batch_size=4, **kwargs)
+
+def test_run_streams_every_stage_and_stores_all_chunks(site_url):
+    pipeline = _pipeline()
+    events = list(pipeline.run(site_url, PAGES))
+    stages = [event["stage"] for event in events]
+    done = events[-1]
+
+    assert stages[-1] == "done"
+    assert {"crawl", "extract", "chunk", "embed", "index"} <= set(stages)
+    # Per-page progress arrives before the crawl finishes
+    assert stages.index("crawl") < stages.index("extract")
+    assert done["pages"] == PAGES
+    assert done["chunks"] == len(pipeline.chunks) > 0
+    assert len(done["vectorstore"]) == done["chunks"]
+    assert len(done["lexical_index"]) == done["chunks"]
+    finished = {event["stage"]: event["count"] for event in events if event.get("done")}
+    assert finished["embed"] == done["chunks"]
+
+def test_stop_event_cancels_the_run(site_url):
+    stop = threading.Event()
+    run = _pipeline(stop_event=stop).run(site_url, PAGES)
+    next(run)
+    stop.set()
+    with pytest.raises(IndexingCancelled):
+        list(run)
+
+def test_stage_failure_is_raised(site_url):
+    pipeline = _pipeline()
+
+    def broken(text, url, title):
+        raise ValueError("chunker broke")
+
+    pipeline.chunker.chunk = broken
+    with pytest.raises(RuntimeError, match="chunker broke"):
+        list(pipeline.run(site_url, PAGES))
+    # Nothing was written, so a previous index would be left alone
+    assert pipeline.vectorstore is None
@@ -0,0 +1,36 @@
+from langchain_core.documents import Document
+from backend.prompt_packer import PromptPacker, count_tokens, truncate_sentences
+
+TEMPLATE = "Context:\n{context}\n\nHistory:\n{chat_history}\n\nQuestion: {question}\nAnswer:"
+
+def _docs(n, sentences=30):
+    text = " ".join(f"Sentence {i} describes part of the product in some detail." for i in range(sentences))
+    return [Document(page_content=text, metadata={"rank": i}) for i in range(n)]
+
+def test_truncate_sentences_keeps_whole_sentences():
+    text = "First sentence here. Second sentence here. Third sentence here."
+    short = truncate_sentences(text, count_tokens("First sentence here.") + 2)
+    assert short == "First sentence here."
+    assert truncate_sentences(text, 1000) == text
+
+def test_context_fits_budget_in_rank_order():
+    packer = PromptPacker(budget=600, history_share=0.25)
+    docs, history = packer.pack(TEMPLATE, "What does it do?", _docs(10))
+    assert history == ""
+    assert 0 < len(docs) < 10
+    assert [doc.metadata["rank"] for doc in docs] == list(range(len(docs)))
+    used = sum(count_tokens(doc.page_content) + 2 for doc in docs)
+    assert used + count_tokens(TEMPLATE) + count_tokens("What does it do?") <= 600
+
+def test_history_keeps_recent_turns_verbatim_and_shares_budget():
+    packer = PromptPacker(budget=800, history_share=0.25, verbatim_turns=2, compressed_tokens=10)
+    history = [{"role": "user" if i % 2 == 0 else "assistant",
+                "content": f"Message {i}. " + "More words follow here. " * 20} for i in range(12)]
+    docs, history_text = packer.pack(TEMPLATE, "And then?", _docs(10), history)
+    lines = history_text.splitlines()
+    assert lines[-1].startswith("AI: Message 11.")
+    assert "Message 0." not in history_text
+    assert len(lines) < len(history)
+    fixed = count_tokens(TEMPLATE) + count_tokens("And then?")
+    assert count_tokens(history_text) <= (800 - fixed) * 0.25 + len(lines)
+    assert docs
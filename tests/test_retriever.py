@@ -0,0 +1,61 @@
+import pytest
+from langchain_core.documents import Document
+from config import Config
+from backend.bm25 import BM25Index
+from backend.retriever import Retriever
+
+def _doc(chunk_id, text):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id, "source": f"https://example.com/{chunk_id}"})
+
+DOCS = [
+    _doc("install", "Install the package with pip and start the server."),
+    _doc("errors", "Error ERR-404 means the page was not found."),
+    _doc("pricing", "Pricing plans start at ten dollars per month."),
+    _doc("setup", "Setting up: configure the server and restart it."),
+]
+
+class FakeVectorStore:
+    """Returns a fixed ranking, recording how it was queried."""
+
+    def __init__(self, ranking):
+        self.ranking = [doc for chunk_id in ranking for doc in DOCS if doc.metadata["chunk_id"] == chunk_id]
+        self.calls = []
+
+    def similarity_search(self, query, k):
+        self.calls.append(("text", query))
+        return self.ranking[:k]
+
+    def similarity_search_by_vector(self, embedding, k):
+        self.calls.append(("vector", embedding))
+        return self.ranking[:k]
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "BM25_INDEX_DIR", str(tmp_path))
+
+def _ids(docs):
+    return [doc.metadata["chunk_id"] for doc in docs]
+
+def test_without_keyword_index_it_is_vector_search():
+    retriever = Retriever(FakeVectorStore(["setup", "install", "pricing"]), top_k=2)
+    assert _ids(retriever.invoke("how do I install?")) == ["setup", "install"]
+    assert retriever.invoke("") == []
+
+def test_exact_terms_pull_keyword_hits_to_the_top():
+    lexical = BM25Index.build(DOCS, "tst")
+    retriever = Retriever(FakeVectorStore(["setup", "install", "pricing", "errors"]), lexical, top_k=2)
+    assert _ids(retriever.invoke("what does ERR-404 mean"))[0] == "errors"
+    # Found by both searches, so it outranks the vector-only top hit
+    assert _ids(retriever.invoke("install with pip")) == ["install", "setup"]
+
+def test_outdated_keyword_index_falls_back_to_vector_search():
+    lexical = BM25Index.build(DOCS[:2], "tst")
+    BM25Index.build(DOCS, "tst")
+    BM25Index.build(DOCS[1:], "tst")
+    retriever = Retriever(FakeVectorStore(["pricing", "setup"]), lexical, top_k=2)
+    assert _ids(retriever.invoke("ERR-404 install")) == ["pricing", "setup"]
+
+def test_a_given_query_vector_is_used_for_vector_search():
+    store = FakeVectorStore(["pricing"])
+    Retriever(store, top_k=1).invoke("price", query_vector=[0.5, 0.5])
+    assert store.calls == [("vector", [0.5, 0.5])]
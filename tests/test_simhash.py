@@ -0,0 +1,23 @@
+from backend.simhash import NearDuplicateIndex, hamming_distance, simhash
+
+TEXT = " ".join(f"The quick brown fox number {i} jumps over the lazy dog." for i in range(40))
+
+def test_identical_text_same_fingerprint():
+    assert simhash(TEXT) == simhash(TEXT.upper())
+
+def test_small_edit_is_near_and_other_text_is_far():
+    edited = TEXT.replace("number 7 ", "number seven ")
+    other = " ".join(f"Completely different content about item {i} and its price." for i in range(40))
+    assert hamming_distance(simhash(TEXT), simhash(edited)) <= 3
+    assert hamming_distance(simhash(TEXT), simhash(other)) > 3
+
+def test_empty_text():
+    assert simhash("") == 0
+
+def test_index_rejects_near_duplicates():
+    index = NearDuplicateIndex(max_distance=3)
+    fingerprint = simhash(TEXT)
+    assert index.add_if_new(fingerprint)
+    assert not index.add_if_new(fingerprint ^ 0b101)
+    assert index.find(fingerprint ^ 0b1111) is None
+    assert index.add_if_new(~fingerprint & (2 ** 64 - 1))
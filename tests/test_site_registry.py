@@ -0,0 +1,88 @@
+import time
+import pytest
+from backend.site_registry import CLAIM_TIMEOUT, SiteRegistry
+
+URL = "https://example.com/"
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "registry.db")
+
+@pytest.fixture
+def registry(path):
+    registry = SiteRegistry(path)
+    yield registry
+    registry.close()
+
+def _age_heartbeat(registry, site_id):
+    with registry.conn:
+        registry.conn.execute("UPDATE sites SET heartbeat = ? WHERE site_id = ?", (time.time() - CLAIM_TIMEOUT - 1, site_id))
+
+def _ready(registry, site_id, vectors, last_access):
+    registry.begin_indexing(site_id, f"https://{site_id}/", "setup")
+    registry.mark_ready(site_id, vectors)
+    with registry.conn:
+        registry.conn.execute("UPDATE sites SET last_access = ? WHERE site_id = ?", (last_access, site_id))
+
+def test_site_ids_follow_the_canonical_url():
+    assert SiteRegistry.site_id_for("https://Example.com") == SiteRegistry.site_id_for("https://example.com/#top")
+    assert SiteRegistry.collection_name_for("abc") == "site_abc"
+
+def test_one_indexing_claim_at_a_time_across_connections(registry, path):
+    other = SiteRegistry(path)
+    site_id = registry.site_id_for(URL)
+    assert registry.begin_indexing(site_id, URL, "run-1")
+    assert not other.begin_indexing(site_id, URL, "run-2")
+    assert other.heartbeat(site_id, "run-1")
+    assert not other.heartbeat(site_id, "run-2")
+
+    registry.mark_ready(site_id, 10)
+    assert other.is_fresh(site_id)
+    assert other.begin_indexing(site_id, URL, "run-2")
+    # Re-indexing keeps the previous index's count until it finishes
+    assert other.get(site_id)["vector_count"] == 10
+    other.close()
+
+def test_stale_claim_is_taken_over(registry):
+    site_id = registry.site_id_for(URL)
+    registry.begin_indexing(site_id, URL, "crashed")
+    _age_heartbeat(registry, site_id)
+    assert registry.begin_indexing(site_id, URL, "run-2")
+    assert not registry.heartbeat(site_id, "crashed")
+
+def test_eviction_excludes_indexing(registry):
+    site_id = registry.site_id_for(URL)
+    _ready(registry, site_id, 5, time.time())
+    assert registry.begin_eviction(site_id)
+    assert not registry.begin_eviction(site_id)
+    assert not registry.begin_indexing(site_id, URL, "run")
+    registry.remove(site_id)
+    assert registry.get(site_id) is None
+    assert registry.begin_indexing(site_id, URL, "run")
+    assert not registry.begin_eviction(site_id)
+
+def test_cancelled_run_keeps_an_earlier_index(registry):
+    _ready(registry, "old", 5, time.time())
+    registry.begin_indexing("old", "https://old/", "run")
+    registry.mark_cancelled("old")
+    assert registry.get("old")["status"] == "ready"
+    registry.begin_indexing("new", "https://new/", "run")
+    registry.mark_cancelled("new")
+    assert registry.get("new")["status"] == "failed"
+
+def test_eviction_candidates_are_least_recently_used(registry):
+    now = time.time()
+    _ready(registry, "oldest", 40, now - 300)
+    _ready(registry, "older", 40, now - 200)
+    _ready(registry, "recent", 40, now - 100)
+    registry.begin_indexing("busy", "https://busy/", "run")
+    with registry.conn:
+        registry.conn.execute("UPDATE sites SET vector_count = 40, last_access = 0 WHERE site_id = 'busy'")
+
+    assert registry.total_vectors() == 160
+    assert registry.eviction_candidates(budget=100) == ["oldest", "older"]
+    assert registry.eviction_candidates(budget=100, protect={"oldest"}) == ["older", "recent"]
+    assert registry.eviction_candidates(budget=200) == []
+    # A crashed indexing run no longer protects its site
+    _age_heartbeat(registry, "busy")
+    assert registry.eviction_candidates(budget=100)[0] == "busy"
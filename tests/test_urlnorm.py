@@ -0,0 +1,23 @@
+from backend.urlnorm import canonicalize_url, resolve_canonical, same_site
+
+def test_folds_scheme_host_port_and_trailing_slash():
+    assert canonicalize_url("http://WWW.Example.com:80/docs/") == canonicalize_url("https://example.com/docs")
+
+def test_folds_default_documents_and_dot_segments():
+    assert canonicalize_url("https://example.com/a/./b/../index.html") == "https://example.com/a"
+
+def test_drops_tracking_and_default_params_and_sorts_the_rest():
+    url = "https://example.com/list?utm_source=x&b=2&gclid=1&a=1&page=1&fbclid=z"
+    assert canonicalize_url(url) == "https://example.com/list?a=1&b=2"
+
+def test_keeps_params_that_can_select_content():
+    assert canonicalize_url("https://example.com/?p=1") != canonicalize_url("https://example.com/?p=2")
+    assert canonicalize_url("https://example.com/tree?ref=main") == "https://example.com/tree?ref=main"
+
+def test_ignores_fragment():
+    assert canonicalize_url("https://example.com/a#section") == "https://example.com/a"
+
+def test_resolve_canonical_ignores_other_sites():
+    assert resolve_canonical("https://example.com/a", "https://other.com/a") is None
+    assert resolve_canonical("https://example.com/a?utm_medium=x", "http://www.example.com/a/") == "https://example.com/a"
+    assert same_site("https://www.example.com/x", "example.com")